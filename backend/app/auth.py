@@ -1,7 +1,10 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 
 from fastapi import Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from sqlalchemy.orm import Session
@@ -9,28 +12,36 @@ import os
 from dotenv import load_dotenv
 
 from . import models, database
+from .config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES, BCRYPT_ROUNDS, PASSWORD_HASH_WORKERS
 from .dependencies import get_current_user
+from .services.token_cache import decode_token_cached
 from .security import oauth2_scheme  # ✅ shared import
 
 # Load environment variables from .env
 load_dotenv()
 
-SECRET_KEY = os.getenv("SECRET_KEY", "fallback-secret-key")
-ALGORITHM = os.getenv("ALGORITHM", "HS256")
-ACCESS_TOKEN_EXPIRE_MINUTES = 60
+# Password hashing context. Hashes made with a different work factor are
+# flagged by needs_update() and transparently rehashed on the next login.
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt releases the GIL, so a small thread pool gives real parallelism while
+# capping how many CPU-heavy hashes run at once during a login burst.
+_hash_pool = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
 
 # ---------------- Password Utilities ----------------
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Compare plain password with hashed password."""
-    return pwd_context.verify(plain_password, hashed_password)
+    return _hash_pool.submit(pwd_context.verify, plain_password, hashed_password).result()
 
 def get_password_hash(password: str) -> str:
     """Hash a plain password."""
-    return pwd_context.hash(password)
+    return _hash_pool.submit(pwd_context.hash, password).result()
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify on the hashing pool; also returns a new hash if the policy changed."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_pool, pwd_context.verify_and_update, plain_password, hashed_password)
 
 # ---------------- Authentication Logic ----------------
 
@@ -41,6 +52,43 @@ def authenticate_user(db: Session, username: str, password: str):
         return user
     return None
 
+async def authenticate_user_async(db: Session, username: str, password: str):
+    """
+    Async variant used by the login route: the DB lookup runs in the request
+    threadpool and bcrypt runs on the bounded hashing pool, so neither blocks
+    the event loop. Outdated hashes are upgraded in place.
+
+    The read transaction is ended before hashing, so a login burst queues on
+    the hashing pool rather than holding DB pool connections through bcrypt.
+    """
+    def load_user():
+        user = db.query(models.User).filter(models.User.username == username).first()
+        if user:
+            db.expunge(user)  # keep its loaded attributes through the rollback
+        db.rollback()
+        return user
+
+    user = await run_in_threadpool(load_user)
+    if not user:
+        return None
+
+    valid, new_hash = await verify_and_update_password(password, user.hashed_password)
+    if not valid:
+        return None
+
+    if new_hash:
+        # Short write transaction, only when the hash policy changed
+        def save_hash():
+            db.query(models.User).filter(models.User.id == user.id).update(
+                {models.User.hashed_password: new_hash}, synchronize_session=False
+            )
+            db.commit()
+
+        await run_in_threadpool(save_hash)
+        user.hashed_password = new_hash
+
+    return user
+
 # ---------------- JWT Token Creation ----------------
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -66,7 +114,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 def get_user_role(token: str = Depends(oauth2_scheme)):
     """Get role from JWT token without full user lookup."""
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_token_cached(token, SECRET_KEY, ALGORITHM)
         return payload.get("role", "student")  # Default to student
     except JWTError:
         raise HTTPException(
@@ -9,6 +9,12 @@ load_dotenv()
 
 # Database
 DATABASE_URL = os.getenv("DATABASE_URL")
+# Optional; derived from DATABASE_URL (asyncpg / aiosqlite) when unset
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
+# Comma-separated read replicas for read-only routes; empty = use the primary
+DATABASE_REPLICA_URLS = [u.strip() for u in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if u.strip()]
+REPLICA_STRATEGY = os.getenv("REPLICA_STRATEGY", "round_robin")  # round_robin | least_loaded
+REPLICA_RETRY_SECONDS = int(os.getenv("REPLICA_RETRY_SECONDS", "30"))
 
 # JWT config
 SECRET_KEY = os.getenv("SECRET_KEY", "fallback_secret_key")
@@ -20,3 +26,60 @@ PROFILE_IMAGE_DIR = BASE_DIR / "static" / "profiles"
 # ✅ OpenAI
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+
+# Authenticated-user cache (per worker)
+USER_CACHE_TTL_SECONDS = int(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "5000"))
+
+# Write-behind activity tracking
+ACTIVITY_FLUSH_INTERVAL_SECONDS = float(os.getenv("ACTIVITY_FLUSH_INTERVAL_SECONDS", "15"))
+ACTIVITY_RECENT_WINDOW_SECONDS = int(os.getenv("ACTIVITY_RECENT_WINDOW_SECONDS", "900"))
+
+# Password hashing
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# Verified-JWT cache (per worker)
+JWT_CACHE_MAX_ENTRIES = int(os.getenv("JWT_CACHE_MAX_ENTRIES", "10000"))
+
+# Database engine profile
+DB_ECHO = os.getenv("DB_ECHO", "false").lower() == "true"
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))  # 0 = no limit
+DB_SLOW_CHECKOUT_MS = float(os.getenv("DB_SLOW_CHECKOUT_MS", "500"))
+
+# Per-request SQL instrumentation (X-DB-Queries / X-DB-Time headers). Off by
+# default so production responses don't expose DB timings; turn it on in dev.
+SQL_PROFILING = os.getenv("SQL_PROFILING", "false").lower() == "true"
+SQL_N_PLUS_ONE_THRESHOLD = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", "5"))  # same statement N times in one request
+SQL_QUERY_BUDGET_ENFORCE = os.getenv("SQL_QUERY_BUDGET_ENFORCE", "false").lower() == "true"  # test mode: fail over-budget routes
+
+# Create tables / apply schema_upgrades at import time (local dev only; deploys run `python -m app.schema_upgrades`)
+SCHEMA_AUTO_MIGRATE = os.getenv("SCHEMA_AUTO_MIGRATE", "false").lower() == "true"
+
+# Shared class segment of the student dashboard (per worker; dropped on timetable/topic/assignment/event commits)
+DASHBOARD_CACHE_TTL_SECONDS = int(os.getenv("DASHBOARD_CACHE_TTL_SECONDS", "300"))
+
+# First day of the current term; "term" progress series count weeks from here (YYYY-MM-DD)
+TERM_START_DATE = os.getenv("TERM_START_DATE", "2025-06-09")
+
+# Section queries /parents/children/overview runs at once (each holds an async pool connection)
+PARENT_OVERVIEW_CONCURRENCY = int(os.getenv("PARENT_OVERVIEW_CONCURRENCY", "4"))
+
+# Theory-answer embeddings: "local" runs the bundled sentence model in-process (falls back to the
+# OpenAI API if it can't load), "remote" always calls the API
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "local")
+SENTENCE_MODEL_PATH = os.getenv("SENTENCE_MODEL_PATH", str(BASE_DIR / "app" / "sentence_model"))
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+
+# Compiled test/exam answer keys (per worker; dropped on topic/subject/question commits)
+ANSWER_KEY_CACHE_TTL_SECONDS = int(os.getenv("ANSWER_KEY_CACHE_TTL_SECONDS", "300"))
+
+# Assignment theory grading (chat model); a 10-answer assignment runs GRADING_CONCURRENCY calls at a time
+GRADING_MODEL = os.getenv("GRADING_MODEL", "gpt-4")
+GRADING_CONCURRENCY = int(os.getenv("GRADING_CONCURRENCY", "5"))
+GRADING_TIMEOUT_SECONDS = float(os.getenv("GRADING_TIMEOUT_SECONDS", "30"))
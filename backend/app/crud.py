@@ -7,7 +7,10 @@ from .models import Assignment, AssignmentSubmission, User, Subject
 
 from . import models, schemas
 from .schemas import QuestionUpdate, AssignmentAdminOut
-from .services.grading import grade_theory_answer
+from .services.grading import grade_theory_answers
+from .services.reference_embeddings import store_reference_embeddings
+from .services.score_rollups import forget_assignment, record_subject_attempt
+from .services.student_dashboard_service import build_student_dashboard
 
 # -------------------- PDF & Question Logic --------------------
 
@@ -45,12 +48,15 @@ def update_question(db: Session, question_id: int, updates: QuestionUpdate) -> m
     if not db_q:
         raise ValueError("Question not found")
 
-    for field, value in updates.dict(exclude_unset=True).items():
+    changes = updates.dict(exclude_unset=True)
+    for field, value in changes.items():
         setattr(db_q, field, value)
 
     db_q.question_type = determine_question_type(db_q.option_a, db_q.option_b, db_q.option_c, db_q.option_d)
 
     try:
+        if "answer" in changes:
+            store_reference_embeddings(db, [db_q])
         db.commit()
         db.refresh(db_q)
         return db_q
@@ -127,15 +133,15 @@ def mark_attendance(db: Session, student_id: int, status: str, day: date = date.
 def bulk_mark_attendance(db: Session, records: List[schemas.BulkAttendanceRecord], date_override: Optional[date] = None) -> List[models.Attendance]:
     attendance_date = date_override or date.today()
     results = []
+    # One row per student and day: a student listed twice keeps the last status
+    statuses = {rec.student_id: rec.status for rec in records if rec.student_id and rec.status}
     try:
-        for rec in records:
-            if not rec.student_id or not rec.status:
-                continue
-            record = db.query(models.Attendance).filter_by(student_id=rec.student_id, date=attendance_date).first()
+        for student_id, status in statuses.items():
+            record = db.query(models.Attendance).filter_by(student_id=student_id, date=attendance_date).first()
             if record:
-                record.status = rec.status
+                record.status = status
             else:
-                record = models.Attendance(student_id=rec.student_id, status=rec.status, date=attendance_date)
+                record = models.Attendance(student_id=student_id, status=status, date=attendance_date)
                 db.add(record)
             results.append(record)
         db.commit()
@@ -309,6 +315,7 @@ def update_assignment(db: Session, assignment_id: int, updates: schemas.Assignme
 def delete_assignment(db: Session, assignment_id: int) -> bool:
     assignment = db.query(models.Assignment).filter_by(id=assignment_id).first()
     if assignment:
+        forget_assignment(db, assignment_id)  # its submissions leave the subject rollups too
         db.delete(assignment)
         db.commit()
         return True
@@ -316,80 +323,95 @@ def delete_assignment(db: Session, assignment_id: int) -> bool:
 
 # -------------------- Assignment Submission Logic --------------------
 
-def submit_assignment(db: Session, submission: schemas.AssignmentSubmissionCreate) -> models.AssignmentSubmission:
-    existing = db.query(models.AssignmentSubmission).filter_by(
-        assignment_id=submission.assignment_id,
-        student_id=submission.student_id
+def _existing_submission(db: Session, assignment_id: int, student_id: int):
+    return db.query(models.AssignmentSubmission.id).filter_by(
+        assignment_id=assignment_id,
+        student_id=student_id
     ).first()
-    if existing:
-        raise ValueError("You have already submitted this assignment.")
 
-    db_submission = models.AssignmentSubmission(
-        assignment_id=submission.assignment_id,
-        student_id=submission.student_id,
-        file_url=submission.file_url,
-        submitted_at=datetime.utcnow(),
-        status="submitted"  # ✅ Set status to submitted
-    )
 
-    try:
-        db.add(db_submission)
-        db.flush()  # To get db_submission.id
+def submit_assignment(db: Session, submission: schemas.AssignmentSubmissionCreate) -> models.AssignmentSubmission:
+    if _existing_submission(db, submission.assignment_id, submission.student_id):
+        raise ValueError("You have already submitted this assignment.")
 
-        correct_answers = 0
-        total_questions = 0
+    # ✅ Load the answer key: one query per question type, plain values only
+    theory_ids = [ta.question_id for ta in submission.theory_answers]
+    objective_ids = [oa.question_id for oa in submission.objective_answers]
+    model_answers = dict(db.query(
+        models.AssignmentTheoryQuestion.id, models.AssignmentTheoryQuestion.model_answer
+    ).filter(
+        models.AssignmentTheoryQuestion.assignment_id == submission.assignment_id,
+        models.AssignmentTheoryQuestion.id.in_(theory_ids)
+    ).all()) if theory_ids else {}
+    correct_options = dict(db.query(
+        models.AssignmentObjectiveQuestion.id, models.AssignmentObjectiveQuestion.correct_option
+    ).filter(
+        models.AssignmentObjectiveQuestion.assignment_id == submission.assignment_id,
+        models.AssignmentObjectiveQuestion.id.in_(objective_ids)
+    ).all()) if objective_ids else {}
+    subject_id = db.query(models.Assignment.subject_id).filter_by(id=submission.assignment_id).scalar()
+
+    # ✅ End the read-only transaction: no pool connection is held while the model grades
+    db.rollback()
+
+    theory_answers = []
+    for ta in submission.theory_answers:
+        if ta.question_id not in model_answers:
+            print(f"❌ Invalid theory question ID {ta.question_id} for assignment {submission.assignment_id}")
+            continue
+        theory_answers.append(ta)
+    scores = grade_theory_answers([(model_answers[ta.question_id], ta.student_answer) for ta in theory_answers])
 
-        # ✅ Process theory answers
-        for ta in submission.theory_answers:
-            q = db.query(models.AssignmentTheoryQuestion).filter_by(
-                id=ta.question_id,
-                assignment_id=submission.assignment_id
-            ).first()
-            if not q:
-                print(f"❌ Invalid theory question ID {ta.question_id} for assignment {submission.assignment_id}")
-                continue
+    objective_answers = []
+    for oa in submission.objective_answers:
+        if oa.question_id not in correct_options:
+            print(f"❌ Invalid objective question ID {oa.question_id} for assignment {submission.assignment_id}")
+            continue
+        objective_answers.append((oa, oa.selected_option == correct_options[oa.question_id]))
 
-            score = grade_theory_answer(q.model_answer, ta.student_answer)
-            is_correct = score >= 1.0  # Adjust threshold if needed
+    correct_answers = sum(1 for score in scores if score >= 1.0)  # Adjust threshold if needed
+    correct_answers += sum(1 for _, is_correct in objective_answers if is_correct)
+    total_questions = len(theory_answers) + len(objective_answers)
 
-            if is_correct:
-                correct_answers += 1
-            total_questions += 1
+    # ✅ Everything is scored: write the submission, its answers and the rollup in one short transaction
+    try:
+        # Grading can take a while; a second submission may have landed meanwhile
+        if _existing_submission(db, submission.assignment_id, submission.student_id):
+            db.rollback()
+            raise ValueError("You have already submitted this assignment.")
+
+        db_submission = models.AssignmentSubmission(
+            assignment_id=submission.assignment_id,
+            student_id=submission.student_id,
+            file_url=submission.file_url,
+            submitted_at=datetime.utcnow(),
+            score=round(correct_answers, 2),
+            status="completed"  # ✅ Graded immediately
+        )
+        db.add(db_submission)
+        db.flush()  # To get db_submission.id
 
-            db.add(models.AssignmentTheoryAnswer(
+        db.add_all([
+            models.AssignmentTheoryAnswer(
                 submission_id=db_submission.id,
                 question_id=ta.question_id,
                 student_answer=ta.student_answer,
                 score=score
-            ))
-
-        # ✅ Process objective answers
-        for oa in submission.objective_answers:
-            q = db.query(models.AssignmentObjectiveQuestion).filter_by(
-                id=oa.question_id,
-                assignment_id=submission.assignment_id
-            ).first()
-            if not q:
-                print(f"❌ Invalid objective question ID {oa.question_id} for assignment {submission.assignment_id}")
-                continue
-
-            is_correct = oa.selected_option == q.correct_option
-            if is_correct:
-                correct_answers += 1
-            total_questions += 1
-
-            db.add(models.AssignmentObjectiveAnswer(
+            )
+            for ta, score in zip(theory_answers, scores)
+        ] + [
+            models.AssignmentObjectiveAnswer(
                 submission_id=db_submission.id,
                 question_id=oa.question_id,
                 selected_option=oa.selected_option,
                 is_correct=is_correct
-            ))
-
-        # ✅ Save score directly
-        db_submission.score = round(correct_answers, 2)
+            )
+            for oa, is_correct in objective_answers
+        ])
 
-        # ✅ Automatically set status to completed if graded immediately
-        db_submission.status = "completed"
+        # ✅ Roll the score into the student's subject summary in the same transaction
+        record_subject_attempt(db, submission.student_id, subject_id, "assignment",
+                               db_submission.score, total_questions, db_submission.submitted_at)
 
         db.commit()
         db.refresh(db_submission)
@@ -627,14 +649,13 @@ def is_child_linked_to_parent(db: Session, parent_id: int, child_id: int):
     )
 
 def get_student_dashboard_data(db: Session, student_id: int):
-    # You can customize this as needed — here's a basic mockup
-    return schemas.StudentDashboardOut(
-        student_name="Jane Doe",
-        date=date.today(),
-        current_week=31,
-        today_topics=[],
-        assignments=[],
-        progress=schemas.DashboardProgress(score=90, total=100),
-        upcoming_events=[],
-        today_schedule=[],
+    student = db.query(models.User).filter(models.User.id == student_id).first()
+    if not student:
+        return None
+    return build_student_dashboard(
+        db,
+        student,
+        student.level,
+        student.department,
+        student_name=(student.full_name or "").strip() or None
     )
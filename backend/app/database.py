@@ -1,16 +1,155 @@
+import itertools
+import threading
+import time
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
-from .config import DATABASE_URL
+from .config import (
+    DATABASE_URL,
+    ASYNC_DATABASE_URL,
+    DATABASE_REPLICA_URLS,
+    REPLICA_STRATEGY,
+    REPLICA_RETRY_SECONDS,
+    DB_ECHO,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE,
+    DB_POOL_PRE_PING,
+    DB_STATEMENT_TIMEOUT_MS,
+)
+from .services.db_telemetry import TimedQueuePool, TimedAsyncAdaptedQueuePool
+
+
+def engine_options(url: str, is_async: bool = False) -> dict:
+    """Engine keyword arguments for `url`, driven by the DB_* settings."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    options = {"echo": DB_ECHO, "pool_pre_ping": DB_POOL_PRE_PING}
+
+    # In-memory SQLite lives inside a single connection; keep SQLAlchemy's default pool.
+    if backend == "sqlite" and parsed.database in (None, "", ":memory:"):
+        return options
+
+    options.update(
+        poolclass=TimedAsyncAdaptedQueuePool if is_async else TimedQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+    )
+
+    if DB_STATEMENT_TIMEOUT_MS and backend == "postgresql":
+        if is_async:
+            options["connect_args"] = {"server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"}
+
+    return options
+
+
+def async_database_url(url: str) -> str:
+    """Same database as `url`, addressed through an asyncio driver."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
 
-engine = create_engine(DATABASE_URL, echo=True)
+    if backend == "postgresql":
+        parsed = parsed.set(drivername="postgresql+asyncpg")
+        # asyncpg takes `ssl`, not libpq's `sslmode`
+        sslmode = parsed.query.get("sslmode")
+        if sslmode:
+            parsed = parsed.difference_update_query(["sslmode"]).update_query_dict({"ssl": sslmode})
+    elif backend == "sqlite":
+        parsed = parsed.set(drivername="sqlite+aiosqlite")
+
+    return parsed.render_as_string(hide_password=False)
+
+
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Async engine for `async def` routes, so their queries don't block the event loop
+_async_url = ASYNC_DATABASE_URL or async_database_url(DATABASE_URL)
+async_engine = create_async_engine(_async_url, **engine_options(_async_url, is_async=True))
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False, autoflush=False)
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# -------------------- Read Replicas --------------------
+
+class Replica:
+    def __init__(self, url: str):
+        self.url = url
+        self.engine = create_engine(url, **engine_options(url))
+        self.down_until = 0.0
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.down_until
+
+    def mark_down(self, error: Exception) -> None:
+        self.down_until = time.monotonic() + REPLICA_RETRY_SECONDS
+        print(f"⚠️ Replica {make_url(self.url).render_as_string()} unavailable, retrying in {REPLICA_RETRY_SECONDS}s: {error}")
+
+
+replicas = [Replica(url) for url in DATABASE_REPLICA_URLS]
+_round_robin = itertools.count()
+_replica_lock = threading.Lock()
+
+
+def replica_candidates() -> list:
+    """Healthy replicas, best first according to REPLICA_STRATEGY."""
+    healthy = [r for r in replicas if r.healthy]
+    if not healthy:
+        return []
+
+    if REPLICA_STRATEGY == "least_loaded":
+        return sorted(healthy, key=lambda r: r.engine.pool.checkedout() if hasattr(r.engine.pool, "checkedout") else 0)
+
+    with _replica_lock:
+        start = next(_round_robin) % len(healthy)
+    return healthy[start:] + healthy[:start]
+
+
+def open_read_session():
+    """
+    Session bound to a replica when DATABASE_REPLICA_URLS is set, otherwise
+    (or if every replica is unreachable) to the primary. The caller closes it.
+    """
+    for replica in replica_candidates():
+        candidate = SessionLocal(bind=replica.engine)
+        try:
+            # Connect up front so an unreachable replica falls through to the next one.
+            candidate.connection()
+        except OperationalError as e:
+            candidate.close()
+            replica.mark_down(e)
+            continue
+        return candidate
+
+    return SessionLocal()
+
+
+def get_read_db():
+    """Session for read-only routes (see open_read_session). Never write through it."""
+    db = open_read_session()
+    try:
+        yield db
+    finally:
+        db.close()
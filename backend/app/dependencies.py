@@ -8,6 +8,10 @@ from .config import SECRET_KEY, ALGORITHM
 from .database import get_db
 from .models import User, TeacherProfile
 from .security import oauth2_scheme
+from .services.activity_tracker import record_activity
+from .services.teacher_context import TeacherContext, load_teacher_context
+from .services.token_cache import decode_token_cached
+from .services.user_cache import get_cached_user, get_token_version
 import os
 
 
@@ -18,7 +22,7 @@ ENV = os.getenv("ENV", "development")
 # 🔐 Shared function to decode JWT tokens
 def decode_token(token: str) -> dict:
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_token_cached(token, SECRET_KEY, ALGORITHM)
         return payload
     except JWTError as e:
         print(f"❌ JWT decoding error: {e}")
@@ -43,12 +47,7 @@ def get_current_user(
             detail="Invalid token: user_id missing"
         )
 
-    user = (
-        db.query(User)
-        .options(joinedload(User.teacher_profile))
-        .filter(User.id == user_id)
-        .first()
-    )
+    user = get_cached_user(db, user_id)
 
     if not user:
         raise HTTPException(
@@ -56,15 +55,91 @@ def get_current_user(
             detail="User not found"
         )
 
-    # ✅ Mark user as recently active
-    now = datetime.utcnow()
-    user.last_login = now
-    user.last_active = now  
-    db.commit()
+    if "tv" in payload and payload["tv"] != (user.token_version or 0):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked"
+        )
+
+    # ✅ Mark user as recently active (buffered, flushed in batches)
+    record_activity(user.id)
 
     return user
 
 
+# 🪪 Claims-only principal: authorizes from verified JWT claims
+class Principal:
+    """
+    Identity built from token claims (user_id, role, username).
+
+    Role checks never touch the database. The ORM user is hydrated lazily the
+    first time `.user` (or any other User attribute) is accessed.
+    """
+
+    def __init__(self, user_id: int, role: str, username: Optional[str], db: Session, user: Optional[User] = None):
+        self.id = user_id
+        self.role = role
+        self.username = username
+        self._db = db
+        self._user = user
+
+    @property
+    def is_admin(self) -> bool:
+        return self.role == "admin"
+
+    @property
+    def user(self) -> User:
+        if self._user is None:
+            self._user = get_cached_user(self._db, self.id)
+            if self._user is None:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="User not found"
+                )
+        return self._user
+
+    def __getattr__(self, name):
+        # Anything beyond id/role/username (level, full_name, ...) needs the row.
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.user, name)
+
+
+def get_current_principal(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+) -> Principal:
+    payload = decode_token(token)
+    user_id = payload.get("user_id")
+    role = payload.get("role")
+
+    if user_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token: user_id missing"
+        )
+
+    # Tokens issued before token versions existed fall back to a full lookup.
+    if role is None or "tv" not in payload:
+        user = get_current_user(token=token, db=db)
+        return Principal(user.id, user.role, user.username, db, user=user)
+
+    current_version = get_token_version(db, user_id)
+    if current_version is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found"
+        )
+    if payload["tv"] != current_version:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked"
+        )
+
+    record_activity(user_id)
+    return Principal(user_id, role, payload.get("sub"), db)
+
+
 class WebSocketAuthenticationError(Exception):
     pass
 
@@ -74,7 +149,7 @@ async def get_current_user_ws(websocket: WebSocket, db: Session) -> User:
         raise WebSocketAuthenticationError("❌ Missing token in WebSocket connection")
 
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_token_cached(token, SECRET_KEY, ALGORITHM)
         user_id = payload.get("user_id")
         if user_id is None:
             raise WebSocketAuthenticationError("❌ Token payload missing user_id")
@@ -82,7 +157,7 @@ async def get_current_user_ws(websocket: WebSocket, db: Session) -> User:
     except JWTError as e:
         raise WebSocketAuthenticationError(f"❌ JWT decoding error: {e}")
 
-    user = db.query(User).filter(User.id == user_id).first()
+    user = get_cached_user(db, user_id)
     if not user:
         raise WebSocketAuthenticationError(f"❌ No user found with id: {user_id}")
 
@@ -104,7 +179,7 @@ def get_current_admin_or_teacher_user(
 
 
 # 🛡️ Admin Only
-def get_current_admin_user(user: User = Depends(get_current_user)) -> User:
+def get_current_admin_user(user: Principal = Depends(get_current_principal)) -> Principal:
     if user.role != "admin":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -114,7 +189,7 @@ def get_current_admin_user(user: User = Depends(get_current_user)) -> User:
 
 
 # 🎓 Student Only
-def get_current_student_user(user: User = Depends(get_current_user)) -> User:
+def get_current_student_user(user: Principal = Depends(get_current_principal)) -> Principal:
     if user.role != "student":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -123,11 +198,27 @@ def get_current_student_user(user: User = Depends(get_current_user)) -> User:
     return user
 
 
-# 🧑‍🏫 Teacher with Profile
-def get_current_teacher_user(
+# 🎓 Student Only, with the user row loaded
+def get_current_student_record(user: Principal = Depends(get_current_student_user)) -> User:
+    # Sync dependencies run in the threadpool, so for `async def` routes any
+    # hydration query happens here instead of on the event loop.
+    return user.user
+
+
+# 🧑‍🏫 Teacher context, resolved once per request
+def resolve_teacher_context(
     db: Session = Depends(get_db),
     user: User = Depends(get_current_user)
-) -> TeacherProfile:
+) -> Optional[TeacherContext]:
+    # FastAPI caches this per request, so every dependency and route asking
+    # for the teacher profile shares one resolution.
+    return load_teacher_context(db, user)
+
+
+def get_teacher_context(
+    user: User = Depends(get_current_user),
+    context: Optional[TeacherContext] = Depends(resolve_teacher_context)
+) -> TeacherContext:
     print(f"🧑‍🏫 Checking teacher → ID: {user.id}, Role: {user.role}")
 
     if user.role != "teacher":
@@ -136,16 +227,19 @@ def get_current_teacher_user(
             detail="Only teachers can access this route"
         )
 
-    profile = db.query(TeacherProfile).filter_by(user_id=user.id).first()
-
-    if not profile:
+    if context is None:
         print(f"⚠️ No teacher profile found for user ID: {user.id}")
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Teacher profile not found"
         )
 
-    return profile
+    return context
+
+
+# 🧑‍🏫 Teacher with Profile
+def get_current_teacher_user(context: TeacherContext = Depends(get_teacher_context)) -> TeacherProfile:
+    return context.profile
 
 
 # 🎯 Role Checker (Generic)
@@ -153,7 +247,7 @@ class RoleChecker:
     def __init__(self, allowed_roles: List[str]):
         self.allowed_roles = allowed_roles
 
-    def __call__(self, user: User = Depends(get_current_user)) -> User:
+    def __call__(self, user: Principal = Depends(get_current_principal)) -> Principal:
         if user.role not in self.allowed_roles:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -164,17 +258,15 @@ class RoleChecker:
 
 # 🧑‍🏫 Teacher Profile with Class Validation
 def validate_teacher_with_class(
-    db: Session = Depends(get_db),
-    user: User = Depends(get_current_user)
+    context: Optional[TeacherContext] = Depends(resolve_teacher_context)
 ) -> TeacherProfile:
-    profile = db.query(TeacherProfile).filter_by(user_id=user.id).first()
-
-    if not profile:
+    if context is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Teacher profile not found"
         )
 
+    profile = context.profile
     if not profile.level:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -185,7 +277,7 @@ def validate_teacher_with_class(
 
 
 # 🔒 Require Teacher Role (Quick Check)
-def require_teacher(current_user: User = Depends(get_current_user)) -> User:
+def require_teacher(current_user: Principal = Depends(get_current_principal)) -> Principal:
     print(f"🔐 User → ID: {current_user.id} | Username: {current_user.username} | Role: {current_user.role}")
 
     if current_user.role != "teacher":
@@ -25,6 +25,7 @@ from .database import get_db
 from .models import Question
 from .services.pdf_parser import extract_text_from_pdf
 from .services.answer_checker import check_answer
+from .services.reference_embeddings import reference_vector
 from .auth import authenticate_user, create_access_token, get_current_user, get_password_hash
 from app.routers import (
     subjects, students, topics, progress, answers, topic_questions,
@@ -34,7 +35,11 @@ from app.routers import (
     chat_router, student_progress, assignment_routes, admin_dashboard_router, admin_activity, ask_me_anything
 )
 from .services.qa_generator import split_text_into_chunks, generate_questions_from_pdf_text
-from .config import PROFILE_IMAGE_DIR
+from .config import PROFILE_IMAGE_DIR, SQL_PROFILING, SQL_QUERY_BUDGET_ENFORCE, SCHEMA_AUTO_MIGRATE
+from .services.user_cache import invalidate_user
+from .services import activity_tracker
+from .services.query_profiler import QueryProfilerMiddleware
+from .schema_upgrades import migrate
 from app.routers.messaging_router import router as messaging_router
 from app.routers import parent_dashboard_router
 
@@ -86,11 +91,39 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-DB-Queries", "X-DB-Time"],
 )
 
+# -------------------- SQL Instrumentation --------------------
+# Benchmarks check @query_budget through capture_queries() and don't need it.
+
+if SQL_PROFILING or SQL_QUERY_BUDGET_ENFORCE:
+    app.add_middleware(QueryProfilerMiddleware)
+
 # -------------------- Database Setup --------------------
+# Schema changes run as a deploy step (`python -m app.schema_upgrades`), not on
+# every worker boot. SCHEMA_AUTO_MIGRATE=true restores the old behaviour for
+# local development.
+
+if SCHEMA_AUTO_MIGRATE:
+    migrate(database.engine)
+
+
+# -------------------- Background Workers --------------------
+
+@app.on_event("startup")
+def start_activity_flusher():
+    activity_tracker.start_flusher()
+
 
-database.Base.metadata.create_all(bind=database.engine)
+@app.on_event("shutdown")
+def drain_activity_buffer():
+    activity_tracker.stop_flusher()
+
+
+@app.on_event("shutdown")
+async def close_async_engine():
+    await database.async_engine.dispose()
 
 
 # -------------------- Routers --------------------
@@ -177,13 +210,6 @@ async def catch_all(full_path: str):
     # Otherwise, always serve index.html so React Router takes over
     return FileResponse(str(FRONTEND_DIST / "index.html"))
 
-# -------------------- Final Logging --------------------
-
-print("✅ Timetable router imported successfully")
-print("\n✅ Registered Routes:")
-for route in app.routes:
-    print(f"{route.path} → {route.name}")
-
 # -------------------- Auth Routes --------------------
 
 @app.post("/register", response_model=schemas.UserOut)
@@ -253,6 +279,7 @@ def update_student(student_id: int, updated_data: schemas.UserUpdate = Body(...)
     if 'student_class' in updated_data.dict(exclude_unset=True):
         student.level = updated_data.student_class.strip().lower()
     db.commit()
+    invalidate_user(student_id)
     db.refresh(student)
     return student
 
@@ -366,7 +393,7 @@ def submit_answer(answer: schemas.UserAnswerCreate, db: Session = Depends(get_db
     question = db.get(models.Question, answer.question_id)
     if not question:
         raise HTTPException(status_code=404, detail="Question not found")
-    is_correct, _ = check_answer(answer.answer, question.answer)
+    is_correct, _, _ = check_answer(answer.answer, question.answer, *reference_vector(db, question))
     user_answer_record = crud.save_user_answer(db, answer, is_correct, correction=question.answer)
     return schemas.UserAnswerOut(
         id=user_answer_record.id,
@@ -401,10 +428,6 @@ def test():
     return {"status": "ok"}
 
 
-for route in app.routes:
-    print(f"Route: {route.path}, Name: {route.name}, Type: {type(route).__name__}")
-
-
 @app.get("/test-connection")
 def test_connection():
     return {"message": "Backend is running"}
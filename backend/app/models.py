@@ -1,10 +1,21 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Text, DateTime, Date, Float, Numeric, func, Table
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Text, DateTime, Date, Float, Numeric, func, Table, event, Index, UniqueConstraint, LargeBinary
 from sqlalchemy.orm import relationship
+from sqlalchemy.orm.base import NO_VALUE, NEVER_SET
 from datetime import datetime, date
 from .database import Base
 from sqlalchemy.ext.hybrid import hybrid_property
 
 
+def normalized(column):
+    """
+    lower(trim(column)): the one spelling used for case/space-insensitive
+    matches on level, day, department and subject name. Keep queries on this
+    exact expression so they hit the functional indexes declared at the
+    bottom of this module; compare against `value.strip().lower()`.
+    """
+    return func.lower(func.trim(column))
+
+
 
 
 class ScheduledEvent(Base):
@@ -33,6 +44,7 @@ class User(Base):
     department = Column(String, nullable=True)
     last_login = Column(DateTime, nullable=True, default=None)
     last_active = Column(DateTime, nullable=True, default=datetime.utcnow)
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
 
     # Relationships
     user_answers = relationship("UserAnswer", back_populates="user", cascade="all, delete-orphan")
@@ -75,6 +87,14 @@ class User(Base):
         return self.role == "admin"
 
 
+@event.listens_for(User.role, "set", active_history=True)
+def _revoke_tokens_on_role_change(target, value, oldvalue, initiator):
+    # Issued tokens carry the old role as a claim; bumping the version revokes them.
+    if oldvalue in (NO_VALUE, NEVER_SET, None) or value == oldvalue:
+        return
+    target.token_version = (target.token_version or 0) + 1
+
+
 
 class LoginActivity(Base):
     __tablename__ = "login_activities"
@@ -633,4 +653,107 @@ class PollOption(Base):
         return f"<PollOption(id={self.id}, option='{self.option_text}', votes={self.votes})>"
 
 
+# -------------------- Score Rollups --------------------
+# Running per-student aggregates, updated in the same transaction as the
+# attempt they summarize (services/score_rollups.py) so summary endpoints
+# read one row per subject/topic instead of scanning the attempt history.
+
+class StudentSubjectScore(Base):
+    __tablename__ = "student_subject_scores"
+    __table_args__ = (UniqueConstraint("student_id", "subject_id", "source", name="uq_student_subject_scores"),)
+
+    id = Column(Integer, primary_key=True)
+    student_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    subject_id = Column(Integer, ForeignKey("subjects.id", ondelete="CASCADE"), nullable=False)
+    source = Column(String, nullable=False)  # quiz | test | exam | assignment
+    attempts = Column(Integer, nullable=False, default=0)
+    score_total = Column(Float, nullable=False, default=0)
+    questions_total = Column(Integer, nullable=False, default=0)
+    best_percentage = Column(Float, nullable=True)
+    latest_percentage = Column(Float, nullable=True)
+    last_attempt_at = Column(DateTime, nullable=True)
+
+    subject = relationship("Subject")
+
+    def __repr__(self):
+        return f"<StudentSubjectScore(student_id={self.student_id}, subject_id={self.subject_id}, source='{self.source}')>"
+
+
+class StudentTopicScore(Base):
+    __tablename__ = "student_topic_scores"
+    __table_args__ = (UniqueConstraint("student_id", "topic_id", name="uq_student_topic_scores"),)
+
+    id = Column(Integer, primary_key=True)
+    student_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    topic_id = Column(Integer, ForeignKey("topics.id", ondelete="CASCADE"), nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    score_total = Column(Float, nullable=False, default=0)
+    questions_total = Column(Integer, nullable=False, default=0)
+    best_percentage = Column(Float, nullable=True)
+    latest_percentage = Column(Float, nullable=True)
+    completed_at = Column(DateTime, nullable=True)  # first attempt with every question right
+    last_attempt_at = Column(DateTime, nullable=True)
 
+    topic = relationship("Topic")
+
+    def __repr__(self):
+        return f"<StudentTopicScore(student_id={self.student_id}, topic_id={self.topic_id}, attempts={self.attempts})>"
+
+
+class StudentDailyScore(Base):
+    """Quiz attempts per (student, subject, UTC day); services/time_buckets.py rolls these up further."""
+    __tablename__ = "student_daily_scores"
+    __table_args__ = (UniqueConstraint("student_id", "subject_id", "day", name="uq_student_daily_scores"),)
+
+    id = Column(Integer, primary_key=True)
+    student_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    subject_id = Column(Integer, ForeignKey("subjects.id", ondelete="CASCADE"), nullable=True)  # topics may have no subject
+    day = Column(Date, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    score_total = Column(Float, nullable=False, default=0)
+    questions_total = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<StudentDailyScore(student_id={self.student_id}, subject_id={self.subject_id}, day={self.day})>"
+
+
+class ReferenceEmbedding(Base):
+    """
+    Embedding of a question's reference answer (services/reference_embeddings.py).
+    source is "topic_question" or "question"; rows whose model_version or
+    text_hash no longer match are recomputed on the next grading call.
+    """
+    __tablename__ = "reference_embeddings"
+    __table_args__ = (UniqueConstraint("source", "question_id", name="uq_reference_embeddings"),)
+
+    id = Column(Integer, primary_key=True)
+    source = Column(String(20), nullable=False)
+    question_id = Column(Integer, nullable=False)
+    model_version = Column(String(64), nullable=False)
+    text_hash = Column(String(40), nullable=False)  # sha1 of the normalized reference answer
+    vector = Column(LargeBinary, nullable=False)  # float32 bytes
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<ReferenceEmbedding(source={self.source}, question_id={self.question_id}, model={self.model_version})>"
+
+
+# -------------------- Query Indexes --------------------
+# Functional indexes on normalized(...) serve the case-insensitive filters;
+# composites follow the hot filter + sort orders. Existing databases get them
+# from schema_upgrades.upgrade_schema().
+
+QUERY_INDEXES = [
+    Index("ix_users_role_level_norm", User.role, normalized(User.level)),
+    Index("ix_subjects_name_norm", normalized(Subject.name)),
+    Index("ix_subjects_level_norm", normalized(Subject.level)),
+    Index("ix_topics_subject_level_week", Topic.subject_id, normalized(Topic.level), Topic.week_number),
+    Index("ix_topics_level_norm", normalized(Topic.level)),
+    Index("ix_timetables_level_day_period", normalized(Timetable.level), normalized(Timetable.day), Timetable.period),
+    Index("ix_assignments_class_level_norm", normalized(Assignment.class_level)),
+    Index("ix_progress_tracking_user_completed", ProgressTracking.user_id, ProgressTracking.completed_at),
+    Index("ix_progress_tracking_completed", ProgressTracking.completed_at),
+    Index("ix_user_answers_user_question", UserAnswer.user_id, UserAnswer.question_id),
+    Index("ix_chat_messages_group_timestamp", ChatMessage.group_id, ChatMessage.timestamp),
+    Index("uq_attendance_student_date", Attendance.student_id, Attendance.date, unique=True),
+]
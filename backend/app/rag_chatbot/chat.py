@@ -4,21 +4,11 @@ import uuid
 import base64
 import logging
 import tempfile
-import chromadb
-import openai
-import edge_tts
-
-from llama_index.core import (
-    VectorStoreIndex,
-    StorageContext,
-    Settings,
-)
-from llama_index.embeddings.huggingface import HuggingFaceEmbedding
-from llama_index.vector_stores.chroma import ChromaVectorStore
-from llama_index.llms.openai import OpenAI
-from llama_index.core.chat_engine.condense_question import CondenseQuestionChatEngine
-from llama_index.core.query_engine import RetrieverQueryEngine
-from llama_index.core.response_synthesizers import get_response_synthesizer
+import threading
+
+# chromadb, llama_index, the HuggingFace embeddings, openai and edge_tts are
+# imported where they're used: together they take seconds to import and most
+# workers never serve a chat request.
 
 from .config import (
     PDF_FOLDER,
@@ -33,15 +23,34 @@ from app.rag_chatbot.db import get_topic_name_by_metadata, get_all_subjects_from
 # 🔁 Global cache
 _index = None
 _chat_engine = None
+_chat_engine_lock = threading.Lock()
 
 # ──────────────────────────────────────────────────────────────
 # 🧠 Chat Engine (with RAG)
 def get_chat_engine():
-    global _index, _chat_engine
+    global _chat_engine
 
     if _chat_engine:
         return _chat_engine
 
+    with _chat_engine_lock:
+        if _chat_engine is None:
+            _chat_engine = _build_chat_engine()
+    return _chat_engine
+
+
+def _build_chat_engine():
+    global _index
+
+    import chromadb
+    from llama_index.core import VectorStoreIndex, StorageContext, Settings
+    from llama_index.embeddings.huggingface import HuggingFaceEmbedding
+    from llama_index.vector_stores.chroma import ChromaVectorStore
+    from llama_index.llms.openai import OpenAI
+    from llama_index.core.chat_engine.condense_question import CondenseQuestionChatEngine
+    from llama_index.core.query_engine import RetrieverQueryEngine
+    from llama_index.core.response_synthesizers import get_response_synthesizer
+
     os.makedirs(PDF_FOLDER, exist_ok=True)
     os.makedirs(CHROMA_DB_DIR, exist_ok=True)
 
@@ -75,14 +84,12 @@ def get_chat_engine():
     )
 
     # 🤖 Chat engine with history handling
-    _chat_engine = CondenseQuestionChatEngine.from_defaults(
+    return CondenseQuestionChatEngine.from_defaults(
         query_engine=query_engine,
         llm=llm,
         verbose=True,
     )
 
-    return _chat_engine
-
 # ──────────────────────────────────────────────────────────────
 # 📚 Topic Metadata Detection
 
@@ -116,6 +123,8 @@ def should_generate_image(question: str) -> bool:
 
 def generate_image(prompt: str) -> str:
     try:
+        import openai
+
         openai.api_key = OPENAI_API_KEY
         response = openai.Image.create(prompt=prompt, n=1, size="512x512")
         return response['data'][0]['url']
@@ -126,6 +135,8 @@ def generate_image(prompt: str) -> str:
 # 🔊 Audio Generation
 async def generate_audio(text: str) -> str:
     try:
+        import edge_tts
+
         filename = f"{uuid.uuid4()}.mp3"
         output_path = os.path.join(tempfile.gettempdir(), filename)
 
@@ -6,6 +6,12 @@ from .. import models, schemas
 from ..database import get_db
 from ..auth import get_current_user
 from ..models import User
+from ..services.teacher_context import invalidate_teacher
+from ..services.token_cache import token_cache_stats
+from ..services.dashboard_cache import dashboard_cache_stats
+from ..services.exam_scoring import answer_key_cache_stats
+from ..services.db_telemetry import pool_stats
+from ..database import engine, async_engine, replicas
 
 admin_router = APIRouter(prefix="/admin", tags=["admin"])
 
@@ -28,6 +34,24 @@ def admin_only_route(current_user: User = Depends(require_admin)):
     return {"message": f"Welcome, admin {current_user.username}!"}
 
 
+# -------------------- Runtime Telemetry --------------------
+
+@admin_router.get("/telemetry")
+def get_runtime_telemetry(_: User = Depends(require_admin)):
+    """Per-worker cache counters and DB connection pool usage."""
+    return {
+        "token_cache": token_cache_stats(),
+        "dashboard_cache": dashboard_cache_stats(),
+        "answer_key_cache": answer_key_cache_stats(),
+        "db_pool": pool_stats(engine),
+        "db_pool_async": pool_stats(async_engine),
+        "db_replicas": [
+            {"url": r.engine.url.render_as_string(), "healthy": r.healthy, **pool_stats(r.engine)}
+            for r in replicas
+        ],
+    }
+
+
 # -------------------- Assign Subject to Teacher --------------------
 
 @admin_router.post("/assign-subject", status_code=201)
@@ -53,6 +77,7 @@ def assign_subject_to_teacher(
     assignment = models.TeacherSubject(teacher_id=data.teacher_id, subject_id=data.subject_id)
     db.add(assignment)
     db.commit()
+    invalidate_teacher(data.teacher_id)
 
     return {"message": f"{subject.name} assigned to {teacher.full_name or teacher.username}"}
 
@@ -110,6 +135,7 @@ def assign_class_to_teacher(
         existing_profile.level = data.level
         existing_profile.department = data.department
         db.commit()
+        invalidate_teacher(data.teacher_id)
         return {"message": f"Updated class for teacher {teacher.full_name or teacher.username}"}
 
     new_profile = models.TeacherProfile(
@@ -119,6 +145,7 @@ def assign_class_to_teacher(
     )
     db.add(new_profile)
     db.commit()
+    invalidate_teacher(data.teacher_id)
 
     return {"message": f"Assigned class {data.level}-{data.department} to {teacher.full_name or teacher.username}"}
 
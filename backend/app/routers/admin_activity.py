@@ -1,124 +1,144 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import Float, case, cast, func, literal, select, union_all
+from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 from .. import models, database, schemas
 from ..dependencies import get_current_admin_user
+from ..services import activity_tracker
 
 router = APIRouter(
     prefix="/admin-activity",
     tags=["Admin Activity"]
 )
 
+def top_students_query(limit: int = 5):
+    """
+    Students ranked by the mean of all their scores: quiz percentages,
+    assignment scores, test and exam percentages, each score weighted
+    equally. One UNION ALL of the score sources, averaged per student and
+    cut to `limit` rows in the database, so memory doesn't grow with the
+    number of students.
+    """
+    scores = union_all(
+        select(
+            models.ProgressTracking.user_id.label("student_id"),
+            literal("quiz").label("source"),
+            (models.ProgressTracking.score * 100.0 / models.ProgressTracking.total_questions).label("score"),
+        ).where(models.ProgressTracking.total_questions != 0),
+        select(
+            models.AssignmentSubmission.student_id,
+            literal("assignment"),
+            cast(models.AssignmentSubmission.score, Float),
+        ).where(models.AssignmentSubmission.score.isnot(None)),
+        select(
+            models.TestResult.user_id,
+            literal("test"),
+            cast(models.TestResult.percentage, Float),
+        ).where(models.TestResult.percentage.isnot(None)),
+        select(
+            models.ExamResult.user_id,
+            literal("exam"),
+            cast(models.ExamResult.percentage, Float),
+        ).where(models.ExamResult.percentage.isnot(None)),
+    ).subquery("scores")
+
+    def source_avg(source):
+        return func.avg(case((scores.c.source == source, scores.c.score)))
+
+    per_student = (
+        select(
+            scores.c.student_id,
+            func.avg(scores.c.score).label("average_score"),
+            source_avg("quiz").label("quiz_score"),
+            source_avg("assignment").label("assignment_score"),
+            source_avg("test").label("test_score"),
+            source_avg("exam").label("exam_score"),
+        )
+        .group_by(scores.c.student_id)
+        .subquery("per_student")
+    )
+
+    return (
+        select(
+            models.User.full_name,
+            models.User.level,
+            models.User.department,
+            per_student.c.average_score,
+            per_student.c.quiz_score,
+            per_student.c.assignment_score,
+            per_student.c.test_score,
+            per_student.c.exam_score,
+        )
+        .join(per_student, per_student.c.student_id == models.User.id)
+        .where(models.User.role == "student")
+        .order_by(per_student.c.average_score.desc(), models.User.id)
+        .limit(limit)
+    )
+
+
 @router.get("/dashboard", response_model=schemas.AdminDashboard)
 def get_admin_dashboard_data(
-    db: Session = Depends(database.get_db),
+    db: Session = Depends(database.get_read_db),
     user: models.User = Depends(get_current_admin_user)
 ):
     now = datetime.utcnow()
     five_minutes_ago = now - timedelta(minutes=5)
 
-    # -----------------------------------
-    # 1. Recent Logins (last 10 users)
-    # -----------------------------------
-    recent_users = (
-        db.query(models.User)
-        .filter(models.User.last_login != None)
-        .filter(models.User.last_login >= five_minutes_ago)
-        .order_by(models.User.last_login.desc())
-        .all()
+    # Recent windows come from the activity tracker's in-memory buffer, so
+    # only the handful of users inside the window are loaded (by primary key).
+    login_times = activity_tracker.recent_logins(five_minutes_ago)
+    active_times = activity_tracker.recent_activity(five_minutes_ago)
+
+    window_ids = set(login_times) | set(active_times)
+    window_users = (
+        {u.id: u for u in db.query(models.User).filter(models.User.id.in_(window_ids)).all()}
+        if window_ids else {}
     )
 
+    # -----------------------------------
+    # 1. Recent Logins (last 5 minutes)
+    # -----------------------------------
     login_data = [
         schemas.RecentLogin(
-            full_name=u.full_name,
-            level=u.level,
-            department=u.department,
-            last_login=u.last_login.isoformat() if u.last_login else None
+            full_name=window_users[user_id].full_name,
+            level=window_users[user_id].level,
+            department=window_users[user_id].department,
+            last_login=ts.isoformat()
         )
-        for u in recent_users
+        for user_id, ts in sorted(login_times.items(), key=lambda item: item[1], reverse=True)
+        if user_id in window_users
     ]
 
     # ----------------------------------------------------
     # 2. Currently Online Students (active within 5 minutes)
     # ----------------------------------------------------
-    online_students = (
-        db.query(models.User)
-        .filter(models.User.role == "student")
-        .filter(models.User.last_login.isnot(None))
-        .filter(models.User.last_login >= five_minutes_ago)
-        .order_by(models.User.last_login.desc())
-        .all()
-    )
-
     online_data = [
         schemas.RecentLogin(
-            full_name=u.full_name,
-            level=u.level,
-            department=u.department,
-            last_login=u.last_login.isoformat() if u.last_login else None
+            full_name=window_users[user_id].full_name,
+            level=window_users[user_id].level,
+            department=window_users[user_id].department,
+            last_login=ts.isoformat()
         )
-        for u in online_students
+        for user_id, ts in sorted(active_times.items(), key=lambda item: item[1], reverse=True)
+        if user_id in window_users and window_users[user_id].role == "student"
     ]
 
     # ----------------------------------------------------------
-    # 3. Top Performing Students with joinedload optimization
+    # 3. Top Performing Students (aggregated in SQL)
     # ----------------------------------------------------------
-    students = (
-        db.query(models.User)
-        .filter(models.User.role == "student")
-        .options(
-            joinedload(models.User.progress),
-            joinedload(models.User.assignment_submissions),
-            joinedload(models.User.test_results),
-            joinedload(models.User.exam_results)
+    sorted_top_students = [
+        schemas.TopStudent(
+            full_name=row.full_name,
+            level=row.level,
+            department=row.department,
+            average_score=round(float(row.average_score), 2),
+            quiz_score=round(float(row.quiz_score), 2) if row.quiz_score is not None else None,
+            assignment_score=round(float(row.assignment_score), 2) if row.assignment_score is not None else None,
+            test_score=round(float(row.test_score), 2) if row.test_score is not None else None,
+            exam_score=round(float(row.exam_score), 2) if row.exam_score is not None else None,
         )
-        .all()
-    )
-
-    top_students = []
-
-    for student in students:
-        # Quiz Scores (from progress tracking)
-        quiz_scores = [
-            (p.score / p.total_questions) * 100
-            for p in student.progress if p.total_questions
-        ]
-
-        # Assignment Scores
-        assignment_scores = [
-            s.score for s in student.assignment_submissions if s.score is not None
-        ]
-
-        # Test Scores
-        test_scores = [
-            float(t.percentage) for t in student.test_results if t.percentage is not None
-        ]
-
-        # Exam Scores
-        exam_scores = [
-            float(e.percentage) for e in student.exam_results if e.percentage is not None
-        ]
-
-        # Average Score
-        all_scores = quiz_scores + assignment_scores + test_scores + exam_scores
-        if all_scores:
-            average_score = round(sum(all_scores) / len(all_scores), 2)
-
-            top_students.append(
-                schemas.TopStudent(
-                    full_name=student.full_name,
-                    level=student.level,
-                    department=student.department,
-                    average_score=average_score,
-                    quiz_score=round(sum(quiz_scores) / len(quiz_scores), 2) if quiz_scores else None,
-                    assignment_score=round(sum(assignment_scores) / len(assignment_scores), 2) if assignment_scores else None,
-                    test_score=round(sum(test_scores) / len(test_scores), 2) if test_scores else None,
-                    exam_score=round(sum(exam_scores) / len(exam_scores), 2) if exam_scores else None,
-                )
-            )
-
-    # Sort top students by average score
-    sorted_top_students = sorted(top_students, key=lambda s: s.average_score, reverse=True)[:5]
+        for row in db.execute(top_students_query(limit=5))
+    ]
 
     return schemas.AdminDashboard(
         logins=login_data,
@@ -4,6 +4,9 @@ from sqlalchemy import func, or_, and_
 from ..database import get_db
 from ..models import User, Assignment, AssignmentSubmission, ProgressTracking, Topic, Subject, ScheduledEvent, Timetable
 from ..dependencies import get_current_admin_user
+from ..services.student_dashboard_service import build_student_dashboard
+from ..services.time_buckets import daily_rows_query
+from .progress import my_summary_query, subject_summary_query
 from ..schemas import (TopicOut, ProgressOut, AssignmentOut, AssignmentSubmissionOut,
                         MyProgressSummaryOut, SimpleSubmissionOut, SimpleAssignmentOut,
     DashboardTopic,
@@ -16,21 +19,12 @@ from ..schemas import (TopicOut, ProgressOut, AssignmentOut, AssignmentSubmissio
     AdminStudentSummaryOut)
 from typing import List
 from datetime import datetime, date, timedelta
-from calendar import day_name
 
 router = APIRouter(prefix="/admin", tags=["Admin Dashboard"])
 
 
 # -------------------- Admin Fetch Student Dashboard --------------------
 
-TERM_START_DATE = date(2025, 6, 9)
-
-def get_current_term_week():
-    today = datetime.now().date()
-    delta_days = (today - TERM_START_DATE).days
-    week = (delta_days // 7) + 1
-    return max(1, week)
-
 @router.get("/student-dashboard/{student_id}", response_model=StudentDashboardOut)
 def get_admin_student_dashboard(
     student_id: int,
@@ -43,137 +37,18 @@ def get_admin_student_dashboard(
         if not student:
             raise HTTPException(status_code=404, detail="Student not found")
 
-        student_level = (student.level or "").strip().lower()
-        student_department = (student.department or "").strip().lower()
-        current_week = get_current_term_week()
-        today = datetime.now().date()
-        today_day_name = day_name[datetime.now().weekday()]
-
-        # ------------------ Schedule ------------------
-        timetable_entries = db.query(Timetable).join(Subject).filter(
-            func.lower(Timetable.level) == student_level,
-            func.lower(Timetable.day) == today_day_name.lower(),
-            or_(
-                func.lower(Timetable.department) == student_department,
-                Timetable.department == None,
-                Timetable.department == "",
-            )
-        ).order_by(Timetable.period).all()
-
-        today_schedule = [
-            TimetableOut(
-                id=entry.id,
-                day=entry.day,
-                subject=entry.subject_rel.name if entry.subject_rel else "Unknown",
-                start_time=str(entry.start_time),
-                end_time=str(entry.end_time),
-                level=entry.level,
-                department=entry.department,
-                period=entry.period
-            )
-            for entry in timetable_entries
-        ]
-
-        # ------------------ Topics ------------------
-        dashboard_topics = []
-        for entry in timetable_entries:
-            topic = db.query(Topic).join(Subject).filter(
-                Topic.subject_id == entry.subject_id,
-                func.lower(Topic.level) == student_level,
-                Topic.week_number == current_week,
-                or_(
-                    func.lower(Subject.department) == student_department,
-                    Subject.department == None,
-                    Subject.department == ""
-                )
-            ).first()
-
-            dashboard_topics.append(
-                DashboardTopic(
-                    subject=entry.subject_rel.name if entry.subject_rel else "Unknown",
-                    topic_title=topic.title if topic else "No topic available for this week.",
-                    pdf_url=topic.pdf_url if topic else None,
-                    start_time=str(entry.start_time),
-                    end_time=str(entry.end_time)
-                )
-            )
-
-        # ------------------ Assignments ------------------
-        assignments = db.query(Assignment).join(Subject).options(joinedload(Assignment.subject)).filter(
-            func.lower(Assignment.class_level) == student_level,
-            or_(
-                func.lower(Subject.department) == student_department,
-                Subject.department == None,
-                Subject.department == ""
-            )
-        ).all()
-
-        dashboard_assignments = []
-        for assignment in assignments:
-            submission = db.query(AssignmentSubmission).filter(
-                AssignmentSubmission.assignment_id == assignment.id,
-                AssignmentSubmission.student_id == student.id
-            ).first()
-
-            dashboard_assignments.append(
-                DashboardAssignment(
-                    id=assignment.id,
-                    title=assignment.title,
-                    due_date=assignment.due_date,
-                    subject=SubjectOut.from_orm(assignment.subject),
-                    status="completed" if submission else "pending",
-                    score=submission.score if submission else None,
-                    submitted_at=submission.submitted_at if submission else None
-                )
-            )
-
-        # ------------------ Progress ------------------
-        # Get total topics for the student's level
-        total_topics_query = db.query(Topic).filter(
-            func.lower(Topic.level) == student_level
-        )
-        total_topics_count = total_topics_query.count()
-
-        # Count completed topics by the student
-        completed_topics_count = db.query(ProgressTracking).filter(
-            ProgressTracking.user_id == student.id
-        ).count()
-
-        dashboard_progress = DashboardProgress(
-            total_topics_assigned=total_topics_count,
-            topics_completed=completed_topics_count,
-            topics_remaining=max(total_topics_count - completed_topics_count, 0)
-        )
-
-        # ------------------ Events ------------------
-        upcoming_events = db.query(ScheduledEvent).filter(
-            ScheduledEvent.date >= today
-        ).order_by(ScheduledEvent.date).all()
-
-        dashboard_events = [
-            DashboardEvent(
-                title=event.title,
-                event_type=event.event_type,
-                date=event.date,
-                countdown_days=(event.date - today).days
-            )
-            for event in upcoming_events
-        ]
-
-        # ✅ FINAL return
-        response = StudentDashboardOut(
-            student_name=(student.full_name or "").strip() or None,
-            date=today,
-            current_week=current_week,
-            today_topics=dashboard_topics,
-            assignments=dashboard_assignments,
-            progress=dashboard_progress,
-            upcoming_events=dashboard_events,
-            today_schedule=today_schedule or []
+        # Same shared class segment the student's own dashboard uses, with
+        # this student's submissions and progress merged on.
+        return build_student_dashboard(
+            db,
+            student,
+            student.level,
+            student.department,
+            student_name=(student.full_name or "").strip() or None
         )
 
-        return response
-
+    except HTTPException:
+        raise
     except Exception as e:
         import traceback
         print("🔥 Error in get_admin_student_dashboard:", e)
@@ -197,22 +72,8 @@ def get_admin_student_daily_progress(
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
     
-    past_week = datetime.utcnow() - timedelta(days=7)
-
-    progress = (
-        db.query(
-            func.date(ProgressTracking.completed_at).label("day"),
-            func.sum(ProgressTracking.score).label("total_score"),
-            func.sum(ProgressTracking.total_questions).label("total_questions")
-        )
-        .filter(
-            ProgressTracking.user_id == student_id,
-            ProgressTracking.completed_at >= past_week
-        )
-        .group_by(func.date(ProgressTracking.completed_at))
-        .order_by(func.date(ProgressTracking.completed_at))
-        .all()
-    )
+    past_week = (datetime.utcnow() - timedelta(days=7)).date()
+    progress = db.execute(daily_rows_query(student_id, start=past_week)).all()
 
     return [
         DailyProgressOut(
@@ -237,24 +98,14 @@ def get_admin_student_summary(
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
 
-    total_topics = db.query(func.count(func.distinct(ProgressTracking.topic_id))) \
-        .filter(ProgressTracking.user_id == student_id).scalar()
-
-    completed_topics = db.query(func.count(func.distinct(ProgressTracking.topic_id))) \
-        .filter(ProgressTracking.user_id == student_id, ProgressTracking.score >= ProgressTracking.total_questions) \
-        .scalar()
+    row = db.execute(my_summary_query(student_id)).one()
 
-    total_score, total_questions = db.query(
-        func.coalesce(func.sum(ProgressTracking.score), 0),
-        func.coalesce(func.sum(ProgressTracking.total_questions), 0)
-    ).filter(ProgressTracking.user_id == student_id).first()
-
-    avg_score = (total_score / total_questions * 100) if total_questions else 0.0
+    avg_score = (row.total_score / row.total_questions * 100) if row.total_questions else 0.0
 
     return MyProgressSummaryOut(
-        total_topics=total_topics,
-        completed_topics=completed_topics,
-        total_questions=total_questions,
+        total_topics=row.total_topics,
+        completed_topics=row.completed_topics,
+        total_questions=row.total_questions,
         average_score=round(avg_score, 2)
     )
 
@@ -272,14 +123,7 @@ def get_admin_student_subject_summary(
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
 
-    results = db.query(
-        Subject.name.label("subject_name"),
-        func.coalesce(func.sum(ProgressTracking.score), 0).label("total_score"),
-        func.coalesce(func.sum(ProgressTracking.total_questions), 0).label("total_questions")
-    ).join(Topic, ProgressTracking.topic_id == Topic.id) \
-     .join(Subject, Topic.subject_id == Subject.id) \
-     .filter(ProgressTracking.user_id == student_id) \
-     .group_by(Subject.name).all()
+    results = db.execute(subject_summary_query(student_id)).all()
 
     return [
         SubjectPerformanceOut(
@@ -434,13 +278,10 @@ def get_student_summary(
     correct answers, wrong answers, total questions, and average score.
     """
 
-    total_score, total_questions = db.query(
-        func.coalesce(func.sum(ProgressTracking.score), 0),
-        func.coalesce(func.sum(ProgressTracking.total_questions), 0)
-    ).filter(ProgressTracking.user_id == user_id).first()
+    row = db.execute(my_summary_query(user_id)).one()
 
-    total_score = total_score or 0
-    total_questions = total_questions or 0
+    total_score = row.total_score or 0
+    total_questions = row.total_questions or 0
 
     correct_answers = int(total_score)
     wrong_answers = int(total_questions - total_score)
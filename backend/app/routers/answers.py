@@ -1,16 +1,20 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from decimal import Decimal, ROUND_HALF_UP
+from sqlalchemy import insert
 from .. import models, schemas
 from ..database import get_db
 from ..auth import get_current_user
-from ..services.answer_checker import check_answer
+from ..services.answer_checker import check_answers
+from ..services.reference_embeddings import reference_vectors
+from ..services.exam_scoring import find_result, submit_paper
+from ..services.query_profiler import query_budget
+from ..services.score_rollups import record_quiz_attempt
 
 router = APIRouter(prefix="/answers", tags=["Answers"])
 
 # ✅ Topic-Level Quiz Submission
 @router.post("/submit-answers/")
+@query_budget(15)
 def submit_answers(
     submission: schemas.SubmitAnswersRequest,
     db: Session = Depends(get_db),
@@ -24,12 +28,13 @@ def submit_answers(
         raise HTTPException(status_code=400, detail="No answers submitted.")
 
     submitted_ids = [ans.question_id for ans in answers]
-    valid_ids = db.query(models.TopicQuestion.id).filter(
-        models.TopicQuestion.id.in_(submitted_ids),
-        models.TopicQuestion.topic_id == topic_id
-    ).all()
-    valid_ids_set = {id for (id,) in valid_ids}
-    invalid_ids = [qid for qid in submitted_ids if qid not in valid_ids_set]
+    questions = {
+        q.id: q for q in db.query(models.TopicQuestion).filter(
+            models.TopicQuestion.id.in_(set(submitted_ids)),
+            models.TopicQuestion.topic_id == topic_id
+        )
+    }
+    invalid_ids = [qid for qid in submitted_ids if qid not in questions]
     if invalid_ids:
         raise HTTPException(
             status_code=400,
@@ -37,36 +42,39 @@ def submit_answers(
         )
 
     total = len(answers)
-    correct = 0
-    results = []
-
-    for ans in answers:
-        question = db.query(models.TopicQuestion).filter_by(id=ans.question_id, topic_id=topic_id).first()
-        if not question:
-            continue
-
-        if question.option_a and question.correct_answer:
-            expected = question.correct_answer.strip().lower()
-            user_ans = ans.answer.strip().lower()
-            is_correct = expected == user_ans
-            similarity = 1.0 if is_correct else 0.0
-            correction = None if is_correct else f"Correct answer: {expected}"
-        else:
-            is_correct, correction, similarity = check_answer(ans.answer, question.answer)
-
-        db.add(models.UserAnswer(
-            user_id=user_id,
-            question_id=ans.question_id,
-            answer=ans.answer,
-            is_correct=is_correct,
-            correction=correction,
-            similarity=similarity
-        ))
-
-        if is_correct:
-            correct += 1
-
-        results.append({
+    asked = [questions[ans.question_id] for ans in answers]
+    verdicts = [None] * total
+
+    # Objective: compare against the answer key
+    objective = [i for i, question in enumerate(asked) if question.option_a and question.correct_answer]
+    for i in objective:
+        expected = asked[i].correct_answer.strip().lower()
+        is_correct = expected == answers[i].answer.strip().lower()
+        verdicts[i] = (is_correct, None if is_correct else f"Correct answer: {expected}", 1.0 if is_correct else 0.0)
+
+    # Theory: one embedding batch for every student answer, against the stored references
+    theory = [i for i in range(total) if verdicts[i] is None]
+    if theory:
+        references, version = reference_vectors(db, [asked[i] for i in theory])
+        graded = check_answers([(answers[i].answer, asked[i].answer) for i in theory], references, version)
+        for i, verdict in zip(theory, graded):
+            verdicts[i] = verdict
+
+    correct = sum(1 for is_correct, _, _ in verdicts if is_correct)
+    # render_nulls keeps rows with and without a correction in one INSERT batch
+    db.execute(insert(models.UserAnswer).execution_options(render_nulls=True), [
+        {
+            "user_id": user_id,
+            "question_id": ans.question_id,
+            "answer": ans.answer,
+            "is_correct": is_correct,
+            "correction": correction,
+            "similarity": similarity
+        }
+        for ans, (is_correct, correction, similarity) in zip(answers, verdicts)
+    ])
+    results = [
+        {
             "question_id": question.id,
             "question_text": question.question,
             "your_answer": ans.answer,
@@ -74,7 +82,9 @@ def submit_answers(
             "is_correct": is_correct,
             "similarity": round(similarity, 3),
             "correction": correction
-        })
+        }
+        for ans, question, (is_correct, correction, similarity) in zip(answers, asked, verdicts)
+    ]
 
     db.add(models.ProgressTracking(
         user_id=user_id,
@@ -82,6 +92,7 @@ def submit_answers(
         score=correct,
         total_questions=total
     ))
+    record_quiz_attempt(db, user_id, topic_id, correct, total)
 
     db.commit()
 
@@ -94,6 +105,7 @@ def submit_answers(
 
 
 @router.post("/submit-test/")
+@query_budget(10)
 def submit_test_or_exam(
     submission: schemas.SubmitTestAnswers,
     db: Session = Depends(get_db),
@@ -108,99 +120,13 @@ def submit_test_or_exam(
     if not answers:
         raise HTTPException(status_code=400, detail="No answers submitted.")
 
-    existing = (
-        db.query(models.ExamResult)
-        .filter_by(user_id=user_id, subject=subject, level=level)
-        .first()
-        if test_type == "exam"
-        else db.query(models.TestResult)
-        .filter_by(user_id=user_id, subject=subject, level=level, test_type=test_type)
-        .first()
-    )
-
-    if existing:
-        raise HTTPException(
-            status_code=400,
-            detail=f"You have already taken this {test_type} for {subject.capitalize()}."
-        )
-
-    week_ranges = {
-        "first": (1, 6),
-        "second": (7, 11),
-        "exam": (1, 13)
-    }
-
-    if test_type not in week_ranges:
-        raise HTTPException(status_code=400, detail="Invalid test_type. Must be 'first', 'second', or 'exam'.")
-
-    start_week, end_week = week_ranges[test_type]
-
-    topics = db.query(models.Topic).join(models.Subject).filter(
-        func.lower(models.Subject.name) == subject,
-        func.lower(models.Topic.level) == level,
-        models.Topic.week_number >= start_week,
-        models.Topic.week_number <= end_week
-    ).all()
-
-    if not topics:
-        raise HTTPException(status_code=404, detail=f"No topics found for {subject} ({level}) in weeks {start_week}-{end_week}")
-
-    topic_ids = [t.id for t in topics]
-
-    questions = db.query(models.TopicQuestion).filter(
-        models.TopicQuestion.topic_id.in_(topic_ids)
-    ).all()
-
-    if not questions:
-        raise HTTPException(status_code=404, detail="No questions found for selected topics.")
-
-    all_ids_set = {q.id for q in questions}
-    total = len(all_ids_set)
-    correct = 0
-
-    for ans in answers:
-        if ans.question_id not in all_ids_set:
-            continue
-
-        question = db.query(models.TopicQuestion).filter_by(id=ans.question_id).first()
-        if not question:
-            continue
-
-        if question.option_a and question.correct_answer:
-            expected = question.correct_answer.strip().lower()
-            user_ans = ans.selected_option.strip().lower() if ans.selected_option else ""
-            if user_ans == expected:
-                correct += 1
-        elif question.answer:
-            expected = question.answer.strip().lower()
-            user_ans = ans.user_answer.strip().lower() if ans.user_answer else ""
-            if user_ans == expected:
-                correct += 1
-
-    percentage = (
-        (Decimal(correct) / Decimal(total) * Decimal("100"))
-        .quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
-        if total > 0 else Decimal("0.00")
-    )
-
-    result_model = models.ExamResult if test_type == "exam" else models.TestResult
-    result = result_model(
-        user_id=user_id,
-        subject=subject,
-        level=level,
-        test_type=test_type,
-        total_score=correct,
-        total_questions=total,
-        percentage=percentage
-    )
-    db.add(result)
-    db.commit()
+    scored = submit_paper(db, user_id, subject, level, test_type, answers)
 
     return {
         "message": f"{test_type.capitalize()} submitted",
-        "score": correct,
-        "total": total,
-        "percentage": float(percentage)
+        "score": scored["score"],
+        "total": scored["total"],
+        "percentage": float(scored["percentage"])
     }
 
 
@@ -216,14 +142,4 @@ def check_submission(
     level = user.level.strip().lower()
     user_id = user.id
 
-    existing = (
-        db.query(models.ExamResult)
-        .filter_by(user_id=user_id, subject=subject, level=level)
-        .first()
-        if test_type == "exam" else
-        db.query(models.TestResult)
-        .filter_by(user_id=user_id, subject=subject, level=level, test_type=test_type)
-        .first()
-    )
-
-    return {"already_taken": existing is not None}
+    return {"already_taken": find_result(db, user_id, subject, level, test_type) is not None}
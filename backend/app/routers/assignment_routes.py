@@ -12,6 +12,7 @@ from ..dependencies import (
 from sqlalchemy import func, and_
 from ..models import TeacherProfile, Assignment
 from ..crud import get_submissions_for_student
+from ..database import get_read_db
 from datetime import datetime, date
 
 
@@ -212,7 +213,7 @@ def get_admin_assignments_overview(
     student_name: Optional[str] = None,
     date_given: Optional[date] = None,
     status: Optional[str] = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     user: models.User = Depends(RoleChecker(["admin"]))
 ):
     return crud.get_admin_assignments_overview(
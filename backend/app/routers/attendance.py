@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func
+from sqlalchemy import func, case, select
 from typing import List, Optional, Dict
 from datetime import date
 import logging
@@ -14,6 +14,9 @@ from ..dependencies import (
     get_current_teacher_user,
 )
 from ..dependencies import require_teacher, validate_teacher_with_class
+from ..models import normalized
+from ..services.csv_export import csv_export_response
+from .teachers import get_teacher_profile_data
 
 
 router = APIRouter(prefix="/attendance", tags=["Attendance"])
@@ -87,6 +90,41 @@ def get_full_attendance(
     )
 
 
+@router.get("/export/csv")
+def export_attendance_csv(
+    date_from: Optional[date] = Query(default=None),
+    date_to: Optional[date] = Query(default=None),
+    level: Optional[str] = Query(default=None),
+    status: Optional[str] = Query(default=None),
+    gzip: bool = Query(default=False),
+    admin=Depends(get_current_admin_user),
+):
+    """Admin: Stream attendance records as CSV, optionally filtered and gzipped."""
+    statement = (
+        select(
+            models.Attendance.student_id,
+            models.User.full_name,
+            models.User.level,
+            models.Attendance.date,
+            models.Attendance.status,
+        )
+        .join(models.User, models.Attendance.student_id == models.User.id)
+        .order_by(models.Attendance.date, models.Attendance.id)
+    )
+    if date_from:
+        statement = statement.where(models.Attendance.date >= date_from)
+    if date_to:
+        statement = statement.where(models.Attendance.date <= date_to)
+    if level:
+        statement = statement.where(normalized(models.User.level) == level.strip().lower())
+    if status:
+        statement = statement.where(func.lower(models.Attendance.status) == status.strip().lower())
+
+    return csv_export_response(
+        statement, ["Student ID", "Student", "Level", "Date", "Status"], "attendance", gzip=gzip
+    )
+
+
 @router.get("/total-days")
 def get_total_attendance_days(
     db: Session = Depends(get_db),
@@ -165,12 +203,12 @@ def get_students_in_teacher_class(
     # Query students that match the teacher's assigned level
     query = db.query(models.User).filter(
         models.User.role == "student",
-        models.User.level == teacher_profile.level
+        normalized(models.User.level) == teacher_profile.level.strip().lower()
     )
     
     # If teacher has a specific department assignment (not "general"), filter by department too
     if teacher_profile.department and teacher_profile.department.lower() != "general":
-        query = query.filter(models.User.department == teacher_profile.department)
+        query = query.filter(normalized(models.User.department) == teacher_profile.department.strip().lower())
     
     students = query.all()
     
@@ -189,13 +227,13 @@ def get_class_attendance_summary(level: str, db: Session = Depends(get_db)):
     results = (
         db.query(
             models.User.full_name,
-            db.func.count(models.Attendance.id).label("total_days"),
-            db.func.count(db.case((models.Attendance.status == "present", 1))).label("present_days"),
-            db.func.count(db.case((models.Attendance.status == "absent", 1))).label("absent_days"),
-            db.func.count(db.case((models.Attendance.status == "excused", 1))).label("excused_days")
+            func.count(models.Attendance.id).label("total_days"),
+            func.count(case((models.Attendance.status == "present", 1))).label("present_days"),
+            func.count(case((models.Attendance.status == "absent", 1))).label("absent_days"),
+            func.count(case((models.Attendance.status == "excused", 1))).label("excused_days")
         )
         .join(models.Attendance, models.User.id == models.Attendance.student_id)
-        .filter(models.User.level == level.lower(), models.User.role == "student")
+        .filter(models.User.role == "student", normalized(models.User.level) == level.strip().lower())
         .group_by(models.User.full_name)
         .order_by(models.User.full_name)
         .all()
@@ -218,48 +256,49 @@ def get_class_attendance_summary(level: str, db: Session = Depends(get_db)):
 @router.get("/summary/total")
 def get_total_class_attendance_summary(
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(require_teacher)
+    current_user: models.User = Depends(require_teacher),
+    profile: models.TeacherProfile = Depends(validate_teacher_with_class)
 ):
     try:
-        profile = validate_teacher_with_class(db=db, user=current_user)
         print("📘 Teacher Profile:", profile.level, profile.department)
 
         # Step 1: Get students
-        student_query = db.query(models.User).filter(
+        student_query = db.query(models.User.id, models.User.full_name).filter(
             models.User.role == "student",
-            func.lower(models.User.level) == profile.level.lower()
+            normalized(models.User.level) == profile.level.strip().lower()
         )
         if profile.department.lower() != "general":
             student_query = student_query.filter(
-                func.lower(models.User.department) == profile.department.lower()
+                normalized(models.User.department) == profile.department.strip().lower()
             )
         students = student_query.all()
         print(f"📚 Found {len(students)} students")
 
+        # Step 2: One grouped query for the whole class instead of one per student
+        counts_by_student = defaultdict(list)
+        if students:
+            counts = (
+                db.query(models.Attendance.student_id, models.Attendance.status, func.count(models.Attendance.id))
+                .filter(models.Attendance.student_id.in_([s.id for s in students]))
+                .group_by(models.Attendance.student_id, models.Attendance.status)
+                .all()
+            )
+            for student_id, status, count in counts:
+                counts_by_student[student_id].append((status, count))
+
         summaries = []
         for student in students:
-            try:
-                counts = (
-                    db.query(models.Attendance.status, func.count(models.Attendance.status))
-                    .filter(models.Attendance.student_id == student.id)
-                    .group_by(models.Attendance.status)
-                    .all()
-                )
-                print(f"🔍 Attendance counts for {student.full_name}:", counts)
-
-                summary = {
-                    "student_id": student.id,
-                    "full_name": student.full_name or "Unnamed"
-                }
-                for status, count in counts:
-                    summary[status.lower()] = count
+            summary = {
+                "student_id": student.id,
+                "full_name": student.full_name or "Unnamed"
+            }
+            for status, count in counts_by_student[student.id]:
+                summary[status.lower()] = count
 
-                for s in ["present", "absent", "late", "excused"]:
-                    summary.setdefault(s, 0)
+            for s in ["present", "absent", "late", "excused"]:
+                summary.setdefault(s, 0)
 
-                summaries.append(summary)
-            except Exception as e:
-                print(f"❌ Error processing {student.id}: {e}")
+            summaries.append(summary)
 
         return summaries
 
@@ -272,18 +311,18 @@ def get_total_class_attendance_summary(
 def get_individual_attendance_summary(
     student_id: int,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(require_teacher)
+    current_user: models.User = Depends(require_teacher),
+    profile: models.TeacherProfile = Depends(get_teacher_profile_data)
 ):
-    profile = get_teacher_profile_data(db, current_user.id)
 
     student = db.query(models.User).filter(
         models.User.id == student_id,
         models.User.role == "student",
-        func.lower(models.User.level) == profile.level.lower()
+        normalized(models.User.level) == profile.level.strip().lower()
     )
     if profile.department.lower() != "general":
         student = student.filter(
-            func.lower(models.User.department) == profile.department.lower()
+            normalized(models.User.department) == profile.department.strip().lower()
         )
     student = student.first()
     if not student:
@@ -6,6 +6,7 @@ from sqlalchemy.orm import Session
 from app import auth, database, models, schemas
 from app.dependencies import get_current_user
 from app.models import User
+from app.services import activity_tracker
 
 router = APIRouter(
     prefix="",
@@ -13,21 +14,24 @@ router = APIRouter(
 )
 
 @router.post("/token", response_model=schemas.Token)
-def login(
+async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(database.get_db)
 ):
-    user = auth.authenticate_user(db, form_data.username, form_data.password)
+    user = await auth.authenticate_user_async(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid username or password"
         )
 
+    activity_tracker.record_login(user.id)
+
     access_token = auth.create_access_token(data={
         "sub": user.username,
         "user_id": user.id,
-        "role": user.role or "student"
+        "role": user.role or "student",
+        "tv": user.token_version or 0
     })
 
     return {
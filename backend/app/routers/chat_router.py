@@ -13,9 +13,6 @@ from ..rag_chatbot.chat import (
     should_generate_image,
 )
 
-# llama-index message format
-from llama_index.core.chat_engine.types import ChatMessage as LlamaChatMessage
-
 router = APIRouter(prefix="/chat", tags=["Chatbot"])
 
 # Client -> Server message schema
@@ -41,8 +38,12 @@ async def chat_endpoint(payload: ChatRequest):
     It supports text answers, audio output, and optional image generation.
     """
     try:
-        # Get singleton chat engine
-        chat_engine = get_chat_engine()
+        # llama-index message format (imported here so the app boots without llama_index loaded)
+        from llama_index.core.chat_engine.types import ChatMessage as LlamaChatMessage
+
+        # Get singleton chat engine (built on first use, off the event loop)
+        loop = asyncio.get_event_loop()
+        chat_engine = await loop.run_in_executor(None, get_chat_engine)
 
         # Convert history to llama-index format
         chat_history = [
@@ -53,7 +54,6 @@ async def chat_endpoint(payload: ChatRequest):
         latest_question = payload.question
 
         # Run blocking chat in background executor
-        loop = asyncio.get_event_loop()
         response = await asyncio.wait_for(
             loop.run_in_executor(
                 None,
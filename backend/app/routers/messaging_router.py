@@ -1,9 +1,11 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, HTTPException, UploadFile, File, status
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from ..database import get_db
 from ..models import group_students, group_teachers, TeacherProfile, ChatGroup, ChatMessage, User, blocked_users
 from ..schemas import ChatGroupCreate, ChatGroupOut, ChatMessageOut, BasicUserOut, GroupMemberOut
-from ..dependencies import get_current_user, get_current_user_ws
+from ..dependencies import get_current_user, get_current_user_ws, resolve_teacher_context
+from ..services.teacher_context import TeacherContext
+from ..services.query_profiler import query_budget
 import json
 from datetime import datetime, timedelta
 import uuid
@@ -123,7 +125,11 @@ def create_group(group: ChatGroupCreate, db: Session = Depends(get_db), user=Dep
 
 
 @router.get("/chat/groups", response_model=list[ChatGroupOut])
-def list_groups(db: Session = Depends(get_db), user=Depends(get_current_user)):
+def list_groups(
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+    teacher: Optional[TeacherContext] = Depends(resolve_teacher_context),
+):
     query = db.query(ChatGroup)
 
     if user.role == "admin":
@@ -143,8 +149,8 @@ def list_groups(db: Session = Depends(get_db), user=Depends(get_current_user)):
         ).all()
 
     if user.role == "teacher":
-        # Fetch teacher's level and department
-        teacher_profile = db.query(TeacherProfile).filter(TeacherProfile.user_id == user.id).first()
+        # Teacher's level and department, resolved once for the request
+        teacher_profile = teacher.profile if teacher else None
         if not teacher_profile:
             raise HTTPException(status_code=400, detail="Teacher profile not found.")
 
@@ -426,15 +432,19 @@ class ChatMessageCreate(BaseModel):
     file_type: Optional[str] = None
 
 @router.get("/chat/groups/{group_id}/messages", response_model=list[ChatMessageOut])
-def get_group_messages(group_id: int, db: Session = Depends(get_db), user=Depends(get_current_user)):
+@query_budget(6)
+def get_group_messages(
+    group_id: int,
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+    teacher: Optional[TeacherContext] = Depends(resolve_teacher_context),
+):
     group = db.query(ChatGroup).filter(ChatGroup.id == group_id).first()
     if not group:
         raise HTTPException(status_code=404, detail="Group not found")
 
     # ---------------- PERMISSION CHECK ----------------
     if user.role != "admin":
-        from ..models import group_students, group_teachers, TeacherProfile
-
         is_member_student = db.query(group_students).filter(
             group_students.c.group_id == group_id,
             group_students.c.student_id == user.id
@@ -452,7 +462,7 @@ def get_group_messages(group_id: int, db: Session = Depends(get_db), user=Depend
                 raise HTTPException(status_code=403, detail="Not allowed to view this chat")
 
         if user.role == "teacher":
-            profile = db.query(TeacherProfile).filter(TeacherProfile.user_id == user.id).first()
+            profile = teacher.profile if teacher else None
             if not profile:
                 raise HTTPException(status_code=403, detail="Teacher profile not found")
             if group.is_class_group and group.level != profile.level and not is_member_teacher:
@@ -461,13 +471,13 @@ def get_group_messages(group_id: int, db: Session = Depends(get_db), user=Depend
                 raise HTTPException(status_code=403, detail="Not allowed to view this chat")
 
     # ---------------- FETCH & FORMAT MESSAGES ----------------
-    messages = db.query(ChatMessage).filter(
+    messages = db.query(ChatMessage).options(joinedload(ChatMessage.sender)).filter(
         ChatMessage.group_id == group_id
     ).order_by(ChatMessage.timestamp.asc()).all()
 
     response = []
     for msg in messages:
-        sender = db.query(User).filter(User.id == msg.sender_id).first()
+        sender = msg.sender
         if sender:
             response.append(ChatMessageOut(
                 id=msg.id,
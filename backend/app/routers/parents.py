@@ -1,17 +1,24 @@
+import asyncio
+
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime, timedelta, date
-from sqlalchemy import func, and_
+from sqlalchemy import func, and_, select
 
-from ..database import get_db
+from ..config import PARENT_OVERVIEW_CONCURRENCY
+from ..database import AsyncSessionLocal, get_db, get_async_db
 from ..models import User, ParentChildAssociation, ProgressTracking, Topic, Subject, Attendance, ReportCard, StudentProfile
 from ..schemas import (
     ParentChildAssociationCreate, ParentChildAssociationOut, ParentChildAssociationUpdate,
     BasicUserOut, DailyProgressOut, SubjectPerformanceOut, ProgressOut, AttendanceOut,
-    ReportPreviewOut, ReportStudentInfo, SubjectScore, AttendanceSummary # ✅ AttendanceSummary imported
+    ReportPreviewOut, ReportStudentInfo, SubjectScore, AttendanceSummary, # ✅ AttendanceSummary imported
+    ChildOverviewOut
 )
 from ..auth import get_current_user
+from ..services.time_buckets import daily_rows_query
+from .progress import subject_summary_query
 from pydantic import BaseModel, validator # BaseModel and validator are needed for local schema definitions if you had them, but for imports, they might not be strictly necessary here if all schemas are in schemas.py
 
 router = APIRouter(prefix="/parents", tags=["Parents"])
@@ -19,7 +26,7 @@ router = APIRouter(prefix="/parents", tags=["Parents"])
 # --- Parent Specific Endpoints ---
 
 @router.post("/link-child", response_model=ParentChildAssociationOut, status_code=status.HTTP_201_CREATED)
-async def link_child_to_parent(
+def link_child_to_parent(
     child_data: ParentChildAssociationCreate,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -71,7 +78,7 @@ async def link_child_to_parent(
 @router.get("/my-children", response_model=List[ParentChildAssociationOut])
 async def get_my_children(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     if current_user.role != "parent":
         raise HTTPException(
@@ -79,14 +86,16 @@ async def get_my_children(
             detail="Only parents can view their children."
         )
     
-    children_associations = db.query(ParentChildAssociation).options(
-        joinedload(ParentChildAssociation.child)
-    ).filter(ParentChildAssociation.parent_id == current_user.id).all()
+    result = await db.execute(
+        select(ParentChildAssociation)
+        .options(joinedload(ParentChildAssociation.parent), joinedload(ParentChildAssociation.child))
+        .where(ParentChildAssociation.parent_id == current_user.id)
+    )
     
-    return children_associations
+    return result.scalars().all()
 
 @router.get("/admin/pending-approvals", response_model=List[ParentChildAssociationOut])
-async def get_pending_parent_approvals(
+def get_pending_parent_approvals(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -101,7 +110,7 @@ async def get_pending_parent_approvals(
     return pending_associations
 
 @router.put("/admin/approve-child/{association_id}", response_model=ParentChildAssociationOut)
-async def approve_child_association(
+def approve_child_association(
     association_id: int,
     approval_status: ParentChildAssociationUpdate,
     db: Session = Depends(get_db),
@@ -124,7 +133,7 @@ async def approve_child_association(
     return association
 
 @router.get("/search-students", response_model=List[BasicUserOut])
-async def search_students(
+def search_students(
     query: Optional[str] = None,
     student_class: Optional[str] = None,
     db: Session = Depends(get_db),
@@ -157,29 +166,29 @@ async def search_students(
     ]
     return unlinked_students
 
-@router.get("/child-performance/{child_id}", response_model=List[ProgressOut])
-async def get_child_performance(
-    child_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    if current_user.role != "parent":
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only parents can view child performance.")
-
-    association = db.query(ParentChildAssociation).filter(
-        ParentChildAssociation.parent_id == current_user.id,
-        ParentChildAssociation.child_id == child_id,
-        ParentChildAssociation.approved == True
-    ).first()
-
-    if not association:
+async def verify_child_link(db: AsyncSession, parent_id: int, child_id: int) -> None:
+    """Raise 403 unless `child_id` is linked to `parent_id` and the link is approved."""
+    linked = await db.scalar(
+        select(ParentChildAssociation.id).where(
+            ParentChildAssociation.parent_id == parent_id,
+            ParentChildAssociation.child_id == child_id,
+            ParentChildAssociation.approved.is_(True)
+        )
+    )
+    if not linked:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access denied. You are not linked to this child or the link is not yet approved."
         )
 
-    progress = (
-        db.query(
+# -------------------- Child Sections --------------------
+# One loader per section of a child's page, for a child whose link has
+# already been verified. The single-section endpoints below and
+# /children/overview share them.
+
+async def load_child_performance(db: AsyncSession, child_id: int) -> List[ProgressOut]:
+    progress = await db.execute(
+        select(
             ProgressTracking.id,
             ProgressTracking.user_id,
             ProgressTracking.topic_id,
@@ -191,8 +200,7 @@ async def get_child_performance(
         )
         .join(Topic, ProgressTracking.topic_id == Topic.id)
         .join(Subject, Topic.subject_id == Subject.id)
-        .filter(ProgressTracking.user_id == child_id)
-        .all()
+        .where(ProgressTracking.user_id == child_id)
     )
 
     return [
@@ -209,43 +217,10 @@ async def get_child_performance(
         for row in progress
     ]
 
-@router.get("/child-daily-progress/{child_id}", response_model=List[DailyProgressOut])
-async def get_child_daily_progress(
-    child_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    if current_user.role != "parent":
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only parents can view child daily progress.")
-
-    association = db.query(ParentChildAssociation).filter(
-        ParentChildAssociation.parent_id == current_user.id,
-        ParentChildAssociation.child_id == child_id,
-        ParentChildAssociation.approved == True
-    ).first()
-
-    if not association:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Access denied. You are not linked to this child or the link is not yet approved."
-        )
-    
-    past_week = datetime.utcnow() - timedelta(days=7)
 
-    progress = (
-        db.query(
-            func.date(ProgressTracking.completed_at).label("day"),
-            func.sum(ProgressTracking.score).label("total_score"),
-            func.sum(ProgressTracking.total_questions).label("total_questions")
-        )
-        .filter(
-            ProgressTracking.user_id == child_id,
-            ProgressTracking.completed_at >= past_week
-        )
-        .group_by(func.date(ProgressTracking.completed_at))
-        .order_by(func.date(ProgressTracking.completed_at))
-        .all()
-    )
+async def load_child_daily_progress(db: AsyncSession, child_id: int) -> List[DailyProgressOut]:
+    past_week = (datetime.utcnow() - timedelta(days=7)).date()
+    progress = await db.execute(daily_rows_query(child_id, start=past_week))
 
     return [
         DailyProgressOut(
@@ -256,35 +231,9 @@ async def get_child_daily_progress(
         for row in progress
     ]
 
-@router.get("/child-subject-performance/{child_id}", response_model=List[SubjectPerformanceOut])
-async def get_child_subject_performance(
-    child_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    if current_user.role != "parent":
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only parents can view child subject performance.")
-
-    association = db.query(ParentChildAssociation).filter(
-        ParentChildAssociation.parent_id == current_user.id,
-        ParentChildAssociation.child_id == child_id,
-        ParentChildAssociation.approved == True
-    ).first()
 
-    if not association:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Access denied. You are not linked to this child or the link is not yet approved."
-        )
-
-    results = db.query(
-        Subject.name.label("subject_name"),
-        func.coalesce(func.sum(ProgressTracking.score), 0).label("total_score"),
-        func.coalesce(func.sum(ProgressTracking.total_questions), 0).label("total_questions")
-    ).join(Topic, ProgressTracking.topic_id == Topic.id) \
-     .join(Subject, Topic.subject_id == Subject.id) \
-     .filter(ProgressTracking.user_id == child_id) \
-     .group_by(Subject.name).all()
+async def load_child_subject_performance(db: AsyncSession, child_id: int) -> List[SubjectPerformanceOut]:
+    results = await db.execute(subject_summary_query(child_id))
 
     return [
         SubjectPerformanceOut(
@@ -293,81 +242,54 @@ async def get_child_subject_performance(
         ) for row in results
     ]
 
-## **✅ NEW PARENT ENDPOINT: Fetch Child Attendance**
-@router.get("/child-attendance/{child_id}", response_model=List[AttendanceOut])
-async def get_child_attendance_for_parent(
-    child_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    """
-    Parent fetches their linked child's attendance records.
-    """
-    if current_user.role != "parent":
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only parents can view child attendance.")
-
-    # Verify child is linked to the current parent and approved
-    association = db.query(ParentChildAssociation).filter(
-        ParentChildAssociation.parent_id == current_user.id,
-        ParentChildAssociation.child_id == child_id,
-        ParentChildAssociation.approved == True
-    ).first()
 
-    if not association:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Access denied. You are not linked to this child or the link is not yet approved."
-        )
-
-    attendance_records = db.query(Attendance).filter(
-        Attendance.student_id == child_id
-    ).order_by(Attendance.date.desc()).all()
+async def load_child_attendance(db: AsyncSession, child_id: int) -> List[AttendanceOut]:
+    attendance_records = await db.scalars(
+        select(Attendance)
+        # AttendanceOut embeds the student; async sessions can't lazy-load it
+        .options(joinedload(Attendance.student).joinedload(User.teacher_profile))
+        .where(Attendance.student_id == child_id)
+        .order_by(Attendance.date.desc())
+    )
 
     return [AttendanceOut.from_orm(record) for record in attendance_records]
 
-@router.get("/child-report-card/{child_id}", response_model=ReportPreviewOut)
-async def get_child_report_card_for_parent(
-    child_id: int,
-    term: str = Query(..., description="Term (e.g., 'First Term', 'Second Term', 'Third Term')"),
-    year: int = Query(..., description="Academic Year (e.g., 2025)"),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    if current_user.role != "parent":
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Only parents can view child report cards."
-        )
 
-    association = db.query(ParentChildAssociation).filter(
-        ParentChildAssociation.parent_id == current_user.id,
-        ParentChildAssociation.child_id == child_id,
-        ParentChildAssociation.approved.is_(True)
-    ).first()
+def term_bounds(term: str, year: int):
+    """(start, end) of `term` ('term_1', 'term_2' or 'term_3') in the `year` academic year."""
+    term = term.lower().strip()
+    if term == "term_1":
+        return datetime(year, 6, 9), datetime(year, 9, 15)
+    if term == "term_2":
+        return datetime(year, 9, 23), datetime(year, 12, 15)
+    if term == "term_3":
+        return datetime(year + 1, 1, 8), datetime(year + 1, 4, 12)
+    raise HTTPException(
+        status_code=400,
+        detail="Invalid term format. Use 'term_1', 'term_2', or 'term_3'."
+    )
 
-    if not association:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Access denied. You are not linked to this child or the link is not yet approved."
-        )
 
-    child_user = db.query(User).filter(User.id == child_id).first()
+async def load_child_report_card(db: AsyncSession, child_id: int, term: str, year: int) -> ReportPreviewOut:
+    child_user = await db.get(User, child_id)
     if not child_user:
         raise HTTPException(status_code=404, detail="Child user not found.")
 
-    student_profile = db.query(StudentProfile).filter(
-        StudentProfile.user_id == child_id
-    ).first()
+    student_profile = await db.scalar(
+        select(StudentProfile).where(StudentProfile.user_id == child_id)
+    )
     if not student_profile:
         raise HTTPException(status_code=404, detail="Student profile not found.")
 
-    report_card_entries = db.query(ReportCard).filter(
-        and_(
-            ReportCard.student_id == child_id,
-            ReportCard.term.ilike(term),
-            ReportCard.year == year
+    report_card_entries = (await db.scalars(
+        select(ReportCard).where(
+            and_(
+                ReportCard.student_id == child_id,
+                ReportCard.term.ilike(term),
+                ReportCard.year == year
+            )
         )
-    ).all()
+    )).all()
 
     if not report_card_entries:
         raise HTTPException(
@@ -392,48 +314,24 @@ async def get_child_report_card_for_parent(
 
     # ✅ Define accurate term date ranges
     term = term.lower().strip()
-
-    try:
-        if term == "term_1":
-            term_start = datetime(year, 6, 9)
-            term_end = datetime(year, 9, 15)
-        elif term == "term_2":
-            term_start = datetime(year, 9, 23)
-            term_end = datetime(year, 12, 15)
-        elif term == "term_3":
-            term_start = datetime(year + 1, 1, 8)
-            term_end = datetime(year + 1, 4, 12)
-        else:
-            raise ValueError()
-    except ValueError:
-        raise HTTPException(
-            status_code=400,
-            detail="Invalid term format. Use 'term_1', 'term_2', or 'term_3'."
-        )
-
-    # 🔍 Logging term boundaries
-    print("📅 Term:", term)
-    print("🧑‍🎓 Child ID:", child_id)
-    print("⏳ Term Start:", term_start)
-    print("⏳ Term End:", term_end)
+    term_start, term_end = term_bounds(term, year)
 
     # ✅ Attendance filtering using real term boundaries
-    attendance_result = db.query(
-        func.count().label("total_days"),
-        func.count().filter(Attendance.status == "present").label("present"),
-        func.count().filter(Attendance.status == "absent").label("absent"),
-        func.count().filter(Attendance.status == "late").label("late"),
-        func.count().filter(Attendance.status == "excused").label("excused")
-    ).filter(
-        and_(
-            Attendance.student_id == child_id,
-            Attendance.date >= term_start,
-            Attendance.date <= term_end
+    attendance_result = (await db.execute(
+        select(
+            func.count().label("total_days"),
+            func.count().filter(Attendance.status == "present").label("present"),
+            func.count().filter(Attendance.status == "absent").label("absent"),
+            func.count().filter(Attendance.status == "late").label("late"),
+            func.count().filter(Attendance.status == "excused").label("excused")
+        ).where(
+            and_(
+                Attendance.student_id == child_id,
+                Attendance.date >= term_start,
+                Attendance.date <= term_end
+            )
         )
-    ).one()
-
-    # 🔍 Logging raw DB result
-    print("📊 Raw Attendance Counts:", attendance_result)
+    )).one()
 
     # ✅ Fix: Access the values by index
     attendance_summary = AttendanceSummary(
@@ -445,9 +343,6 @@ async def get_child_report_card_for_parent(
         teachers_present=0
     )
 
-    # 🔍 Logging the structured summary before return
-    print("✅ Final Attendance Summary:", attendance_summary.model_dump())
-
     student_info = ReportStudentInfo(
         full_name=child_user.full_name,
         guardian_name=student_profile.guardian_name,
@@ -467,3 +362,161 @@ async def get_child_report_card_for_parent(
         attendance=AttendanceSummary.model_validate(attendance_summary.model_dump()),  # ✅ Enforce schema validation
         subjects=subject_scores_list
     )
+
+
+# -------------------- Child Endpoints --------------------
+
+@router.get("/child-performance/{child_id}", response_model=List[ProgressOut])
+async def get_child_performance(
+    child_id: int,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    if current_user.role != "parent":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only parents can view child performance.")
+
+    await verify_child_link(db, current_user.id, child_id)
+    return await load_child_performance(db, child_id)
+
+@router.get("/child-daily-progress/{child_id}", response_model=List[DailyProgressOut])
+async def get_child_daily_progress(
+    child_id: int,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    if current_user.role != "parent":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only parents can view child daily progress.")
+
+    await verify_child_link(db, current_user.id, child_id)
+    return await load_child_daily_progress(db, child_id)
+
+@router.get("/child-subject-performance/{child_id}", response_model=List[SubjectPerformanceOut])
+async def get_child_subject_performance(
+    child_id: int,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    if current_user.role != "parent":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only parents can view child subject performance.")
+
+    await verify_child_link(db, current_user.id, child_id)
+    return await load_child_subject_performance(db, child_id)
+
+## **✅ NEW PARENT ENDPOINT: Fetch Child Attendance**
+@router.get("/child-attendance/{child_id}", response_model=List[AttendanceOut])
+async def get_child_attendance_for_parent(
+    child_id: int,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Parent fetches their linked child's attendance records.
+    """
+    if current_user.role != "parent":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only parents can view child attendance.")
+
+    # Verify child is linked to the current parent and approved
+    await verify_child_link(db, current_user.id, child_id)
+    return await load_child_attendance(db, child_id)
+
+@router.get("/child-report-card/{child_id}", response_model=ReportPreviewOut)
+async def get_child_report_card_for_parent(
+    child_id: int,
+    term: str = Query(..., description="Term (e.g., 'First Term', 'Second Term', 'Third Term')"),
+    year: int = Query(..., description="Academic Year (e.g., 2025)"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    if current_user.role != "parent":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only parents can view child report cards."
+        )
+
+    await verify_child_link(db, current_user.id, child_id)
+    return await load_child_report_card(db, child_id, term, year)
+
+
+# -------------------- Children Overview --------------------
+
+CHILD_SECTIONS = {
+    "performance": load_child_performance,
+    "daily_progress": load_child_daily_progress,
+    "subject_performance": load_child_subject_performance,
+    "attendance": load_child_attendance,
+}
+
+
+async def _report_card_or_none(db: AsyncSession, child_id: int, term: str, year: int) -> Optional[ReportPreviewOut]:
+    try:
+        return await load_child_report_card(db, child_id, term, year)
+    except HTTPException as e:
+        if e.status_code == 404:
+            return None
+        raise
+
+
+@router.get("/children/overview", response_model=List[ChildOverviewOut])
+async def get_children_overview(
+    child_ids: Optional[List[int]] = Query(default=None, description="Children to include; all approved children when omitted"),
+    term: Optional[str] = Query(default=None, description="With year, adds each child's report card ('term_1'...)"),
+    year: Optional[int] = Query(default=None),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Everything on a child's page, for one or more children, in one request.
+    The parent link is checked once for all children; the sections then
+    load concurrently, each on its own pooled connection (at most
+    PARENT_OVERVIEW_CONCURRENCY at a time).
+    """
+    if current_user.role != "parent":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only parents can view child overviews.")
+
+    query = (
+        select(User.id, User.full_name, User.level)
+        .join(ParentChildAssociation, ParentChildAssociation.child_id == User.id)
+        .where(
+            ParentChildAssociation.parent_id == current_user.id,
+            ParentChildAssociation.approved.is_(True)
+        )
+        .order_by(User.id)
+    )
+    if child_ids:
+        query = query.where(User.id.in_(set(child_ids)))
+    children = (await db.execute(query)).all()
+
+    if child_ids and {child.id for child in children} != set(child_ids):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied. You are not linked to this child or the link is not yet approved."
+        )
+
+    with_report_card = bool(term and year)
+    if with_report_card:
+        term_bounds(term, year)  # reject a bad term before starting any work
+
+    semaphore = asyncio.Semaphore(PARENT_OVERVIEW_CONCURRENCY)
+
+    async def load(loader, *args):
+        async with semaphore:
+            async with AsyncSessionLocal() as section_db:
+                return await loader(section_db, *args)
+
+    jobs = []
+    for child in children:
+        for name, loader in CHILD_SECTIONS.items():
+            jobs.append((child.id, name, load(loader, child.id)))
+        if with_report_card:
+            jobs.append((child.id, "report_card", load(_report_card_or_none, child.id, term, year)))
+
+    results = await asyncio.gather(*(job for _, _, job in jobs))
+
+    sections = {child.id: {} for child in children}
+    for (child_id, name, _), result in zip(jobs, results):
+        sections[child_id][name] = result
+
+    return [
+        ChildOverviewOut(child_id=child.id, full_name=child.full_name, level=child.level, **sections[child.id])
+        for child in children
+    ]
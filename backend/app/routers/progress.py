@@ -1,15 +1,16 @@
 from fastapi import APIRouter, Depends, Query, HTTPException
-from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from datetime import datetime, timedelta
-from typing import List
-from io import StringIO
-import csv
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, func, or_, select
+from datetime import date, datetime, time, timedelta
+from typing import List, Literal
 
 from .. import models, schemas
 from ..dependencies import get_db, get_current_user, get_current_admin_user
-from ..models import ProgressTracking, Topic, User, Subject
+from ..database import get_async_db, get_read_db
+from ..services.csv_export import csv_export_response
+from ..services.time_buckets import TERM_START, bucket_rows, daily_rows_query
+from ..models import ProgressTracking, Topic, User, Subject, StudentSubjectScore, StudentTopicScore, normalized
 
 
 router = APIRouter(
@@ -17,8 +18,6 @@ router = APIRouter(
     tags=["Progress Tracking"]
 )
 
-TERM_START_DATE = datetime(2025, 6, 9)
-
 # ----------- User-specific endpoints ------------
 
 @router.get("/my-progress", response_model=List[schemas.ProgressOut])
@@ -95,22 +94,8 @@ def get_my_daily_progress(
     db: Session = Depends(get_db),
     user=Depends(get_current_user)
 ):
-    past_week = datetime.utcnow() - timedelta(days=7)
-
-    progress = (
-        db.query(
-            func.date(ProgressTracking.completed_at).label("day"),
-            func.sum(ProgressTracking.score).label("total_score"),
-            func.sum(ProgressTracking.total_questions).label("total_questions")
-        )
-        .filter(
-            ProgressTracking.user_id == user.id,
-            ProgressTracking.completed_at >= past_week
-        )
-        .group_by(func.date(ProgressTracking.completed_at))
-        .order_by(func.date(ProgressTracking.completed_at))
-        .all()
-    )
+    past_week = (datetime.utcnow() - timedelta(days=7)).date()
+    progress = db.execute(daily_rows_query(user.id, start=past_week)).all()
 
     return [
         schemas.DailyProgressOut(
@@ -127,97 +112,161 @@ def get_my_weekly_progress(
     db: Session = Depends(get_db),
     user=Depends(get_current_user)
 ):
-    progress_data = (
-        db.query(
-            func.floor(func.extract('epoch', (ProgressTracking.completed_at - TERM_START_DATE)) / 604800)
-            .label("week_number"),
-            func.sum(ProgressTracking.score).label("total_score"),
-            func.sum(ProgressTracking.total_questions).label("total_questions")
-        )
-        .filter(ProgressTracking.user_id == user.id)
-        .filter(ProgressTracking.completed_at >= TERM_START_DATE)
-        .group_by("week_number")
-        .order_by("week_number")
-        .all()
-    )
+    rows = db.execute(daily_rows_query(user.id, start=TERM_START)).all()
 
     return [
         schemas.WeeklyProgressOut(
-            week=f"Week {int(row.week_number) + 1}",
-            total_score=row.total_score,
-            total_questions=row.total_questions
+            week=bucket.label,
+            total_score=bucket.total_score,
+            total_questions=bucket.total_questions
+        )
+        for bucket in bucket_rows(rows, "term")
+    ]
+
+
+@router.get("/my-series", response_model=List[schemas.ProgressBucketOut])
+def get_my_progress_series(
+    bucket: Literal["day", "week", "month", "term"] = Query(default="week"),
+    date_from: date = Query(default=None),
+    date_to: date = Query(default=None),
+    subject: str = Query(default=None),
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user)
+):
+    rows = db.execute(daily_rows_query(user.id, start=date_from, end=date_to, subject=subject)).all()
+
+    return [
+        schemas.ProgressBucketOut(
+            label=b.label,
+            start=b.start,
+            attempts=b.attempts,
+            total_score=b.total_score,
+            total_questions=b.total_questions,
+            average_score=round(b.average_score, 2)
         )
-        for row in progress_data
+        for b in bucket_rows(rows, bucket)
     ]
 
 
 
 # ----------- Admin-specific endpoints ------------
 
+def _columns(rows, names):
+    # [(a, b), (a, b)] -> {"x": [a, a], "y": [b, b]}
+    values = list(zip(*rows)) or [()] * len(names)
+    return {name: list(column) for name, column in zip(names, values)}
+
+
+def _parse_cursor(cursor: str):
+    try:
+        student_id, topic_id = (int(part) for part in cursor.split(":"))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return student_id, topic_id
+
+
 @router.get("/admin/analytics", response_model=schemas.AdminAnalyticsResponse)
 def get_admin_analytics(
-    db: Session = Depends(get_db),
+    subject: str = Query(default=None),
+    level: str = Query(default=None),
+    date_from: date = Query(default=None, description="Topics last attempted on/after this day"),
+    date_to: date = Query(default=None, description="Topics last attempted on/before this day"),
+    cursor: str = Query(default=None, description="next_cursor from the previous page"),
+    limit: int = Query(default=500, ge=1, le=5000),
+    db: Session = Depends(get_read_db),
     admin=Depends(get_current_admin_user)
 ):
-    subject_average = (
-        db.query(
-            Subject.name.label("subject"),
-            func.avg(ProgressTracking.score).label("avg_score")
+    """
+    Reads the score rollups (services/score_rollups.py) rather than the raw
+    attempt history. student_topic_scores is keyset-paginated on
+    (user_id, topic_id); pass next_cursor back until it is null.
+    """
+    filters = []
+    if subject:
+        filters.append(normalized(Subject.name) == subject.strip().lower())
+    if level:
+        filters.append(normalized(Topic.level) == level.strip().lower())
+
+    page_filters = list(filters)
+    if date_from:
+        page_filters.append(StudentTopicScore.last_attempt_at >= datetime.combine(date_from, time.min))
+    if date_to:
+        page_filters.append(StudentTopicScore.last_attempt_at < datetime.combine(date_to + timedelta(days=1), time.min))
+    if cursor:
+        after_student, after_topic = _parse_cursor(cursor)
+        page_filters.append(or_(
+            StudentTopicScore.student_id > after_student,
+            and_(StudentTopicScore.student_id == after_student, StudentTopicScore.topic_id > after_topic)
+        ))
+
+    page = db.execute(
+        select(
+            StudentTopicScore.student_id,
+            User.username,
+            Topic.title,
+            Subject.name,
+            StudentTopicScore.score_total,
+            StudentTopicScore.questions_total,
+            StudentTopicScore.topic_id,
         )
-        .join(Topic, ProgressTracking.topic_id == Topic.id)
+        .join(User, StudentTopicScore.student_id == User.id)
+        .join(Topic, StudentTopicScore.topic_id == Topic.id)
         .join(Subject, Topic.subject_id == Subject.id)
-        .group_by(Subject.name)
-        .all()
+        .where(*page_filters)
+        .order_by(StudentTopicScore.student_id, StudentTopicScore.topic_id)
+        .limit(limit + 1)
+    ).all()
+
+    next_cursor = None
+    if len(page) > limit:
+        page = page[:limit]
+        next_cursor = f"{page[-1].student_id}:{page[-1].topic_id}"
+
+    student_topic_scores = _columns(
+        [row[:6] for row in page],
+        ["user_id", "username", "topic", "subject", "total_score", "total_questions"]
     )
+    if cursor:
+        return schemas.AdminAnalyticsResponse(student_topic_scores=student_topic_scores, next_cursor=next_cursor)
 
-    student_topic_scores = (
-        db.query(
-            User.id.label("user_id"),
-            User.username.label("username"),
-            Topic.title.label("topic"),
-            Subject.name.label("subject"),
-            func.sum(ProgressTracking.score).label("total_score"),
-            func.sum(ProgressTracking.total_questions).label("total_questions")
+    # Average quiz score per subject: sum of scores over number of attempts
+    subject_filters = [StudentSubjectScore.source == "quiz"]
+    if subject:
+        subject_filters.append(normalized(Subject.name) == subject.strip().lower())
+    if level:
+        subject_filters.append(normalized(Subject.level) == level.strip().lower())
+    subject_average = db.execute(
+        select(
+            Subject.name,
+            (func.sum(StudentSubjectScore.score_total) / func.sum(StudentSubjectScore.attempts)).label("avg_score")
         )
-        .join(User, ProgressTracking.user_id == User.id)
-        .join(Topic, ProgressTracking.topic_id == Topic.id)
-        .join(Subject, Topic.subject_id == Subject.id)
-        .group_by(User.id, Topic.id, Subject.name, Topic.title)
-        .all()
+        .join(Subject, StudentSubjectScore.subject_id == Subject.id)
+        .where(*subject_filters)
+        .group_by(Subject.name)
+        .order_by(Subject.name)
+    ).all()
+
+    day_from = datetime.combine(date_from, time.min) if date_from else datetime.utcnow() - timedelta(days=14)
+    day = func.date(ProgressTracking.completed_at)
+    daily = (
+        select(day, func.sum(ProgressTracking.score), func.sum(ProgressTracking.total_questions))
+        .where(ProgressTracking.completed_at >= day_from)
     )
-
-    recent_days = datetime.utcnow() - timedelta(days=14)
-    daily_progress = (
-        db.query(
-            func.date(ProgressTracking.completed_at).label("day"),
-            func.sum(ProgressTracking.score).label("total_score"),
-            func.sum(ProgressTracking.total_questions).label("total_questions")
+    if date_to:
+        daily = daily.where(ProgressTracking.completed_at < datetime.combine(date_to + timedelta(days=1), time.min))
+    if filters:
+        daily = (
+            daily.join(Topic, ProgressTracking.topic_id == Topic.id)
+            .join(Subject, Topic.subject_id == Subject.id)
+            .where(*filters)
         )
-        .filter(ProgressTracking.completed_at >= recent_days)
-        .group_by(func.date(ProgressTracking.completed_at))
-        .order_by(func.date(ProgressTracking.completed_at))
-        .all()
-    )
+    daily_progress = db.execute(daily.group_by(day).order_by(day)).all()
 
     return schemas.AdminAnalyticsResponse(
-        subject_average=[schemas.SubjectAverage(subject=row.subject, avg_score=row.avg_score) for row in subject_average],
-        student_topic_scores=[
-            schemas.StudentTopicScore(
-                user_id=row.user_id,
-                username=row.username,
-                topic=row.topic,
-                subject=row.subject,
-                total_score=row.total_score,
-                total_questions=row.total_questions
-            ) for row in student_topic_scores
-        ],
-        daily_progress=[
-            schemas.DailyProgress(
-                day=row.day,
-                total_score=row.total_score,
-                total_questions=row.total_questions
-            ) for row in daily_progress
-        ]
+        subject_average=_columns(subject_average, ["subject", "avg_score"]),
+        daily_progress=_columns(daily_progress, ["day", "total_score", "total_questions"]),
+        student_topic_scores=student_topic_scores,
+        next_cursor=next_cursor
     )
 
 
@@ -300,109 +349,117 @@ def get_progress_for_student(
 
 
 @router.get("/summary")
-def get_summary(
+async def get_summary(
     subject: str = Query(default=None),
     user_id: int = Query(default=None),
     current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     if current_user.is_admin and user_id:
-        user = db.query(User).filter(User.id == user_id).first()
+        user = await db.scalar(select(User.id).where(User.id == user_id))
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
     else:
         user_id = current_user.id
 
-    query = (
-        db.query(
-            func.to_char(ProgressTracking.completed_at, 'IYYY-"W"IW').label("week"),
-            func.avg(ProgressTracking.score).label("avg_score")
-        )
-        .join(Topic, ProgressTracking.topic_id == Topic.id)
-        .join(Subject, Topic.subject_id == Subject.id)
-        .filter(ProgressTracking.user_id == user_id)
-    )
+    rows = (await db.execute(daily_rows_query(user_id, subject=subject))).all()
 
-    if subject:
-        query = query.filter(Subject.name.ilike(f"%{subject}%"))
-
-    results = (
-        query.group_by(func.to_char(ProgressTracking.completed_at, 'IYYY-"W"IW'))
-        .order_by(func.to_char(ProgressTracking.completed_at, 'IYYY-"W"IW'))
-        .all()
-    )
-
-    return {"weekly": [{"week": r.week, "avg_score": r.avg_score} for r in results]}
+    return {"weekly": [{"week": b.label, "avg_score": b.average_score} for b in bucket_rows(rows, "week")]}
 
 
 
 @router.get("/export/csv")
 def export_progress_csv(
-    db: Session = Depends(get_db),
+    date_from: date = Query(default=None),
+    date_to: date = Query(default=None),
+    level: str = Query(default=None),
+    subject: str = Query(default=None),
+    gzip: bool = Query(default=False),
     current_user: User = Depends(get_current_admin_user)
 ):
-    output = StringIO()
-    writer = csv.writer(output)
-    writer.writerow(["User ID", "Topic ID", "Score", "Total Questions", "Completed At"])
+    statement = (
+        select(
+            ProgressTracking.user_id,
+            User.full_name,
+            User.level,
+            Subject.name,
+            ProgressTracking.topic_id,
+            Topic.title,
+            ProgressTracking.score,
+            ProgressTracking.total_questions,
+            ProgressTracking.completed_at,
+        )
+        .join(User, ProgressTracking.user_id == User.id)
+        .join(Topic, ProgressTracking.topic_id == Topic.id)
+        .outerjoin(Subject, Topic.subject_id == Subject.id)
+        .order_by(ProgressTracking.id)
+    )
+    if date_from:
+        statement = statement.where(ProgressTracking.completed_at >= datetime.combine(date_from, time.min))
+    if date_to:
+        statement = statement.where(ProgressTracking.completed_at < datetime.combine(date_to + timedelta(days=1), time.min))
+    if level:
+        statement = statement.where(normalized(User.level) == level.strip().lower())
+    if subject:
+        statement = statement.where(normalized(Subject.name) == subject.strip().lower())
 
-    records = db.query(ProgressTracking).all()
-    for record in records:
-        writer.writerow([
-            record.user_id,
-            record.topic_id,
-            record.score,
-            record.total_questions,
-            record.completed_at.strftime("%Y-%m-%d %H:%M:%S") if record.completed_at else ""
-        ])
+    return csv_export_response(
+        statement,
+        ["User ID", "Student", "Level", "Subject", "Topic ID", "Topic", "Score", "Total Questions", "Completed At"],
+        "progress_tracking",
+        gzip=gzip
+    )
 
-    output.seek(0)
-    return StreamingResponse(output, media_type="text/csv", headers={
-        "Content-Disposition": "attachment; filename=progress_tracking.csv"
-    })
 
 
+def my_summary_query(user_id: int):
+    # Reads the per-topic rollups (services/score_rollups.py), one row per attempted topic
+    return select(
+        func.count(StudentTopicScore.id).label("total_topics"),
+        func.count(StudentTopicScore.completed_at).label("completed_topics"),
+        func.coalesce(func.sum(StudentTopicScore.score_total), 0).label("total_score"),
+        func.coalesce(func.sum(StudentTopicScore.questions_total), 0).label("total_questions"),
+    ).where(StudentTopicScore.student_id == user_id)
+
+
+def subject_summary_query(user_id: int):
+    # Topic quiz totals per subject, from the per-subject rollups
+    return (
+        select(
+            Subject.name.label("subject_name"),
+            func.coalesce(func.sum(StudentSubjectScore.score_total), 0).label("total_score"),
+            func.coalesce(func.sum(StudentSubjectScore.questions_total), 0).label("total_questions")
+        )
+        .join(Subject, StudentSubjectScore.subject_id == Subject.id)
+        .where(StudentSubjectScore.student_id == user_id, StudentSubjectScore.source == "quiz")
+        .group_by(Subject.name)
+    )
+
 
 @router.get("/my-summary", response_model=schemas.MyProgressSummaryOut)
-def get_my_summary(
-    db: Session = Depends(get_db),
+async def get_my_summary(
+    db: AsyncSession = Depends(get_async_db),
     user: User = Depends(get_current_user)
 ):
-    total_topics = db.query(func.count(func.distinct(ProgressTracking.topic_id))) \
-        .filter(ProgressTracking.user_id == user.id).scalar()
-
-    completed_topics = db.query(func.count(func.distinct(ProgressTracking.topic_id))) \
-        .filter(ProgressTracking.user_id == user.id, ProgressTracking.score >= ProgressTracking.total_questions) \
-        .scalar()
+    row = (await db.execute(my_summary_query(user.id))).one()
 
-    total_score, total_questions = db.query(
-        func.coalesce(func.sum(ProgressTracking.score), 0),
-        func.coalesce(func.sum(ProgressTracking.total_questions), 0)
-    ).filter(ProgressTracking.user_id == user.id).first()
-
-    avg_score = (total_score / total_questions * 100) if total_questions else 0.0
+    avg_score = (row.total_score / row.total_questions * 100) if row.total_questions else 0.0
 
     return schemas.MyProgressSummaryOut(
-        total_topics=total_topics,
-        completed_topics=completed_topics,
-        total_questions=total_questions,
+        total_topics=row.total_topics,
+        completed_topics=row.completed_topics,
+        total_questions=row.total_questions,
         average_score=round(avg_score, 2)
     )
 
 
 
 @router.get("/my-subject-summary", response_model=List[schemas.SubjectPerformanceOut])
-def get_my_subject_summary(
-    db: Session = Depends(get_db),
+async def get_my_subject_summary(
+    db: AsyncSession = Depends(get_async_db),
     user: User = Depends(get_current_user)
 ):
-    results = db.query(
-        Subject.name.label("subject_name"),
-        func.coalesce(func.sum(ProgressTracking.score), 0).label("total_score"),
-        func.coalesce(func.sum(ProgressTracking.total_questions), 0).label("total_questions")
-    ).join(Topic, ProgressTracking.topic_id == Topic.id) \
-     .join(Subject, Topic.subject_id == Subject.id) \
-     .filter(ProgressTracking.user_id == user.id) \
-     .group_by(Subject.name).all()
+    results = (await db.execute(subject_summary_query(user.id))).all()
 
     return [
         schemas.SubjectPerformanceOut(
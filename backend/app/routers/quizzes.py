@@ -1,12 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from sqlalchemy import func, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, or_, select
 from typing import Dict, List
 import re
 
-from ..database import get_db
-from ..models import TopicQuestion, Subject, Topic, StudentProfile, User
-from ..dependencies import get_current_student_user
+from ..database import get_db, get_async_db
+from ..models import TopicQuestion, Subject, Topic, StudentProfile, User, normalized
+from ..dependencies import get_current_student_record
 from ..schemas import TopicQuestionOut, AnswerCheckRequest, AnswerCheckResponse
 
 router = APIRouter(prefix="/quizzes", tags=["Quizzes"])
@@ -27,12 +28,38 @@ def build_options(q):
 # ──────────────────────────────────────────────────────────────
 # 📚 Get Student Quizzes by Subject
 # ──────────────────────────────────────────────────────────────
+def student_subjects_query(level: str, department: str):
+    # Filter subjects by level and (if applicable) department
+    if level in {"ss1", "ss2", "ss3"} and department:
+        return select(Subject).where(
+            normalized(Subject.level) == level,
+            or_(
+                normalized(Subject.department) == department,
+                Subject.department == None,
+                func.length(func.trim(Subject.department)) == 0
+            )
+        )
+    return select(Subject).where(normalized(Subject.level) == level)
+
+
+def subject_questions_query(subject_ids: List[int], level: str):
+    # Questions for topics where subject_id matches AND level matches
+    return (
+        select(TopicQuestion, Topic.subject_id)
+        .join(Topic, TopicQuestion.topic_id == Topic.id)
+        .where(
+            Topic.subject_id.in_(subject_ids),
+            normalized(Topic.level) == level
+        )
+    )
+
+
 @router.get("/me", response_model=Dict[str, Dict[str, List[TopicQuestionOut]]])
-def get_student_quizzes(
-    current_user: User = Depends(get_current_student_user),
-    db: Session = Depends(get_db)
+async def get_student_quizzes(
+    current_user: User = Depends(get_current_student_record),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    student = db.query(StudentProfile).filter(StudentProfile.user_id == current_user.id).first()
+    student = await db.scalar(select(StudentProfile.id).where(StudentProfile.user_id == current_user.id))
     if not student:
         raise HTTPException(status_code=404, detail="Student profile not found")
 
@@ -42,42 +69,22 @@ def get_student_quizzes(
     if not level:
         raise HTTPException(status_code=400, detail="Student level is missing in user profile.")
 
-    # Filter subjects by level and (if applicable) department
-    if level in {"ss1", "ss2", "ss3"} and department:
-        subjects = db.query(Subject).filter(
-            func.lower(Subject.level) == level,
-            or_(
-                func.lower(Subject.department) == department,
-                Subject.department == None,
-                func.length(func.trim(Subject.department)) == 0
-            )
-        ).all()
-    else:
-        subjects = db.query(Subject).filter(func.lower(Subject.level) == level).all()
+    subjects = (await db.execute(student_subjects_query(level, department))).scalars().all()
 
     quizzes_by_subject: Dict[str, Dict[str, List[TopicQuestionOut]]] = {}
+    questions_by_subject: Dict[int, list] = {}
+
+    if subjects:
+        rows = await db.execute(subject_questions_query([s.id for s in subjects], level))
+        for q, subject_id in rows:
+            questions_by_subject.setdefault(subject_id, []).append(q)
 
     for subject in subjects:
         subject_name = subject.name.strip()
-        # Get topics where subject_id matches AND level matches
-        topics = db.query(Topic).filter(
-            Topic.subject_id == subject.id,
-            func.lower(Topic.level) == level
-        ).all()
-
-        topic_ids = [t.id for t in topics]
-        if not topic_ids:
-            quizzes_by_subject[subject_name] = {"objective": [], "theory": []}
-            continue
-
-        questions = db.query(TopicQuestion).filter(
-            TopicQuestion.topic_id.in_(topic_ids)
-        ).all()
-
         objective_questions = []
         theory_questions = []
 
-        for q in questions:
+        for q in questions_by_subject.get(subject.id, []):
             out = TopicQuestionOut(
                 id=q.id,
                 topic_id=q.topic_id,
@@ -6,11 +6,13 @@ import calendar
 
 from .. import models, schemas
 from ..database import get_db
+from ..models import normalized
+from ..services.csv_export import csv_export_response
 from ..auth import get_current_user
 
 
 from fastapi import Query
-from sqlalchemy import or_, and_
+from sqlalchemy import or_, and_, func, select
 from ..dependencies import require_teacher, get_current_admin_user  # assuming this exists for teacher auth
 
 router = APIRouter(prefix="/report-cards", tags=["Report Cards"])
@@ -205,6 +207,56 @@ def get_my_report_cards(term: str, year: int, db: Session = Depends(get_db), cur
     ).all()
 
 
+@router.get("/export/csv")
+def export_report_cards_csv(
+    term: str = Query(default=None),
+    year: int = Query(default=None),
+    level: str = Query(default=None),
+    subject: str = Query(default=None),
+    gzip: bool = Query(default=False),
+    admin: models.User = Depends(get_current_admin_user)
+):
+    """Admin: Stream report card entries as CSV, optionally filtered and gzipped."""
+    score = (
+        func.coalesce(models.ReportCard.first_test_score, 0)
+        + func.coalesce(models.ReportCard.second_test_score, 0)
+        + func.coalesce(models.ReportCard.exam_score, 0)
+    )
+    statement = (
+        select(
+            models.ReportCard.student_id,
+            models.User.full_name,
+            models.User.level,
+            models.ReportCard.term,
+            models.ReportCard.year,
+            models.ReportCard.subject,
+            models.ReportCard.first_test_score,
+            models.ReportCard.second_test_score,
+            models.ReportCard.exam_score,
+            score,
+            models.ReportCard.comment,
+        )
+        .join(models.User, models.ReportCard.student_id == models.User.id)
+        .order_by(models.ReportCard.year, models.ReportCard.term, models.ReportCard.student_id, models.ReportCard.id)
+    )
+    if term:
+        statement = statement.where(func.lower(models.ReportCard.term) == term.strip().lower())
+    if year:
+        statement = statement.where(models.ReportCard.year == year)
+    if level:
+        statement = statement.where(normalized(models.User.level) == level.strip().lower())
+    if subject:
+        statement = statement.where(normalized(models.ReportCard.subject) == subject.strip().lower())
+
+    return csv_export_response(
+        statement,
+        ["Student ID", "Student", "Level", "Term", "Year", "Subject",
+         "First Test", "Second Test", "Exam", "Total", "Comment"],
+        "report_cards",
+        gzip=gzip
+    )
+
+
 @router.get("/{student_id}/{term}/{year}", response_model=List[schemas.ReportCardOut])
 def get_report_card_by_student(student_id: int, term: str, year: int, db: Session = Depends(get_db)):
     return db.query(models.ReportCard).filter_by(
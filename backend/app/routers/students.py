@@ -10,6 +10,8 @@ from ..dependencies import get_current_admin_user, get_current_student_user
 from sqlalchemy import func
 from ..services.student_dashboard_service import get_student_dashboard_data
 from ..schemas import StudentDashboardOut
+from ..services.user_cache import invalidate_user
+from ..services.query_profiler import query_budget
 
 router = APIRouter()
 
@@ -37,6 +39,7 @@ def delete_student(
         raise HTTPException(status_code=404, detail="Student not found")
     db.delete(student)
     db.commit()
+    invalidate_user(student_id)
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 # ----------------------
@@ -57,6 +60,7 @@ def update_student(
         setattr(student, field, value)
 
     db.commit()
+    invalidate_user(student_id)
     db.refresh(student)
     return student
 
@@ -110,8 +114,9 @@ def get_students_by_class_for_teacher(
 
 
 @router.get("/dashboard", response_model=StudentDashboardOut)
+@query_budget(10)
 def get_student_dashboard(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_student_user)
 ):
-    return get_student_dashboard_data(db, current_user)
+    return get_student_dashboard_data(db, current_user.user)
@@ -3,11 +3,15 @@ from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import func, or_, and_
 from typing import List, Optional
 from datetime import datetime
+from collections import defaultdict
 from .. import models, schemas, database
 from ..dependencies import get_current_teacher_user, get_current_admin_user, get_current_user, get_current_admin_or_teacher_user
+from ..dependencies import resolve_teacher_context, get_teacher_context
 from ..database import get_db
 from ..models import User, TeacherProfile, TeacherSubject, Subject
 from ..schemas import UserOut, ClassInfo
+from ..services.teacher_context import TeacherContext, get_teacher_subject_ids, invalidate_teacher
+from ..services.query_profiler import query_budget
 from ..database import get_db
 
 
@@ -16,13 +20,16 @@ router = APIRouter(prefix="/teacher", tags=["Teachers"])
 
 
 @router.get("/me", response_model=schemas.UserOut)
-def get_me(current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
+def get_me(
+    current_user: models.User = Depends(get_current_user),
+    teacher: Optional[TeacherContext] = Depends(resolve_teacher_context),
+):
     level = current_user.level
     department = current_user.department
 
     teacher_profile = None
     if current_user.role == "teacher":
-        teacher_profile = db.query(models.TeacherProfile).filter_by(user_id=current_user.id).first()
+        teacher_profile = teacher.profile if teacher else None
         if teacher_profile:
             level = teacher_profile.level
             department = teacher_profile.department
@@ -44,14 +51,13 @@ def get_me(current_user: models.User = Depends(get_current_user), db: Session =
 
 # ---------------------- Helpers ---------------------- #
 
-def require_teacher(user: models.User = Depends(get_current_teacher_user)):
-    return user
+def require_teacher(teacher: TeacherContext = Depends(get_teacher_context)) -> models.User:
+    return teacher.user
 
-def get_teacher_profile_data(db: Session, teacher_id: int) -> models.TeacherProfile:
-    profile = db.query(models.TeacherProfile).filter_by(user_id=teacher_id).first()
-    if not profile or not profile.level or not profile.department:
+def get_teacher_profile_data(teacher: TeacherContext = Depends(get_teacher_context)) -> models.TeacherProfile:
+    if not teacher.has_class:
         raise HTTPException(status_code=403, detail="You are not assigned to any class")
-    return profile
+    return teacher.profile
 
 
 # ---------------------- Routes ---------------------- #
@@ -71,19 +77,19 @@ from ..schemas import SubjectOut
 @router.get("/subjects", response_model=List[SubjectOut])
 def get_teacher_subjects(
     current_user: User = Depends(get_current_user),
+    teacher: Optional[TeacherContext] = Depends(resolve_teacher_context),
     db: Session = Depends(get_db)
 ):
     if current_user.role != "teacher":
         raise HTTPException(status_code=403, detail="Not authorized")
 
-    teacher_profile = db.query(TeacherProfile).filter(TeacherProfile.user_id == current_user.id).first()
-    if not teacher_profile:
+    if not teacher:
         raise HTTPException(status_code=404, detail="Teacher profile not found")
 
-    teacher_subjects = db.query(TeacherSubject).filter(TeacherSubject.teacher_id == current_user.id).all()
-    subject_ids = [ts.subject_id for ts in teacher_subjects]
+    if not teacher.subject_ids:
+        return []
 
-    subjects = db.query(Subject).filter(Subject.id.in_(subject_ids)).all()
+    subjects = db.query(Subject).filter(Subject.id.in_(teacher.subject_ids)).all()
     return subjects  # ✅ Returns full subject data as SubjectOut
 
 
@@ -94,6 +100,7 @@ def get_teacher_subjects(
 @router.get("/students/my-class", response_model=List[UserOut])
 def get_students_for_teacher(
     current_user: models.User = Depends(get_current_user),
+    teacher_context: Optional[TeacherContext] = Depends(resolve_teacher_context),
     db: Session = Depends(get_db)
 ):
     print("🧑‍🏫 Current user ID:", current_user.id)
@@ -103,7 +110,7 @@ def get_students_for_teacher(
         print("⛔ Not a teacher!")
         raise HTTPException(status_code=403, detail="Not authorized")
 
-    teacher = db.query(models.TeacherProfile).filter_by(user_id=current_user.id).first()
+    teacher = teacher_context.profile if teacher_context else None
     print("🔍 Teacher profile found:", teacher is not None)
 
     if not teacher or not teacher.level:
@@ -179,10 +186,10 @@ def get_summary_by_date(
 @router.get("/attendance/summary")
 def get_attendance_summary_for_class(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    teacher: Optional[TeacherContext] = Depends(resolve_teacher_context)
 ):
     # 1. Confirm teacher profile
-    teacher_profile = db.query(models.TeacherProfile).filter_by(user_id=current_user.id).first()
+    teacher_profile = teacher.profile if teacher else None
     if not teacher_profile or not teacher_profile.level:
         raise HTTPException(status_code=403, detail="You are not assigned to any class.")
 
@@ -226,8 +233,7 @@ def get_attendance_summary_for_class(
 
 
 @router.get("/attendance/{student_id}", response_model=List[schemas.AttendanceOut])
-def view_student_attendance(student_id: int, db: Session = Depends(get_db), current_user: models.User = Depends(require_teacher)):
-    profile = get_teacher_profile_data(db, current_user.id)
+def view_student_attendance(student_id: int, db: Session = Depends(get_db), profile: models.TeacherProfile = Depends(get_teacher_profile_data)):
     student = db.query(models.User).filter(
         models.User.id == student_id,
         func.lower(models.User.level) == profile.level.lower(),
@@ -254,10 +260,7 @@ def get_teacher_resources(
     print("🔐 Authenticated User ID:", current_user.id)
 
     # Now this matches correctly because teacher_subjects.teacher_id uses user.id
-    subject_ids = db.query(models.TeacherSubject.subject_id).filter(
-        models.TeacherSubject.teacher_id == current_user.id
-    ).all()
-    subject_ids = [sid[0] for sid in subject_ids]
+    subject_ids = list(get_teacher_subject_ids(db, current_user.id))
     print("📘 Assigned subject IDs:", subject_ids)
 
     if not subject_ids:
@@ -288,30 +291,22 @@ def get_teacher_resources(
 def get_teacher_topics(
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
+    teacher: Optional[TeacherContext] = Depends(resolve_teacher_context),
 ):
     if current_user.role != "teacher":
         raise HTTPException(status_code=403, detail="Access forbidden: Not a teacher")
 
     # Optional: Validate the teacher profile exists
-    teacher_profile = (
-        db.query(models.TeacherProfile)
-        .filter(models.TeacherProfile.user_id == current_user.id)
-        .first()
-    )
-    if not teacher_profile:
+    if not teacher:
         raise HTTPException(status_code=404, detail="Teacher profile not found")
 
-    # ✅ Corrected this line
-    teacher_subjects = (
-        db.query(models.TeacherSubject.subject_id)
-        .filter(models.TeacherSubject.teacher_id == current_user.id)
-        .subquery()
-    )
+    if not teacher.subject_ids:
+        return []
 
     # ✅ Fetch topics
     topics = (
         db.query(models.Topic)
-        .filter(models.Topic.subject_id.in_(teacher_subjects))
+        .filter(models.Topic.subject_id.in_(teacher.subject_ids))
         .all()
     )
 
@@ -336,6 +331,7 @@ def assign_class_to_teacher(data: schemas.TeacherClassAssign, db: Session = Depe
         profile = models.TeacherProfile(user_id=data.teacher_id, level=data.level, department=department)
         db.add(profile)
     db.commit()
+    invalidate_teacher(data.teacher_id)
     db.refresh(profile)
     return {"message": "Class assigned successfully", "profile_id": profile.id}
 
@@ -422,6 +418,7 @@ def get_students_by_assigned_subjects(
 
 
 @router.get("/subjects-with-students-progress", response_model=List[schemas.TeacherSubjectWithProgress])
+@query_budget(25)
 def get_subjects_with_students_and_progress(
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
@@ -464,23 +461,27 @@ def get_subjects_with_students_and_progress(
 
         print(f"🎓 Found {len(students)} students for subject '{subject.name}'")
 
-        student_progress_list = []
-
-        for student in students:
-            topic_progress = db.query(
+        # One grouped query for the whole class instead of one per student
+        topic_progress = defaultdict(list)
+        if students:
+            rows = db.query(
+                models.ProgressTracking.user_id,
                 models.Topic.title.label("topic_title"),
                 func.sum(models.ProgressTracking.score).label("total_score"),
                 func.sum(models.ProgressTracking.total_questions).label("total_questions")
             ).join(
                 models.Topic, models.ProgressTracking.topic_id == models.Topic.id
             ).filter(
-                models.ProgressTracking.user_id == student.id,
+                models.ProgressTracking.user_id.in_([student.id for student in students]),
                 models.Topic.subject_id == subject.id  # ✅ Match by FK, not name
             ).group_by(
-                models.Topic.title
+                models.ProgressTracking.user_id, models.Topic.title
             ).all()
+            for row in rows:
+                topic_progress[row.user_id].append(row)
 
-            student_progress_list.append({
+        student_progress_list = [
+            {
                 "user_id": student.id,
                 "full_name": student.full_name,
                 "username": student.username,
@@ -490,9 +491,11 @@ def get_subjects_with_students_and_progress(
                         "total_score": float(tp.total_score or 0),
                         "total_questions": int(tp.total_questions or 0)
                     }
-                    for tp in topic_progress
+                    for tp in topic_progress[student.id]
                 ]
-            })
+            }
+            for student in students
+        ]
 
         results.append({
             "subject_name": subject.name,
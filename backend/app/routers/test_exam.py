@@ -6,6 +6,7 @@ import random
 from math import ceil
 
 from .. import models, schemas
+from ..models import normalized
 from ..database import get_db
 from ..auth import get_current_user
 
@@ -63,13 +64,21 @@ def get_test_by_query(subject: str, level: str, test_type: str, db: Session = De
 
 # -------------------- Question Logic --------------------
 
+def get_answered_question_ids(db: Session, user_id: int, question_ids: List[int]) -> set:
+    # Only the candidate questions, so the (user_id, question_id) index answers it
+    rows = db.query(models.UserAnswer.question_id).filter(
+        models.UserAnswer.user_id == user_id,
+        models.UserAnswer.question_id.in_(question_ids)
+    ).all()
+    return {qid for (qid,) in rows}
+
 def get_test_questions(db: Session, level: str, subject: str, start_week: int, end_week: int, user_id: int):
     normalized_level = level.strip().lower()
     normalized_subject = subject.replace("-", " ").strip().lower()
 
     topics = db.query(models.Topic).join(models.Subject).filter(
-        func.lower(models.Topic.level) == normalized_level,
-        func.lower(models.Subject.name) == normalized_subject,
+        normalized(models.Subject.name) == normalized_subject,
+        normalized(models.Topic.level) == normalized_level,
         models.Topic.week_number >= start_week,
         models.Topic.week_number <= end_week
     ).all()
@@ -92,8 +101,7 @@ def get_test_questions(db: Session, level: str, subject: str, start_week: int, e
             detail=f"No test questions found for {subject} ({level}) between weeks {start_week}-{end_week}"
         )
 
-    answered_ids = db.query(models.UserAnswer.question_id).filter_by(user_id=user_id).all()
-    answered_id_set = {qid for (qid,) in answered_ids}
+    answered_id_set = get_answered_question_ids(db, user_id, [q.id for q in all_questions])
 
     unanswered_questions = [q for q in all_questions if q.id not in answered_id_set]
 
@@ -113,8 +121,8 @@ def get_exam_questions_logic(db: Session, level: str, subject: str, user_id: int
     normalized_subject = subject.replace("-", " ").strip().lower()
 
     topics = db.query(models.Topic).join(models.Subject).filter(
-        func.lower(models.Topic.level) == normalized_level,
-        func.lower(models.Subject.name) == normalized_subject,
+        normalized(models.Subject.name) == normalized_subject,
+        normalized(models.Topic.level) == normalized_level,
         models.Topic.week_number >= 1,
         models.Topic.week_number <= 13
     ).all()
@@ -137,8 +145,7 @@ def get_exam_questions_logic(db: Session, level: str, subject: str, user_id: int
             detail=f"No exam questions found for {subject} ({level}) weeks 1–13"
         )
 
-    answered_ids = db.query(models.UserAnswer.question_id).filter_by(user_id=user_id).all()
-    answered_id_set = {qid for (qid,) in answered_ids}
+    answered_id_set = get_answered_question_ids(db, user_id, [q.id for q in all_questions])
 
     unanswered_questions = [q for q in all_questions if q.id not in answered_id_set]
 
@@ -1,11 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, or_, select
 from typing import List, Optional
 from datetime import datetime
 
 from .. import models, schemas
-from ..database import get_db
+from ..models import normalized
+from ..database import get_db, get_async_db
 from ..dependencies import get_current_user, get_current_admin_user, get_db
 
 router = APIRouter(
@@ -14,42 +16,46 @@ router = APIRouter(
 )
 
 
-@router.get("/today", response_model=List[schemas.TimetableOut])
-def get_today_timetable(
-    db: Session = Depends(get_db),
-    user: models.User = Depends(get_current_user)
-):
-    today_day = datetime.today().strftime('%A').strip().lower()
-    user_level = (user.level or "").strip().lower()
-    user_department = (user.department or "").strip().lower()
-
-    if not user_level:
-        raise HTTPException(status_code=400, detail="User level not found")
-
+def today_timetable_query(day: str, user_level: str, user_department: str):
     filters = [
-        func.lower(func.trim(models.Timetable.day)) == today_day,
-        func.lower(func.trim(models.Timetable.level)) == user_level,
+        normalized(models.Timetable.level) == user_level,
+        normalized(models.Timetable.day) == day,
     ]
 
     # Only filter by department if senior and department is set
     if user_level.startswith("ss") and user_department:
         filters.append(
             or_(
-                func.lower(func.trim(models.Timetable.department)) == user_department,
+                normalized(models.Timetable.department) == user_department,
                 func.length(func.trim(models.Timetable.department)) == 0,
                 models.Timetable.department == None
             )
         )
     # ✅ JSS will not be filtered by department at all
 
-    timetables = (
-        db.query(models.Timetable)
+    return (
+        select(models.Timetable)
         .options(joinedload(models.Timetable.subject_rel))
-        .filter(*filters)
+        .where(*filters)
         .order_by(models.Timetable.period)
-        .all()
     )
 
+
+@router.get("/today", response_model=List[schemas.TimetableOut])
+async def get_today_timetable(
+    db: AsyncSession = Depends(get_async_db),
+    user: models.User = Depends(get_current_user)
+):
+    today_day = datetime.today().strftime('%A').strip().lower()
+    user_level = (user.level or "").strip().lower()
+    user_department = (user.department or "").strip().lower()
+
+    if not user_level:
+        raise HTTPException(status_code=400, detail="User level not found")
+
+    result = await db.execute(today_timetable_query(today_day, user_level, user_department))
+    timetables = result.scalars().all()
+
     return [
         schemas.TimetableOut(
             id=t.id,
@@ -185,7 +191,7 @@ def get_timetable_for_user(
         db.query(models.Timetable)
         .options(joinedload(models.Timetable.subject_rel))
         .filter(
-            func.lower(func.trim(models.Timetable.level)) == user_level
+            normalized(models.Timetable.level) == user_level
         )
     )
 
@@ -193,7 +199,7 @@ def get_timetable_for_user(
     if user_level.startswith("ss") and user_dept:
         query = query.filter(
             or_(
-                func.lower(func.trim(models.Timetable.department)) == user_dept,
+                normalized(models.Timetable.department) == user_dept,
                 models.Timetable.department == None,
                 func.length(func.trim(models.Timetable.department)) == 0,
             )
@@ -228,7 +234,7 @@ def create_timetable(
     db: Session = Depends(get_db),
     user=Depends(get_current_admin_user)
 ):
-    subject = db.query(models.Subject).filter(func.lower(models.Subject.name) == timetable.subject.lower()).first()
+    subject = db.query(models.Subject).filter(normalized(models.Subject.name) == timetable.subject.strip().lower()).first()
     if not subject:
         raise HTTPException(status_code=404, detail=f"Subject '{timetable.subject}' not found")
 
@@ -272,7 +278,7 @@ def update_timetable(
     if not entry:
         raise HTTPException(status_code=404, detail="Timetable not found")
 
-    subject = db.query(models.Subject).filter(func.lower(models.Subject.name) == updated.subject.lower()).first()
+    subject = db.query(models.Subject).filter(normalized(models.Subject.name) == updated.subject.strip().lower()).first()
     if not subject:
         raise HTTPException(status_code=404, detail=f"Subject '{updated.subject}' not found")
 
@@ -0,0 +1,85 @@
+# app/schema_upgrades.py
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.schema import CreateIndex
+
+from .models import QUERY_INDEXES
+
+# create_all() only creates missing tables, so columns (and QUERY_INDEXES) added to existing
+# models are applied here. Each entry must be additive and idempotent.
+ADDED_COLUMNS = [
+    # (table, column, DDL type/default)
+    ("users", "token_version", "INTEGER NOT NULL DEFAULT 0"),
+]
+
+
+def migrate(engine: Engine) -> None:
+    """Create missing tables, then apply ADDED_COLUMNS and QUERY_INDEXES."""
+    from .database import Base
+    from .models import StudentDailyScore, StudentSubjectScore, StudentTopicScore
+
+    inspector = inspect(engine)
+    rollups_missing = not all(
+        inspector.has_table(model.__tablename__)
+        for model in (StudentSubjectScore, StudentTopicScore, StudentDailyScore)
+    )
+
+    Base.metadata.create_all(bind=engine)
+    upgrade_schema(engine)
+
+    if rollups_missing:
+        backfill_score_rollups(engine)
+
+
+def backfill_score_rollups(engine: Engine) -> None:
+    # Rollup tables start empty on databases that already hold attempts
+    from sqlalchemy.orm import Session
+    from .services.score_rollups import rebuild
+
+    with Session(engine) as db:
+        counts = rebuild(db)
+    print(f"✅ Backfilled score rollups: {counts['topic_rows']} topic rows, {counts['subject_rows']} subject rows, "
+          f"{counts['daily_rows']} daily rows")
+
+
+def upgrade_schema(engine: Engine) -> None:
+    inspector = inspect(engine)
+
+    with engine.begin() as conn:
+        for table, column, ddl in ADDED_COLUMNS:
+            if not inspector.has_table(table):
+                continue
+            existing = {c["name"] for c in inspector.get_columns(table)}
+            if column in existing:
+                continue
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+            print(f"✅ Added column {table}.{column}")
+
+    create_query_indexes(engine)
+
+
+def create_query_indexes(engine: Engine) -> None:
+    inspector = inspect(engine)
+    for index in QUERY_INDEXES:
+        table = index.table.name
+        if not inspector.has_table(table):
+            continue
+        # Reflection skips expression indexes on some backends, so let the
+        # database decide whether the index already exists.
+        try:
+            with engine.begin() as conn:
+                conn.execute(CreateIndex(index, if_not_exists=True))
+        except IntegrityError as e:
+            # Unique indexes can't be built over existing duplicates; leave the
+            # data alone and report it so it can be cleaned up by hand.
+            print(f"⚠️ Skipped unique index {index.name}: duplicate rows in {table} ({e.orig})")
+
+
+if __name__ == "__main__":
+    # Deploy step: python -m app.schema_upgrades
+    from .database import engine
+
+    migrate(engine)
+    print("✅ Schema up to date")
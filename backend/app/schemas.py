@@ -385,6 +385,19 @@ class WeeklyProgressOut(BaseModel):
         from_attributes = True
 
 
+class ProgressBucketOut(BaseModel):
+    label: str  # 2025-06-09 | 2025-W24 | 2025-06 | Week 3
+    start: date
+    attempts: int
+    total_score: float
+    total_questions: int
+    average_score: float
+
+    class Config:
+        orm_mode = True
+        from_attributes = True
+
+
 class TopicProgress(BaseModel):
     topic_title: str
     total_score: float
@@ -432,30 +445,35 @@ class TopicQuestionOut(TopicQuestionBase):
 
 # -------------------- Admin Analytics Schemas --------------------
 
-class SubjectAverage(BaseModel):
-    subject: str
-    avg_score: float
+# Admin analytics are returned column-wise (one array per field) to keep
+# large pages small on the wire and cheap to serialize.
 
+class SubjectAverageColumns(BaseModel):
+    subject: List[str] = []
+    avg_score: List[float] = []
 
-class StudentTopicScore(BaseModel):
-    user_id: int
-    username: str
-    topic: str
-    subject: str
-    total_score: int
-    total_questions: int
 
+class StudentTopicScoreColumns(BaseModel):
+    user_id: List[int] = []
+    username: List[str] = []
+    topic: List[str] = []
+    subject: List[str] = []
+    total_score: List[float] = []
+    total_questions: List[int] = []
 
-class DailyProgress(BaseModel):
-    day: date
-    total_score: int
-    total_questions: int
+
+class DailyProgressColumns(BaseModel):
+    day: List[date] = []
+    total_score: List[int] = []
+    total_questions: List[int] = []
 
 
 class AdminAnalyticsResponse(BaseModel):
-    subject_average: List[SubjectAverage]
-    student_topic_scores: List[StudentTopicScore]
-    daily_progress: List[DailyProgress]
+    # Chart summaries come with the first page only (no cursor)
+    subject_average: Optional[SubjectAverageColumns] = None
+    daily_progress: Optional[DailyProgressColumns] = None
+    student_topic_scores: StudentTopicScoreColumns
+    next_cursor: Optional[str] = None
 
 
 # -------------------- Timetable Schemas --------------------
@@ -1262,6 +1280,17 @@ class ParentChildAssociationUpdate(BaseModel):
     approved: bool
 
 
+class ChildOverviewOut(BaseModel):
+    child_id: int
+    full_name: Optional[str] = None
+    level: Optional[str] = None
+    performance: List[ProgressOut] = []
+    daily_progress: List[DailyProgressOut] = []
+    subject_performance: List[SubjectPerformanceOut] = []
+    attendance: List[AttendanceOut] = []
+    report_card: Optional[ReportPreviewOut] = None  # only when term and year are given and a report exists
+
+
 # -------------------- MeResponse Type Union --------------------
 # You might want to define a specific ParentUserOut if they have distinct fields on their profile
 class ParentUserOut(UserOut): # Inherit from UserOut and add parent-specific relationships
@@ -0,0 +1,165 @@
+# app/services/activity_tracker.py
+
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import bindparam, func, insert, update
+
+from ..config import ACTIVITY_FLUSH_INTERVAL_SECONDS, ACTIVITY_RECENT_WINDOW_SECONDS
+from ..database import SessionLocal
+from ..models import User, LoginActivity
+
+# user_id -> {"last_login": datetime | None, "last_active": datetime}
+# Coalesced: a user has at most one pending update however often they hit the API.
+_pending: Dict[int, Dict[str, Optional[datetime]]] = {}
+# (user_id, timestamp) rows waiting to be inserted into login_activities
+_pending_logins: List[Tuple[int, datetime]] = []
+
+# Rolling windows kept after flushing so dashboards can read them without
+# touching the users table. These reflect traffic seen by this worker.
+_recent_logins: Dict[int, datetime] = {}
+_recent_active: Dict[int, datetime] = {}
+
+_lock = threading.Lock()
+
+_stop_event = threading.Event()
+_flusher: Optional[threading.Thread] = None
+
+
+def record_activity(user_id: int, when: Optional[datetime] = None) -> None:
+    """Buffer an activity timestamp for a user. No database work happens here."""
+    when = when or datetime.utcnow()
+    with _lock:
+        _merge_pending(user_id, None, when)
+        _bump(_recent_active, user_id, when)
+
+
+def record_login(user_id: int, when: Optional[datetime] = None) -> None:
+    """Buffer a successful login: last_login, last_active and a LoginActivity row."""
+    when = when or datetime.utcnow()
+    with _lock:
+        _merge_pending(user_id, when, when)
+        _pending_logins.append((user_id, when))
+        _bump(_recent_logins, user_id, when)
+        _bump(_recent_active, user_id, when)
+
+
+def recent_logins(since: datetime) -> Dict[int, datetime]:
+    """user_id -> last login for logins at or after `since`."""
+    with _lock:
+        return _window(_recent_logins, since)
+
+
+def recent_activity(since: datetime) -> Dict[int, datetime]:
+    """user_id -> last activity for users active at or after `since`."""
+    with _lock:
+        return _window(_recent_active, since)
+
+
+def flush() -> int:
+    """
+    Apply the buffer with one bulk UPDATE on users and one bulk INSERT into
+    login_activities. Returns the number of users updated.
+    """
+    global _pending, _pending_logins
+
+    with _lock:
+        batch, _pending = _pending, {}
+        logins, _pending_logins = _pending_logins, []
+
+    if not batch and not logins:
+        return 0
+
+    users = User.__table__
+    # Core executemany: rows for users deleted in the meantime are simply skipped.
+    # COALESCE keeps last_login untouched for activity-only entries.
+    update_stmt = (
+        update(users)
+        .where(users.c.id == bindparam("b_user_id"))
+        .values(
+            last_login=func.coalesce(bindparam("b_login", type_=users.c.last_login.type), users.c.last_login),
+            last_active=bindparam("b_active"),
+        )
+    )
+    update_rows = [
+        {"b_user_id": user_id, "b_login": entry["last_login"], "b_active": entry["last_active"]}
+        for user_id, entry in batch.items()
+    ]
+    login_rows = [{"user_id": user_id, "timestamp": ts} for user_id, ts in logins]
+
+    db = SessionLocal()
+    try:
+        if update_rows:
+            db.execute(update_stmt, update_rows)
+        if login_rows:
+            db.execute(insert(LoginActivity.__table__), login_rows)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Activity flush failed, re-queueing {len(batch)} users: {e}")
+        with _lock:
+            for user_id, entry in batch.items():
+                _merge_pending(user_id, entry["last_login"], entry["last_active"])
+            _pending_logins[:0] = logins
+        return 0
+    finally:
+        db.close()
+
+    return len(update_rows)
+
+
+def start_flusher() -> None:
+    global _flusher
+    if _flusher and _flusher.is_alive():
+        return
+    _stop_event.clear()
+    _flusher = threading.Thread(target=_run_flusher, name="activity-flusher", daemon=True)
+    _flusher.start()
+
+
+def stop_flusher() -> None:
+    """Stop the background flusher and drain whatever is still buffered."""
+    _stop_event.set()
+    if _flusher and _flusher.is_alive():
+        _flusher.join(timeout=ACTIVITY_FLUSH_INTERVAL_SECONDS)
+    flush()
+
+
+# -------------------- Internals --------------------
+
+def _run_flusher() -> None:
+    while not _stop_event.wait(ACTIVITY_FLUSH_INTERVAL_SECONDS):
+        flush()
+        _prune(datetime.utcnow() - timedelta(seconds=ACTIVITY_RECENT_WINDOW_SECONDS))
+
+
+def _merge_pending(user_id: int, last_login: Optional[datetime], last_active: datetime) -> None:
+    # Caller holds _lock.
+    entry = _pending.get(user_id)
+    if entry is None:
+        _pending[user_id] = {"last_login": last_login, "last_active": last_active}
+        return
+    if last_login and (entry["last_login"] is None or last_login > entry["last_login"]):
+        entry["last_login"] = last_login
+    if last_active > entry["last_active"]:
+        entry["last_active"] = last_active
+
+
+def _bump(window: Dict[int, datetime], user_id: int, when: datetime) -> None:
+    # Caller holds _lock.
+    previous = window.get(user_id)
+    if previous is None or when > previous:
+        window[user_id] = when
+
+
+def _window(window: Dict[int, datetime], since: datetime) -> Dict[int, datetime]:
+    # Caller holds _lock.
+    return {user_id: ts for user_id, ts in window.items() if ts >= since}
+
+
+def _prune(cutoff: datetime) -> None:
+    with _lock:
+        for window in (_recent_logins, _recent_active):
+            for user_id in [uid for uid, ts in window.items() if ts < cutoff]:
+                del window[user_id]
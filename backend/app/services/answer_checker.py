@@ -1,53 +1,198 @@
 # app/services/answer_checker.py
 
+import hashlib
 import os
-import requests
+import threading
+from typing import List, Optional, Sequence, Tuple
+
+from ..config import EMBEDDING_BACKEND, EMBEDDING_BATCH_SIZE, SENTENCE_MODEL_PATH
 
 SIMILARITY_THRESHOLD = 0.7  # Fully correct if ≥ 0.7
 ALMOST_THRESHOLD = 0.5      # Considered "almost correct" if between 0.5 and 0.7
 
-# Choose embedding model (can be OpenAI, Together, or HuggingFace Inference API)
+# Remote fallback (OpenAI embeddings API)
 EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
-def get_embedding(text: str):
+# -------------------- Local model (loaded once per worker) --------------------
+_model = None
+_model_version: Optional[str] = None
+_model_error: Optional[str] = None
+_model_lock = threading.Lock()
+
+WEIGHT_FILES = ("model.safetensors", "pytorch_model.bin")
+
+
+def _local_model_version(path: str) -> str:
+    """'local:<sha1>' over the model's config and weights, so a swapped model gets a new version."""
+    digest = hashlib.sha1()
+    for name in ("modules.json", "config.json", "1_Pooling/config.json") + WEIGHT_FILES:
+        file_path = os.path.join(path, name)
+        if not os.path.exists(file_path):
+            continue
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return f"local:{digest.hexdigest()[:16]}"
+
+
+def get_local_model():
     """
-    Get embedding via OpenAI API (or any other API you configure).
+    The bundled sentence-transformers model, loaded on first use. Returns None
+    (and remembers why) if it can't be loaded, so callers fall back to the API
+    instead of retrying the load on every answer.
     """
+    global _model, _model_version, _model_error
+
+    if _model is None and _model_error is None:
+        with _model_lock:
+            if _model is None and _model_error is None:
+                try:
+                    from sentence_transformers import SentenceTransformer
+
+                    _model = SentenceTransformer(SENTENCE_MODEL_PATH, device="cpu")
+                    _model_version = _local_model_version(SENTENCE_MODEL_PATH)
+                    print(f"✅ Loaded sentence model from {SENTENCE_MODEL_PATH}")
+                except Exception as e:
+                    _model_error = str(e)
+                    print(f"⚠️ Sentence model unavailable ({e}); using the {EMBEDDING_MODEL} API")
+    return _model
+
+
+def _local_embeddings(texts: List[str]):
+    model = get_local_model()
+    if model is None:
+        return None
+    # The model's Normalize step is repeated here so vectors are unit length either way
+    return model.encode(texts, batch_size=EMBEDDING_BATCH_SIZE, normalize_embeddings=True,
+                        convert_to_numpy=True, show_progress_bar=False)
+
+
+def _remote_embeddings(texts: List[str]):
+    """One API request per EMBEDDING_BATCH_SIZE texts (the endpoint takes a list)."""
+    import requests
+
     headers = {"Authorization": f"Bearer {OPENAI_API_KEY}"}
-    response = requests.post(
-        "https://api.openai.com/v1/embeddings",
-        headers=headers,
-        json={"input": text, "model": EMBEDDING_MODEL},
-        timeout=10
-    )
-    response.raise_for_status()
-    return response.json()["data"][0]["embedding"]
+    vectors = []
+    for start in range(0, len(texts), EMBEDDING_BATCH_SIZE):
+        response = requests.post(
+            "https://api.openai.com/v1/embeddings",
+            headers=headers,
+            json={"input": texts[start:start + EMBEDDING_BATCH_SIZE], "model": EMBEDDING_MODEL},
+            timeout=10
+        )
+        response.raise_for_status()
+        data = sorted(response.json()["data"], key=lambda item: item["index"])
+        vectors.extend(item["embedding"] for item in data)
+    return vectors
+
+
+def embedding_model_version() -> str:
+    """
+    Tag for the model embed_texts() will use, stored next to precomputed
+    vectors: vectors from different versions must not be compared.
+    """
+    if EMBEDDING_BACKEND == "local" and get_local_model() is not None:
+        return _model_version
+    return f"openai:{EMBEDDING_MODEL}"
+
+
+def embed_texts_versioned(texts: List[str]):
+    """(vectors, model version) for `texts`: the local model when configured and loadable, else the API."""
+    if EMBEDDING_BACKEND == "local":
+        try:
+            vectors = _local_embeddings(texts) if texts else None
+            if vectors is not None:
+                return vectors, _model_version
+        except Exception as e:
+            print(f"⚠️ Local embedding failed ({e}); retrying via the API")
+    return (_remote_embeddings(texts) if texts else []), f"openai:{EMBEDDING_MODEL}"
+
+
+def embed_texts(texts: List[str]):
+    """Embeddings for `texts`, in order."""
+    return embed_texts_versioned(texts)[0]
+
+
+def get_embedding(text: str):
+    return embed_texts([text])[0]
+
+
+def normalize_answer(text: Optional[str]) -> str:
+    """The form answers are embedded in (precomputed reference vectors use it too)."""
+    return (text or "").strip().lower()
+
 
 def cosine_similarity(vec1, vec2):
     import numpy as np
     vec1, vec2 = np.array(vec1), np.array(vec2)
     return float(np.dot(vec1, vec2) / (np.linalg.norm(vec1) * np.linalg.norm(vec2)))
 
-def check_answer(user_answer: str, correct_answer: str):
-    user_answer = user_answer.strip().lower()
-    correct_answer = correct_answer.strip().lower()
-
-    if not user_answer:
-        return False, "Answer cannot be empty.", 0.0
-
-    # Get embeddings via API
-    try:
-        user_vec = get_embedding(user_answer)
-        correct_vec = get_embedding(correct_answer)
-        similarity = cosine_similarity(user_vec, correct_vec)
-    except Exception as e:
-        return False, f"Error checking answer: {str(e)}", 0.0
 
-    # Categorize by threshold
+# -------------------- Grading --------------------
+def _verdict(similarity: float, correct_answer: str):
     if similarity >= SIMILARITY_THRESHOLD:
         return True, None, similarity
     elif similarity >= ALMOST_THRESHOLD:
         return False, f"Almost correct. Correct answer: {correct_answer}", similarity
     else:
         return False, f"Incorrect. Correct answer: {correct_answer}", similarity
+
+
+def _unit_rows(vectors):
+    import numpy as np
+
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+
+def check_answers(pairs: Sequence[Tuple[str, str]], reference_vectors=None, reference_version: Optional[str] = None):
+    """
+    Batch version of check_answer: [(user_answer, correct_answer), ...] →
+    [(is_correct, correction, similarity), ...]. Every distinct text is
+    embedded in one call and the similarities come from one matrix product.
+
+    reference_vectors (one per pair, None where unknown) are precomputed
+    embeddings of the correct answers; they are used when reference_version
+    matches the model that embedded the student answers, so only the
+    student answers are embedded.
+    """
+    import numpy as np
+
+    cleaned = [(normalize_answer(user), normalize_answer(correct)) for user, correct in pairs]
+    results = [(False, "Answer cannot be empty.", 0.0) if not user else None for user, _ in cleaned]
+    pending = [i for i, result in enumerate(results) if result is None]
+    if not pending:
+        return results
+
+    known = {i for i in pending if reference_vectors is not None and reference_vectors[i] is not None}
+    try:
+        texts = list(dict.fromkeys(
+            [cleaned[i][0] for i in pending] + [cleaned[i][1] for i in pending if i not in known]
+        ))
+        vectors, version = embed_texts_versioned(texts)
+        if known and version != reference_version:
+            # Fell back to another model mid-flight: the stored references don't apply
+            known = set()
+            texts = list(dict.fromkeys(text for i in pending for text in cleaned[i]))
+            vectors, version = embed_texts_versioned(texts)
+        vectors = _unit_rows(vectors)
+        position = {text: n for n, text in enumerate(texts)}
+        users = vectors[[position[cleaned[i][0]] for i in pending]]
+        corrects = _unit_rows([
+            reference_vectors[i] if i in known else vectors[position[cleaned[i][1]]] for i in pending
+        ])
+        similarities = np.einsum("ij,ij->i", users, corrects)
+    except Exception as e:
+        for i in pending:
+            results[i] = (False, f"Error checking answer: {str(e)}", 0.0)
+        return results
+
+    for i, similarity in zip(pending, similarities):
+        results[i] = _verdict(float(similarity), cleaned[i][1])
+    return results
+
+
+def check_answer(user_answer: str, correct_answer: str, reference_vector=None, reference_version: Optional[str] = None):
+    references = [reference_vector] if reference_vector is not None else None
+    return check_answers([(user_answer, correct_answer)], references, reference_version)[0]
@@ -0,0 +1,75 @@
+# app/services/csv_export.py
+
+import csv
+import io
+import zlib
+from datetime import date, datetime
+from typing import Iterator, List
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy.sql import Select
+
+from ..database import open_read_session
+
+EXPORT_BATCH_SIZE = 1000
+
+
+def _cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def iter_csv(statement: Select, header: List[str], batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[bytes]:
+    """
+    CSV bytes for `statement`, one chunk per batch of rows. Rows are fetched
+    through a server-side cursor (yield_per), so only one batch is held in
+    memory at a time.
+
+    Runs on its own read session: the request's session is already closed
+    by the time a StreamingResponse body is iterated.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+
+    db = open_read_session()
+    try:
+        result = db.execute(statement.execution_options(yield_per=batch_size))
+        for rows in result.partitions():
+            for row in rows:
+                writer.writerow([_cell(value) for value in row])
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    finally:
+        db.close()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def gzip_chunks(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    """Gzip a byte stream chunk by chunk."""
+    compressor = zlib.compressobj(wbits=31)  # 31 = gzip container
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def csv_export_response(statement: Select, header: List[str], filename: str, gzip: bool = False) -> StreamingResponse:
+    """StreamingResponse downloading `statement` as `filename`.csv (or .csv.gz)."""
+    chunks = iter_csv(statement, header)
+    if gzip:
+        return StreamingResponse(gzip_chunks(chunks), media_type="application/gzip", headers={
+            "Content-Disposition": f"attachment; filename={filename}.csv.gz"
+        })
+    return StreamingResponse(chunks, media_type="text/csv", headers={
+        "Content-Disposition": f"attachment; filename={filename}.csv"
+    })
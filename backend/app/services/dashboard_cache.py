@@ -0,0 +1,109 @@
+# app/services/dashboard_cache.py
+
+import threading
+import time
+from typing import Callable, Dict, Hashable, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from ..config import DASHBOARD_CACHE_TTL_SECONDS
+from ..models import Assignment, ScheduledEvent, Subject, Timetable, Topic
+
+# Tables the class segment is built from; any committed change to them drops every segment
+TRACKED_MODELS = (Timetable, Topic, Assignment, ScheduledEvent, Subject)
+TRACKED_TABLES = {model.__tablename__ for model in TRACKED_MODELS}
+
+# (level, department, date, academic week) -> (expires_at, segment)
+_segments: Dict[Hashable, Tuple[float, object]] = {}
+# Per-key build locks, so a class loading the dashboard at once builds its segment once
+_building: Dict[Hashable, threading.Lock] = {}
+_lock = threading.Lock()
+# Bumped on invalidation; a build that started before it is not stored
+_generation = 0
+_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+
+def get_class_segment(key: Hashable, build: Callable[[], object]):
+    """
+    Shared class segment for `key`, built with `build()` when this worker has
+    no fresh copy. Concurrent callers for the same key wait for one build.
+
+    Segments are per worker; other workers pick up changes on their next
+    commit-triggered invalidation or after DASHBOARD_CACHE_TTL_SECONDS.
+    """
+    now = time.monotonic()
+    with _lock:
+        entry = _segments.get(key)
+        if entry and entry[0] > now:
+            _stats["hits"] += 1
+            return entry[1]
+        key_lock = _building.setdefault(key, threading.Lock())
+
+    with key_lock:
+        # Another request may have built it while we waited
+        with _lock:
+            entry = _segments.get(key)
+            if entry and entry[0] > time.monotonic():
+                _stats["hits"] += 1
+                return entry[1]
+            _stats["misses"] += 1
+            generation = _generation
+
+        segment = build()
+
+        with _lock:
+            if generation == _generation:
+                _segments[key] = (time.monotonic() + DASHBOARD_CACHE_TTL_SECONDS, segment)
+            _building.pop(key, None)
+        return segment
+
+
+def invalidate_class_segments() -> None:
+    global _generation
+    with _lock:
+        _segments.clear()
+        _generation += 1
+        _stats["invalidations"] += 1
+
+
+def dashboard_cache_stats() -> dict:
+    with _lock:
+        return {**_stats, "segments": len(_segments)}
+
+
+# -------------------- Invalidation Events --------------------
+# Timetables, topics, assignments, subjects and events are written from many
+# routers, so instead of an invalidate call at each write site the cache
+# listens on every Session and drops the segments after a commit that touched
+# one of the tracked tables.
+
+@event.listens_for(Session, "after_flush")
+def _mark_dashboard_changes(session, flush_context):
+    if session.info.get("dashboard_dirty"):
+        return
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, TRACKED_MODELS):
+            session.info["dashboard_dirty"] = True
+            return
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_bulk_changes(orm_execute_state):
+    # query(...).update()/delete() and update()/delete() statements skip the flush
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.local_table.name in TRACKED_TABLES:
+        orm_execute_state.session.info["dashboard_dirty"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session):
+    if session.info.pop("dashboard_dirty", False):
+        invalidate_class_segments()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session):
+    session.info.pop("dashboard_dirty", None)
@@ -0,0 +1,113 @@
+# app/services/db_telemetry.py
+
+import threading
+import time
+from collections import deque
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from ..config import DB_SLOW_CHECKOUT_MS
+
+
+class _CheckoutStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.slow_checkouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        # Most recent checkout waits (seconds), for percentiles
+        self.recent_waits = deque(maxlen=1000)
+
+    def record(self, waited: float) -> None:
+        with self.lock:
+            self.checkouts += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+            self.recent_waits.append(waited)
+            slow = waited * 1000 >= DB_SLOW_CHECKOUT_MS
+            if slow:
+                self.slow_checkouts += 1
+
+        if slow:
+            print(f"🐢 Waited {waited * 1000:.0f} ms for a DB connection")
+
+
+class _TimedCheckout:
+    """
+    Records how long each checkout waited for a connection.
+
+    `_do_get` is where QueuePool blocks when every connection is checked out
+    and the overflow is used up, so timing it separates pool exhaustion from
+    slow queries.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkout_stats = _CheckoutStats()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            with self.checkout_stats.lock:
+                self.checkout_stats.timeouts += 1
+            print(f"🚨 DB pool exhausted: no connection within {self._timeout}s ({pool_status(self)})")
+            raise
+        finally:
+            self.checkout_stats.record(time.perf_counter() - started)
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_status(pool) -> dict:
+    """Point-in-time connection counts for a pool (QueuePool or otherwise)."""
+    if not isinstance(pool, QueuePool):
+        return {"pool_class": type(pool).__name__}
+
+    return {
+        "pool_class": type(pool).__name__,
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        # QueuePool.overflow() starts at -size; only positive values are real overflow connections
+        "overflow": max(0, pool.overflow()),
+        "max_overflow": pool._max_overflow,
+    }
+
+
+def pool_stats(engine) -> dict:
+    """Connection counts plus checkout wait statistics for an Engine or AsyncEngine."""
+    pool = engine.pool
+    stats = getattr(pool, "checkout_stats", None)
+    if stats is None:
+        return pool_status(pool)
+
+    with stats.lock:
+        waits = sorted(stats.recent_waits)
+        checkouts, timeouts, slow = stats.checkouts, stats.timeouts, stats.slow_checkouts
+        wait_total, wait_max = stats.wait_total, stats.wait_max
+
+    p = lambda q: round(waits[min(len(waits) - 1, int(q * len(waits)))] * 1000, 2) if waits else 0.0
+
+    return {
+        **pool_status(pool),
+        "checkouts": checkouts,
+        "timeouts": timeouts,
+        "slow_checkouts": slow,
+        "wait_ms": {
+            "mean": round(wait_total / checkouts * 1000, 2) if checkouts else 0.0,
+            "p50": p(0.50),
+            "p95": p(0.95),
+            "max": round(wait_max * 1000, 2),
+        },
+    }
@@ -0,0 +1,225 @@
+# app/services/exam_scoring.py
+
+import threading
+import time
+from dataclasses import dataclass
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, Hashable, Iterable, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from ..config import ANSWER_KEY_CACHE_TTL_SECONDS
+from ..models import ExamResult, Subject, TestResult, Topic, TopicQuestion, normalized
+from .score_rollups import record_subject_attempt
+
+WEEK_RANGES = {
+    "first": (1, 6),
+    "second": (7, 11),
+    "exam": (1, 13)
+}
+
+
+@dataclass(frozen=True)
+class AnswerKey:
+    """Compiled key for one (subject, level, test type): question id → normalized expected answer."""
+    subject_id: int
+    expected: Dict[int, Tuple[bool, Optional[str]]]  # id → (objective?, expected answer)
+
+    @property
+    def total(self) -> int:
+        return len(self.expected)
+
+
+def result_model(test_type: str):
+    return ExamResult if test_type == "exam" else TestResult
+
+
+def find_result(db: Session, user_id: int, subject: str, level: str, test_type: str):
+    """The student's existing TestResult/ExamResult for this paper, if any."""
+    model = result_model(test_type)
+    query = select(model.id).where(model.user_id == user_id, model.subject == subject, model.level == level)
+    if test_type != "exam":
+        query = query.where(model.test_type == test_type)
+    return db.scalar(query.limit(1))
+
+
+# -------------------- Answer Keys (cached per worker) --------------------
+
+# (subject, level, test type) -> (expires_at, AnswerKey)
+_keys: Dict[Hashable, Tuple[float, AnswerKey]] = {}
+_lock = threading.Lock()
+# Bumped on invalidation; a key compiled before it is not stored
+_generation = 0
+_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+
+def compile_answer_key(db: Session, subject: str, level: str, test_type: str) -> AnswerKey:
+    """One query over the paper's topics and their questions; raises the 404s the submit route returns."""
+    start_week, end_week = WEEK_RANGES[test_type]
+    rows = db.execute(
+        select(Topic.subject_id, TopicQuestion.id, TopicQuestion.option_a, TopicQuestion.correct_answer,
+               TopicQuestion.answer)
+        .join(Subject, Topic.subject_id == Subject.id)
+        .outerjoin(TopicQuestion, TopicQuestion.topic_id == Topic.id)
+        .where(
+            normalized(Subject.name) == subject,
+            normalized(Topic.level) == level,
+            Topic.week_number >= start_week,
+            Topic.week_number <= end_week
+        )
+    ).all()
+
+    if not rows:
+        raise HTTPException(status_code=404, detail=f"No topics found for {subject} ({level}) in weeks {start_week}-{end_week}")
+
+    expected = {}
+    for _, question_id, option_a, correct_answer, answer in rows:
+        if question_id is None:
+            continue
+        if option_a and correct_answer:
+            expected[question_id] = (True, correct_answer.strip().lower())
+        else:
+            # Theory questions in tests are marked by exact match against the model answer;
+            # one without an answer still counts towards the total but can't be scored
+            expected[question_id] = (False, answer.strip().lower() if answer else None)
+
+    if not expected:
+        raise HTTPException(status_code=404, detail="No questions found for selected topics.")
+    return AnswerKey(subject_id=rows[0][0], expected=expected)
+
+
+def get_answer_key(db: Session, subject: str, level: str, test_type: str) -> AnswerKey:
+    """
+    Cached compile_answer_key. Keys are per worker and dropped after a commit
+    that touches topics, subjects or questions, or after
+    ANSWER_KEY_CACHE_TTL_SECONDS.
+    """
+    cache_key = (subject, level, test_type)
+    with _lock:
+        entry = _keys.get(cache_key)
+        if entry and entry[0] > time.monotonic():
+            _stats["hits"] += 1
+            return entry[1]
+        _stats["misses"] += 1
+        generation = _generation
+
+    key = compile_answer_key(db, subject, level, test_type)
+
+    with _lock:
+        if generation == _generation:
+            _keys[cache_key] = (time.monotonic() + ANSWER_KEY_CACHE_TTL_SECONDS, key)
+    return key
+
+
+def invalidate_answer_keys() -> None:
+    global _generation
+    with _lock:
+        _keys.clear()
+        _generation += 1
+        _stats["invalidations"] += 1
+
+
+def answer_key_cache_stats() -> dict:
+    with _lock:
+        return {**_stats, "keys": len(_keys)}
+
+
+# -------------------- Scoring --------------------
+
+def score_answers(key: AnswerKey, answers: Iterable) -> int:
+    """Correct answers among `answers` (SingleTestAnswer); each question counts once, unknown ids are ignored."""
+    marked = set()
+    correct = 0
+    for ans in answers:
+        entry = key.expected.get(ans.question_id)
+        if entry is None or ans.question_id in marked:
+            continue
+        marked.add(ans.question_id)
+        objective, expected = entry
+        given = ans.selected_option if objective else ans.user_answer
+        if expected is not None and (given or "").strip().lower() == expected:
+            correct += 1
+    return correct
+
+
+def percentage_of(correct: int, total: int) -> Decimal:
+    return (
+        (Decimal(correct) / Decimal(total) * Decimal("100"))
+        .quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+        if total > 0 else Decimal("0.00")
+    )
+
+
+def submit_paper(db: Session, user_id: int, subject: str, level: str, test_type: str, answers) -> dict:
+    """
+    Score a test or exam against its answer key and store the result and its
+    rollup in one transaction. `subject`, `level` and `test_type` are already
+    normalized.
+    """
+    if test_type not in WEEK_RANGES:
+        raise HTTPException(status_code=400, detail="Invalid test_type. Must be 'first', 'second', or 'exam'.")
+
+    if find_result(db, user_id, subject, level, test_type):
+        raise HTTPException(
+            status_code=400,
+            detail=f"You have already taken this {test_type} for {subject.capitalize()}."
+        )
+
+    key = get_answer_key(db, subject, level, test_type)
+    correct = score_answers(key, answers)
+    percentage = percentage_of(correct, key.total)
+
+    db.add(result_model(test_type)(
+        user_id=user_id,
+        subject=subject,
+        level=level,
+        test_type=test_type,
+        total_score=correct,
+        total_questions=key.total,
+        percentage=percentage
+    ))
+    record_subject_attempt(db, user_id, key.subject_id, "exam" if test_type == "exam" else "test", correct, key.total)
+    db.commit()
+
+    return {"score": correct, "total": key.total, "percentage": percentage}
+
+
+# -------------------- Invalidation Events --------------------
+# Same approach as dashboard_cache: questions are written from several
+# routers (generation, uploads, topic deletes), so keys are dropped after any
+# commit that touched a table they are compiled from.
+
+TRACKED_MODELS = (TopicQuestion, Topic, Subject)
+TRACKED_TABLES = {model.__tablename__ for model in TRACKED_MODELS}
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_key_changes(session, flush_context):
+    if session.info.get("answer_keys_dirty"):
+        return
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, TRACKED_MODELS):
+            session.info["answer_keys_dirty"] = True
+            return
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_bulk_changes(orm_execute_state):
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.local_table.name in TRACKED_TABLES:
+        orm_execute_state.session.info["answer_keys_dirty"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session):
+    if session.info.pop("answer_keys_dirty", False):
+        invalidate_answer_keys()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session):
+    session.info.pop("answer_keys_dirty", None)
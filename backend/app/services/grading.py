@@ -1,12 +1,20 @@
 # services/grading.py
 
-from openai import OpenAI
+import asyncio
+from typing import List, Sequence, Tuple
+
+from openai import AsyncOpenAI, OpenAI
 import os
 
+from ..config import GRADING_CONCURRENCY, GRADING_MODEL, GRADING_TIMEOUT_SECONDS
+
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
-def grade_theory_answer(model_answer: str, student_answer: str) -> float:
-    prompt = f"""
+SYSTEM_PROMPT = "You're a strict but fair grader."
+
+
+def _grading_prompt(model_answer: str, student_answer: str) -> str:
+    return f"""
 You are a teacher. Grade the student's answer based on the model answer.
 
 Model Answer:
@@ -17,18 +25,73 @@ Student Answer:
 
 Score between 0 and 10. Return only the number.
 """
+
+
+def _messages(model_answer: str, student_answer: str) -> list:
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": _grading_prompt(model_answer, student_answer)}
+    ]
+
+
+def _parse_score(response) -> float:
+    score_text = response.choices[0].message.content.strip()
+    return min(max(float(score_text), 0), 10)  # Clamp between 0 and 10
+
+
+def grade_theory_answer(model_answer: str, student_answer: str) -> float:
     try:
         response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "You're a strict but fair grader."},
-                {"role": "user", "content": prompt}
-            ],
+            model=GRADING_MODEL,
+            messages=_messages(model_answer, student_answer),
             temperature=0.2,
             max_tokens=10,
+            timeout=GRADING_TIMEOUT_SECONDS,
         )
-        score_text = response.choices[0].message.content.strip()
-        return min(max(float(score_text), 0), 10)  # Clamp between 0 and 10
+        return _parse_score(response)
     except Exception as e:
         print("Grading error:", e)
         return 0.0
+
+
+# -------------------- Concurrent Grading --------------------
+
+async def _grade_async(async_client: AsyncOpenAI, semaphore: asyncio.Semaphore,
+                       model_answer: str, student_answer: str) -> float:
+    async with semaphore:
+        try:
+            response = await async_client.chat.completions.create(
+                model=GRADING_MODEL,
+                messages=_messages(model_answer, student_answer),
+                temperature=0.2,
+                max_tokens=10,
+                timeout=GRADING_TIMEOUT_SECONDS,
+            )
+            return _parse_score(response)
+        except Exception as e:
+            print("Grading error:", e)
+            return 0.0
+
+
+async def grade_theory_answers_async(pairs: Sequence[Tuple[str, str]]) -> List[float]:
+    """
+    Scores for [(model_answer, student_answer), ...], in order, with at most
+    GRADING_CONCURRENCY requests in flight. Same prompt, clamping and 0.0 on
+    error as grade_theory_answer.
+    """
+    if not pairs:
+        return []
+    semaphore = asyncio.Semaphore(GRADING_CONCURRENCY)
+    # A client per batch: its connection pool belongs to the running event loop
+    async with AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY")) as async_client:
+        return list(await asyncio.gather(*(
+            _grade_async(async_client, semaphore, model_answer, student_answer)
+            for model_answer, student_answer in pairs
+        )))
+
+
+def grade_theory_answers(pairs: Sequence[Tuple[str, str]]) -> List[float]:
+    """grade_theory_answers_async for sync callers (threadpool routes, no running loop)."""
+    if not pairs:
+        return []
+    return asyncio.run(grade_theory_answers_async(pairs))
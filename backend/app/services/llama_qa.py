@@ -8,6 +8,7 @@ from sqlalchemy.orm import Session
 from openai import OpenAIError
 from app import models
 from app.config import OPENAI_API_KEY
+from app.services.reference_embeddings import store_reference_embeddings
 
 openai.api_key = OPENAI_API_KEY
 
@@ -199,6 +200,8 @@ def generate_questions_by_type(
         except Exception as e:
             logging.exception(f"❌ Error generating {qtype} questions")
 
+    # Theory grading compares against these instead of re-embedding question.answer
+    store_reference_embeddings(db, saved)
     db.commit()
     return saved
 
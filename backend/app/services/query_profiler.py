@@ -0,0 +1,199 @@
+# app/services/query_profiler.py
+
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from fastapi.responses import JSONResponse
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from ..config import SQL_N_PLUS_ONE_THRESHOLD, SQL_QUERY_BUDGET_ENFORCE
+
+
+class RequestQueries:
+    """Statements run while serving one request."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.count = 0
+        self.seconds = 0.0
+        self.fingerprints = Counter()
+
+    def record(self, statement: str, seconds: float) -> None:
+        key = fingerprint(statement)
+        with self.lock:
+            self.count += 1
+            self.seconds += seconds
+            self.fingerprints[key] += 1
+
+    def repeated(self, threshold: int) -> list:
+        """(count, fingerprint) for statements run at least `threshold` times, most frequent first."""
+        with self.lock:
+            return [(n, sql) for sql, n in self.fingerprints.most_common() if n >= threshold]
+
+
+# Set per request by QueryProfilerMiddleware. The object is shared (not
+# copied) with the threadpool and greenlets that run the route, so sync
+# and async handlers both record into it.
+_current: ContextVar[Optional[RequestQueries]] = ContextVar("request_queries", default=None)
+
+_IN_LIST = re.compile(r"\(\s*(?:\?|%\(\w+\)s|\$\d+|:\w+)(?:\s*,\s*(?:\?|%\(\w+\)s|\$\d+|:\w+))*\s*\)")
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_SPACE = re.compile(r"\s+")
+
+
+def fingerprint(statement: str) -> str:
+    """Statement with literals and IN-lists collapsed, so loop iterations compare equal."""
+    sql = _LITERAL.sub("?", statement)
+    sql = _IN_LIST.sub("(?)", sql)
+    return _SPACE.sub(" ", sql).strip()
+
+
+def current_queries() -> Optional[RequestQueries]:
+    return _current.get()
+
+
+@contextmanager
+def capture_queries():
+    """Record the statements run inside the block, outside of any request."""
+    install()
+    queries = RequestQueries()
+    token = _current.set(queries)
+    try:
+        yield queries
+    finally:
+        _current.reset(token)
+
+
+# -------------------- Engine Events --------------------
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    queries = _current.get()
+    started = conn.info.get("query_started")
+    if queries is None or not started:
+        return
+    queries.record(statement, time.perf_counter() - started.pop())
+
+
+def _handle_error(exception_context):
+    started = exception_context.connection.info.get("query_started") if exception_context.connection else None
+    if started:
+        started.pop()
+
+
+_installed = False
+
+
+def install() -> None:
+    """Listen on every Engine (primary, replicas and the async engine's sync core)."""
+    global _installed
+    if _installed:
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(Engine, "handle_error", _handle_error)
+    _installed = True
+
+
+# -------------------- Budgets --------------------
+
+def query_budget(max_queries: int):
+    """
+    Declare how many SQL statements a route may run. Place it under the
+    router decorator:
+
+        @router.get("/dashboard")
+        @query_budget(12)
+        def dashboard(...): ...
+
+    Over-budget requests are logged; with SQL_QUERY_BUDGET_ENFORCE=true they
+    fail with a 500 instead.
+    """
+    def decorator(endpoint):
+        endpoint.__query_budget__ = max_queries
+        return endpoint
+    return decorator
+
+
+# -------------------- Middleware --------------------
+
+class QueryProfilerMiddleware:
+    """
+    Counts the statements and DB time of each HTTP request, reports them in
+    X-DB-Queries / X-DB-Time (ms) and logs fingerprints repeated at least
+    SQL_N_PLUS_ONE_THRESHOLD times as likely N+1 loops.
+
+    Headers go out with the response start, so statements run after that
+    (streamed bodies, background tasks) only show up in the log.
+    """
+
+    def __init__(self, app, threshold: int = SQL_N_PLUS_ONE_THRESHOLD, enforce: bool = SQL_QUERY_BUDGET_ENFORCE):
+        self.app = app
+        self.threshold = threshold
+        self.enforce = enforce
+        install()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        queries = RequestQueries()
+        token = _current.set(queries)
+        over_budget = None
+
+        async def send_with_stats(message):
+            nonlocal over_budget
+            if message["type"] == "http.response.start":
+                budget = getattr(scope.get("endpoint"), "__query_budget__", None)
+                if budget is not None and queries.count > budget:
+                    over_budget = budget
+                    if self.enforce:
+                        await self._send_budget_error(scope, queries, budget, send)
+                        return
+
+                headers = list(message.get("headers", []))
+                headers.append((b"x-db-queries", str(queries.count).encode()))
+                headers.append((b"x-db-time", f"{queries.seconds * 1000:.1f}".encode()))
+                message = {**message, "headers": headers}
+            elif over_budget is not None and self.enforce:
+                return  # the original body is replaced by the budget error
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            _current.reset(token)
+            self._report(scope, queries, over_budget)
+
+    async def _send_budget_error(self, scope, queries, budget, send):
+        response = JSONResponse(
+            status_code=500,
+            content={
+                "detail": f"Query budget exceeded: {queries.count} statements (budget {budget})",
+                "repeated": [{"count": n, "sql": sql} for n, sql in queries.repeated(2)],
+            },
+            headers={"X-DB-Queries": str(queries.count), "X-DB-Time": f"{queries.seconds * 1000:.1f}"},
+        )
+
+        async def empty_receive():
+            return {"type": "http.disconnect"}
+
+        await response(scope, empty_receive, send)
+
+    def _report(self, scope, queries, over_budget):
+        route = f"{scope.get('method')} {scope.get('path')}"
+        if over_budget is not None:
+            print(f"🚨 {route} ran {queries.count} queries (budget {over_budget})")
+        for count, sql in queries.repeated(self.threshold):
+            print(f"🔁 Possible N+1 on {route}: {count}× {sql[:200]}")
@@ -0,0 +1,159 @@
+# app/services/reference_embeddings.py
+
+import hashlib
+from typing import List, Optional, Sequence, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..models import Question, ReferenceEmbedding, TopicQuestion
+from .answer_checker import embed_texts_versioned, embedding_model_version, normalize_answer
+
+SOURCES = {"topic_question": TopicQuestion, "question": Question}
+
+
+def _source(question) -> str:
+    return "question" if isinstance(question, Question) else "topic_question"
+
+
+def _graded_by_embedding(question) -> bool:
+    """Theory answers are graded by similarity; objective ones (options + key) by exact match."""
+    if not normalize_answer(question.answer):
+        return False
+    if isinstance(question, TopicQuestion):
+        return not (question.option_a and question.correct_answer)
+    return True
+
+
+def _text_hash(text: str) -> str:
+    return hashlib.sha1(normalize_answer(text).encode("utf-8")).hexdigest()
+
+
+def _stored_rows(db: Session, questions) -> dict:
+    rows = {}
+    for source in {_source(q) for q in questions}:
+        ids = [q.id for q in questions if _source(q) == source]
+        for row in db.scalars(select(ReferenceEmbedding).where(
+            ReferenceEmbedding.source == source, ReferenceEmbedding.question_id.in_(ids)
+        )):
+            rows[(row.source, row.question_id)] = row
+    return rows
+
+
+def _save(db: Session, questions, vectors, version: str, stored: dict) -> None:
+    import numpy as np
+
+    new_rows = []
+    for question, vector in zip(questions, vectors):
+        values = {
+            "model_version": version,
+            "text_hash": _text_hash(question.answer),
+            "vector": np.asarray(vector, dtype=np.float32).tobytes(),
+        }
+        row = stored.get((_source(question), question.id))
+        if row is None:
+            new_rows.append(ReferenceEmbedding(source=_source(question), question_id=question.id, **values))
+        else:
+            for field, value in values.items():
+                setattr(row, field, value)
+
+    if new_rows:
+        try:
+            with db.begin_nested():
+                db.add_all(new_rows)
+        except IntegrityError:
+            # A concurrent grader stored the same references first; theirs are as good
+            pass
+
+
+# -------------------- Write Path --------------------
+def store_reference_embeddings(db: Session, questions: Sequence) -> int:
+    """
+    Embed the reference answers of new or edited questions in one batch, in
+    the caller's transaction. Failures are only logged: grading computes and
+    stores any missing vector itself.
+    """
+    questions = [q for q in questions if _graded_by_embedding(q)]
+    if not questions:
+        return 0
+
+    db.flush()  # new questions need their ids
+    try:
+        vectors, version = embed_texts_versioned([normalize_answer(q.answer) for q in questions])
+    except Exception as e:
+        print(f"⚠️ Could not precompute reference embeddings: {e}")
+        return 0
+    _save(db, questions, vectors, version, _stored_rows(db, questions))
+    return len(questions)
+
+
+# -------------------- Read Path --------------------
+def reference_vectors(db: Session, questions: Sequence) -> Tuple[List, Optional[str]]:
+    """
+    (vectors, model version) for the questions' reference answers, one per
+    question (None for objective questions). Vectors stored under another
+    model version or for an edited answer are recomputed in one batch and
+    saved, so a model change re-embeds each reference once, on first use.
+    """
+    import numpy as np
+
+    version = embedding_model_version()
+    graded = list({id(q): q for q in questions if _graded_by_embedding(q)}.values())  # a question may repeat
+    stored = _stored_rows(db, graded) if graded else {}
+
+    found = {}
+    stale = []
+    for question in graded:
+        row = stored.get((_source(question), question.id))
+        if row is not None and row.model_version == version and row.text_hash == _text_hash(question.answer):
+            found[id(question)] = np.frombuffer(row.vector, dtype=np.float32)
+        else:
+            stale.append(question)
+
+    if stale:
+        try:
+            vectors, got_version = embed_texts_versioned([normalize_answer(q.answer) for q in stale])
+            _save(db, stale, vectors, got_version, stored)
+            if got_version == version:
+                found.update((id(q), np.asarray(v, dtype=np.float32)) for q, v in zip(stale, vectors))
+        except Exception as e:
+            print(f"⚠️ Could not embed reference answers: {e}")
+
+    return [found.get(id(q)) for q in questions], version
+
+
+def reference_vector(db: Session, question) -> Tuple[Optional[object], Optional[str]]:
+    vectors, version = reference_vectors(db, [question])
+    return vectors[0], version
+
+
+# -------------------- Backfill --------------------
+def backfill(db: Session, batch_size: int = 256) -> int:
+    """Bring every theory reference answer up to date; returns how many have a current vector."""
+    embedded = 0
+    for model in SOURCES.values():
+        last_id = 0
+        while True:
+            batch = db.scalars(
+                select(model).where(model.id > last_id).order_by(model.id).limit(batch_size)
+            ).all()
+            if not batch:
+                break
+            last_id = batch[-1].id
+            vectors, _ = reference_vectors(db, batch)
+            embedded += sum(1 for q, v in zip(batch, vectors) if v is not None)
+            db.commit()
+    return embedded
+
+
+if __name__ == "__main__":
+    # python -m app.services.reference_embeddings (after changing EMBEDDING_BACKEND or the model)
+    from ..database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        count = backfill(db)
+    finally:
+        db.close()
+    print(f"✅ {count} reference embeddings up to date")
@@ -0,0 +1,282 @@
+# app/services/score_rollups.py
+
+from collections import defaultdict
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..models import (
+    Assignment, AssignmentObjectiveAnswer, AssignmentSubmission, AssignmentTheoryAnswer, ExamResult,
+    ProgressTracking, StudentDailyScore, StudentSubjectScore, StudentTopicScore, Subject, TestResult, Topic, normalized,
+)
+
+SOURCES = ("quiz", "test", "exam", "assignment")
+
+
+def _percentage(score: float, total_questions: int) -> Optional[float]:
+    return round(score / total_questions * 100, 2) if total_questions else None
+
+
+def _apply(row, score: float, total_questions: int, at: datetime) -> None:
+    """Fold one attempt into a rollup row (ORM object or rebuild accumulator)."""
+    percentage = _percentage(score, total_questions)
+    row.attempts += 1
+    row.score_total += score
+    row.questions_total += total_questions
+    if percentage is not None:
+        row.best_percentage = percentage if row.best_percentage is None else max(row.best_percentage, percentage)
+    if row.last_attempt_at is None or at >= row.last_attempt_at:
+        row.latest_percentage = percentage
+        row.last_attempt_at = at
+    if hasattr(row, "completed_at") and row.completed_at is None and score >= total_questions:
+        row.completed_at = at
+
+
+def _locked_row(db: Session, model, **key):
+    """The rollup row for `key`, locked for this transaction; created on first attempt."""
+    row = db.query(model).filter_by(**key).with_for_update().first()
+    if row:
+        return row
+    row = model(**key, attempts=0, score_total=0, questions_total=0)
+    try:
+        with db.begin_nested():
+            db.add(row)
+    except IntegrityError:
+        # A concurrent first attempt inserted it; lock theirs instead
+        row = db.query(model).filter_by(**key).with_for_update().one()
+    return row
+
+
+# -------------------- Write Path --------------------
+# Called by the submit endpoints before their commit, so the attempt and its
+# rollup land (or roll back) together.
+
+def record_quiz_attempt(db: Session, student_id: int, topic_id: int, score: int, total_questions: int,
+                        at: Optional[datetime] = None) -> None:
+    at = at or datetime.utcnow()
+    _apply(_locked_row(db, StudentTopicScore, student_id=student_id, topic_id=topic_id), score, total_questions, at)
+
+    subject_id = db.scalar(select(Topic.subject_id).where(Topic.id == topic_id))
+    if subject_id is not None:
+        record_subject_attempt(db, student_id, subject_id, "quiz", score, total_questions, at)
+
+    daily = _locked_row(db, StudentDailyScore, student_id=student_id, subject_id=subject_id, day=at.date())
+    daily.attempts += 1
+    daily.score_total += score
+    daily.questions_total += total_questions
+
+
+def record_subject_attempt(db: Session, student_id: int, subject_id: int, source: str, score: float,
+                           total_questions: int, at: Optional[datetime] = None) -> None:
+    if source not in SOURCES:
+        raise ValueError(f"Unknown score source {source!r}")
+    row = _locked_row(db, StudentSubjectScore, student_id=student_id, subject_id=subject_id, source=source)
+    _apply(row, score, total_questions, at or datetime.utcnow())
+
+
+def forget_assignment(db: Session, assignment_id: int) -> None:
+    """
+    Called before an assignment is deleted (its submissions go with it):
+    re-folds the "assignment" rollup of every student it was graded for,
+    in its subject, from their remaining submissions. Recomputing rather
+    than subtracting keeps best/latest percentages right.
+    """
+    subject_id = db.scalar(select(Assignment.subject_id).where(Assignment.id == assignment_id))
+    graded = (AssignmentSubmission.status == "completed", AssignmentSubmission.score.isnot(None))
+    student_ids = db.scalars(
+        select(AssignmentSubmission.student_id).where(AssignmentSubmission.assignment_id == assignment_id, *graded)
+        .distinct()
+    ).all()
+    if not student_ids:
+        return
+
+    rows = {
+        row.student_id: row
+        for row in db.query(StudentSubjectScore).filter(
+            StudentSubjectScore.student_id.in_(student_ids),
+            StudentSubjectScore.subject_id == subject_id,
+            StudentSubjectScore.source == "assignment",
+        ).with_for_update()
+    }
+    for row in rows.values():
+        row.attempts, row.score_total, row.questions_total = 0, 0, 0
+        row.best_percentage = row.latest_percentage = row.last_attempt_at = None
+
+    remaining = db.execute(
+        select(AssignmentSubmission.id, AssignmentSubmission.student_id, AssignmentSubmission.score,
+               AssignmentSubmission.submitted_at)
+        .join(Assignment, AssignmentSubmission.assignment_id == Assignment.id)
+        .where(Assignment.subject_id == subject_id, Assignment.id != assignment_id,
+               AssignmentSubmission.student_id.in_(rows), *graded)
+        .order_by(AssignmentSubmission.submitted_at, AssignmentSubmission.id)
+    ).all()
+
+    # Same question count as rebuild(): the number of graded answers
+    answered = defaultdict(int)
+    submission_ids = [submission_id for submission_id, *_ in remaining]
+    if submission_ids:
+        for answer_model in (AssignmentObjectiveAnswer, AssignmentTheoryAnswer):
+            for submission_id, count in db.execute(
+                select(answer_model.submission_id, func.count(answer_model.id))
+                .where(answer_model.submission_id.in_(submission_ids))
+                .group_by(answer_model.submission_id)
+            ):
+                answered[submission_id] += count
+
+    for submission_id, student_id, score, at in remaining:
+        _apply(rows[student_id], score, answered[submission_id], at or datetime.min)
+    for row in rows.values():
+        if not row.attempts:
+            db.delete(row)
+
+
+# -------------------- Rebuild --------------------
+
+class _Totals:
+    def __init__(self, **key):
+        self.key = key
+        self.attempts = 0
+        self.score_total = 0.0
+        self.questions_total = 0
+        self.best_percentage = None
+        self.latest_percentage = None
+        self.last_attempt_at = None
+
+    def as_row(self) -> dict:
+        return {
+            **self.key,
+            "attempts": self.attempts,
+            "score_total": self.score_total,
+            "questions_total": self.questions_total,
+            "best_percentage": self.best_percentage,
+            "latest_percentage": self.latest_percentage,
+            "last_attempt_at": self.last_attempt_at,
+        }
+
+
+class _TopicTotals(_Totals):
+    def __init__(self, **key):
+        super().__init__(**key)
+        self.completed_at = None
+
+    def as_row(self) -> dict:
+        return {**super().as_row(), "completed_at": self.completed_at}
+
+
+def rebuild(db: Session, batch_size: int = 1000) -> dict:
+    """
+    Recompute every rollup from the attempt tables and replace the stored
+    rows. For backfilling a new deployment or repairing drift; the request
+    path never needs it.
+
+    Test/exam results store the subject by name, so they are matched to the
+    subject owning topics with that (normalized) name and level. Assignment
+    submissions count once graded (status "completed").
+    """
+    topics = {}
+    subjects = {}
+    days = {}
+    topic_subjects = dict(db.execute(select(Topic.id, Topic.subject_id)).all())
+
+    def subject_totals(student_id, subject_id, source):
+        key = (student_id, subject_id, source)
+        if key not in subjects:
+            subjects[key] = _Totals(student_id=student_id, subject_id=subject_id, source=source)
+        return subjects[key]
+
+    # Quizzes
+    progress = (
+        select(ProgressTracking.user_id, ProgressTracking.topic_id, ProgressTracking.score,
+               ProgressTracking.total_questions, ProgressTracking.completed_at)
+        .order_by(ProgressTracking.completed_at, ProgressTracking.id)
+        .execution_options(yield_per=batch_size)
+    )
+    for user_id, topic_id, score, total, at in db.execute(progress):
+        at = at or datetime.min
+        key = (user_id, topic_id)
+        if key not in topics:
+            topics[key] = _TopicTotals(student_id=user_id, topic_id=topic_id)
+        _apply(topics[key], score, total, at)
+        subject_id = topic_subjects.get(topic_id)
+        if subject_id is not None:
+            _apply(subject_totals(user_id, subject_id, "quiz"), score, total, at)
+
+        key = (user_id, subject_id, at.date())
+        if key not in days:
+            days[key] = {"student_id": user_id, "subject_id": subject_id, "day": at.date(),
+                         "attempts": 0, "score_total": 0.0, "questions_total": 0}
+        days[key]["attempts"] += 1
+        days[key]["score_total"] += score
+        days[key]["questions_total"] += total
+
+    # Tests and exams (subject stored by name)
+    subject_ids = {}
+    named = (
+        select(normalized(Subject.name), normalized(Topic.level), Subject.id)
+        .join(Topic, Topic.subject_id == Subject.id)
+        .distinct()
+        .order_by(Subject.id)
+    )
+    for name, level, subject_id in db.execute(named):
+        subject_ids.setdefault((name, level), subject_id)
+
+    for model, source in ((TestResult, "test"), (ExamResult, "exam")):
+        results = (
+            select(model.user_id, model.subject, model.level, model.total_score, model.total_questions,
+                   model.submitted_at)
+            .order_by(model.submitted_at, model.id)
+            .execution_options(yield_per=batch_size)
+        )
+        for user_id, subject, level, score, total, at in db.execute(results):
+            subject_id = subject_ids.get((subject.strip().lower(), level.strip().lower()))
+            if subject_id is not None:
+                _apply(subject_totals(user_id, subject_id, source), score, total, at or datetime.min)
+
+    # Assignments: the question count is the number of graded answers
+    answered = defaultdict(int)
+    for answer_model in (AssignmentObjectiveAnswer, AssignmentTheoryAnswer):
+        for submission_id, count in db.execute(
+            select(answer_model.submission_id, func.count(answer_model.id)).group_by(answer_model.submission_id)
+        ):
+            answered[submission_id] += count
+
+    submissions = (
+        select(AssignmentSubmission.id, AssignmentSubmission.student_id, Assignment.subject_id,
+               AssignmentSubmission.score, AssignmentSubmission.submitted_at)
+        .join(Assignment, AssignmentSubmission.assignment_id == Assignment.id)
+        .where(AssignmentSubmission.status == "completed", AssignmentSubmission.score.isnot(None))
+        .order_by(AssignmentSubmission.submitted_at, AssignmentSubmission.id)
+        .execution_options(yield_per=batch_size)
+    )
+    for submission_id, student_id, subject_id, score, at in db.execute(submissions):
+        _apply(subject_totals(student_id, subject_id, "assignment"), score, answered[submission_id],
+               at or datetime.min)
+
+    tables = (
+        (StudentTopicScore, [totals.as_row() for totals in topics.values()]),
+        (StudentSubjectScore, [totals.as_row() for totals in subjects.values()]),
+        (StudentDailyScore, list(days.values())),
+    )
+    for model, rows in tables:
+        db.execute(delete(model))
+        for start in range(0, len(rows), batch_size):
+            db.execute(insert(model), rows[start:start + batch_size])
+    db.commit()
+
+    return {"topic_rows": len(topics), "subject_rows": len(subjects), "daily_rows": len(days)}
+
+
+if __name__ == "__main__":
+    # python -m app.services.score_rollups
+    from ..database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        counts = rebuild(db)
+    finally:
+        db.close()
+    print(f"✅ Rebuilt score rollups: {counts['topic_rows']} topic rows, {counts['subject_rows']} subject rows, "
+          f"{counts['daily_rows']} daily rows")
@@ -1,10 +1,28 @@
-from transformers import pipeline
 import re
+import threading
+
+# The transformers pipelines download and load several GB of weights, so they
+# are built on first use instead of when this module is imported.
+_pipelines = None
+_pipelines_lock = threading.Lock()
+
+
+def get_pipelines() -> dict:
+    global _pipelines
+
+    if _pipelines is None:
+        with _pipelines_lock:
+            if _pipelines is None:
+                from transformers import pipeline
+
+                _pipelines = {
+                    "summarizer": pipeline("summarization", model="facebook/bart-large-cnn"),
+                    "qg": pipeline("text2text-generation", model="iarfmoose/t5-base-question-generator"),
+                    "qa": pipeline("question-answering"),
+                    "ner": pipeline("ner", grouped_entities=True),
+                }
+    return _pipelines
 
-# Load summarizer and question generation model
-summarizer = pipeline("summarization", model="facebook/bart-large-cnn")
-qg_model = pipeline("text2text-generation", model="iarfmoose/t5-base-question-generator")
-qa_model = pipeline("question-answering")
 
 def highlight_answers(text, answers):
     for ans in sorted(answers, key=len, reverse=True):
@@ -14,12 +32,13 @@ def highlight_answers(text, answers):
 
 def generate_smart_qas(text, max_questions=5):
     try:
+        models = get_pipelines()
+        summarizer, qg_model, qa_model, ner = models["summarizer"], models["qg"], models["qa"], models["ner"]
+
         # Step 1: Summarize text
         summary = summarizer(text, max_length=300, min_length=100, do_sample=False)[0]['summary_text']
 
         # Step 2: Extract potential answers using NER/keywords
-        from transformers import pipeline as pl
-        ner = pl("ner", grouped_entities=True)
         entities = list(set([e['word'] for e in ner(summary) if e['entity_group'] in ['PER', 'LOC', 'ORG', 'MISC']]))
         if not entities:
             entities = summary.split()[:max_questions]
@@ -1,162 +1,203 @@
 from fastapi import HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from datetime import datetime, date
 from sqlalchemy import func, or_
 from ..models import (
     Timetable, Topic, ProgressTracking,
     Assignment, AssignmentSubmission,
-    ScheduledEvent, Subject, User
+    ScheduledEvent, Subject, User, normalized
 )
 from ..schemas import (
     StudentDashboardOut, DashboardTopic,
     DashboardAssignment, DashboardEvent,
-    DashboardProgress
+    DashboardProgress, SubjectOut, TimetableOut
 )
+from .dashboard_cache import get_class_segment
 
 
-def get_student_dashboard_data(db: Session, current_user: User):
-    today = date.today()
+class ClassSegment:
+    """
+    The part of a dashboard that depends only on the class (level, department)
+    and the day: shared by every student in it through dashboard_cache.
+    Never mutated once built.
+    """
+
+    def __init__(self, today_topics, today_schedule, assignments, total_topics, upcoming_events):
+        self.today_topics = today_topics
+        self.today_schedule = today_schedule
+        self.assignments = assignments  # (assignment id, title, due date, SubjectOut)
+        self.total_topics = total_topics
+        self.upcoming_events = upcoming_events
+
 
+def get_student_dashboard_data(db: Session, current_user: User):
     if not current_user.level and not current_user.is_admin:
         raise HTTPException(status_code=400, detail="User level is required.")
 
-    level = (current_user.level or "").strip().lower()
-    department = (current_user.department or "").strip().lower()
+    # Admins see the whole school's day rather than one class
+    level = None if current_user.is_admin else current_user.level
+    return build_student_dashboard(db, current_user, level, current_user.department)
+
+
+def build_student_dashboard(db: Session, student: User, level, department, student_name=None):
+    """Shared class segment for (level, department) with `student`'s submissions and progress merged on."""
+    today = date.today()
     academic_week = get_academic_week_number()
+    segment = get_class_dashboard_segment(db, level, department, today, academic_week)
+
+    # ✅ Per-student overlay: submissions and completed topics
+    submissions = {
+        row.assignment_id: row
+        for row in db.query(
+            AssignmentSubmission.assignment_id,
+            AssignmentSubmission.score,
+            AssignmentSubmission.submitted_at
+        ).filter(AssignmentSubmission.student_id == student.id)
+    }
 
-    # ✅ 1️⃣ Timetable Entries (Today)
-    if current_user.is_admin:
-        timetable_entries = db.query(Timetable).filter(
-            func.lower(Timetable.day) == today.strftime("%A").lower()
-        ).order_by(Timetable.start_time).all()
-    else:
-        timetable_query = db.query(Timetable).filter(
-            func.lower(Timetable.level) == level,
-            func.lower(Timetable.day) == today.strftime("%A").lower()
-        )
+    dashboard_assignments = []
+    for assignment_id, title, due_date, subject in segment.assignments:
+        submission = submissions.get(assignment_id)
+        dashboard_assignments.append(DashboardAssignment(
+            id=assignment_id,
+            title=title,
+            due_date=due_date,
+            subject=subject,
+            status="completed" if submission else "pending",
+            score=submission.score if submission else None,
+            submitted_at=submission.submitted_at if submission else None
+        ))
+
+    completed_topics = db.query(ProgressTracking).filter_by(
+        user_id=student.id
+    ).count()
+
+    return StudentDashboardOut(
+        student_name=student_name,
+        date=today,
+        current_week=academic_week,
+        today_topics=segment.today_topics,
+        assignments=dashboard_assignments,
+        progress=DashboardProgress(
+            total_topics_assigned=segment.total_topics,
+            topics_completed=completed_topics,
+            topics_remaining=max(segment.total_topics - completed_topics, 0)
+        ),
+        upcoming_events=segment.upcoming_events,
+        today_schedule=segment.today_schedule
+    )
+
+
+def get_class_dashboard_segment(db: Session, level, department, today: date, academic_week: int) -> ClassSegment:
+    """
+    Cached ClassSegment for a class; `level=None` means every level (admin view).
+    Department only narrows SS classes, so it's left out of the key elsewhere.
+    """
+    level = (level or "").strip().lower() or None
+    department = (department or "").strip().lower()
+    if not (level and level.startswith("ss")):
+        department = ""
+
+    return get_class_segment(
+        (level, department, today, academic_week),
+        lambda: build_class_segment(db, level, department, today, academic_week)
+    )
+
+
+def build_class_segment(db: Session, level, department: str, today: date, academic_week: int) -> ClassSegment:
+    weekday = today.strftime("%A").lower()
+
+    # ✅ 1️⃣ Timetable Entries (Today), joined with their subjects
+    timetable_query = db.query(Timetable, Subject).join(
+        Subject, Subject.id == Timetable.subject_id
+    ).filter(
+        normalized(Timetable.day) == weekday
+    )
+
+    if level:
+        timetable_query = timetable_query.filter(normalized(Timetable.level) == level)
 
-        # ✅ Only filter department if it's SS level
-        if level.startswith("ss") and department:
+        if department:
             timetable_query = timetable_query.filter(
                 or_(
-                    func.lower(Timetable.department) == department,
-                    func.length(Timetable.department) == 0,
+                    normalized(Timetable.department) == department,
+                    func.length(func.trim(Timetable.department)) == 0,
                     Timetable.department == None
                 )
             )
 
-        timetable_entries = timetable_query.order_by(Timetable.start_time).all()
+    timetable_entries = timetable_query.order_by(Timetable.start_time).all()
+
+    today_schedule = [
+        TimetableOut(
+            id=entry.id,
+            day=entry.day,
+            subject=subject.name,
+            start_time=str(entry.start_time),
+            end_time=str(entry.end_time),
+            level=entry.level,
+            department=entry.department,
+            period=entry.period
+        )
+        for entry, subject in sorted(timetable_entries, key=lambda pair: pair[0].period or 0)
+    ]
+
+    # ✅ 2️⃣ Current (or latest earlier) topic for each subject, in one query
+    topics = get_latest_topics(
+        db,
+        {(subject.id, (entry.level or "").strip().lower()) for entry, subject in timetable_entries},
+        academic_week
+    )
 
-    # ✅ 2️⃣ Topics for Each Entry
     today_topics = []
+    for entry, subject in timetable_entries:
+        topic = topics.get((subject.id, (entry.level or "").strip().lower()))
+        today_topics.append(DashboardTopic(
+            subject=subject.name,
+            topic_title=topic.title if topic else "No topic available for this week.",
+            pdf_url=topic.pdf_url if topic else None,
+            start_time=entry.start_time,
+            end_time=entry.end_time
+        ))
 
-    for entry in timetable_entries:
-        subject = db.query(Subject).filter(Subject.id == entry.subject_id).first()
-        if not subject:
-            print(f"⚠️ No subject found for subject_id: {entry.subject_id}")
-            continue
-
-        try:
-            current_topic = db.query(Topic).filter(
-                Topic.subject_id == subject.id,
-                func.lower(Topic.level) == func.lower(entry.level),
-                Topic.week_number == academic_week
-            ).first()
-
-            if current_topic:
-                today_topics.append(DashboardTopic(
-                    subject=subject.name,
-                    topic_title=current_topic.title,
-                    pdf_url=current_topic.pdf_url,
-                    start_time=entry.start_time,
-                    end_time=entry.end_time,
-                    is_current_week=True,
-                    actual_week=academic_week,
-                    topic_available=True
-                ))
-            else:
-                fallback_topic = db.query(Topic).filter(
-                    Topic.subject_id == subject.id,
-                    func.lower(Topic.level) == func.lower(entry.level),
-                    Topic.week_number < academic_week
-                ).order_by(Topic.week_number.desc()).first()
-
-                if fallback_topic:
-                    today_topics.append(DashboardTopic(
-                        subject=subject.name,
-                        topic_title=fallback_topic.title,
-                        pdf_url=fallback_topic.pdf_url,
-                        start_time=entry.start_time,
-                        end_time=entry.end_time,
-                        is_current_week=False,
-                        actual_week=fallback_topic.week_number,
-                        topic_available=True
-                    ))
-                else:
-                    today_topics.append(DashboardTopic(
-                        subject=subject.name,
-                        topic_title="No topic available for this week.",
-                        pdf_url=None,
-                        start_time=entry.start_time,
-                        end_time=entry.end_time,
-                        is_current_week=False,
-                        actual_week=academic_week,
-                        topic_available=False
-                    ))
-
-        except Exception as e:
-            print(f"🔥 Error fetching topic for subject {subject.name}: {str(e)}")
-            continue
-
-    # ✅ 3️⃣ Assignments
-    assignments_query = db.query(Assignment)
-    if not current_user.is_admin:
+    # ✅ 3️⃣ Assignments for the class
+    assignments_query = db.query(Assignment).options(joinedload(Assignment.subject))
+    if level:
         assignments_query = assignments_query.filter(
-            func.lower(Assignment.class_level) == level
+            normalized(Assignment.class_level) == level
         )
-    assignments = assignments_query.all()
-
-    dashboard_assignments = []
-    for assignment in assignments:
-        submission = db.query(AssignmentSubmission).filter_by(
-            assignment_id=assignment.id,
-            student_id=current_user.id
-        ).first()
-
-        status = "completed" if submission else "pending"
-
-        dashboard_assignments.append(DashboardAssignment(
-            id=assignment.id,
-            title=assignment.title,
-            due_date=assignment.due_date,
-            subject=assignment.subject,
-            status=status
-        ))
+        if department:
+            assignments_query = assignments_query.join(Subject, Subject.id == Assignment.subject_id).filter(
+                or_(
+                    normalized(Subject.department) == department,
+                    Subject.department == None,
+                    Subject.department == ""
+                )
+            )
+    assignments = [
+        (
+            assignment.id,
+            assignment.title,
+            assignment.due_date,
+            SubjectOut.from_orm(assignment.subject) if assignment.subject else None
+        )
+        for assignment in assignments_query.all()
+    ]
 
-    # ✅ 4️⃣ Progress
+    # ✅ 4️⃣ Topics assigned to the level
     total_topics_query = db.query(Topic)
-    if not current_user.is_admin:
+    if level:
         total_topics_query = total_topics_query.filter(
-            func.lower(Topic.level) == level
+            normalized(Topic.level) == level
         )
-    total_topics_count = total_topics_query.count()
-
-    completed_topics = db.query(ProgressTracking).filter_by(
-        user_id=current_user.id
-    ).count()
-
-    dashboard_progress = DashboardProgress(
-        total_topics_assigned=total_topics_count,
-        topics_completed=completed_topics,
-        topics_remaining=max(total_topics_count - completed_topics, 0)
-    )
+    total_topics = total_topics_query.count()
 
     # ✅ 5️⃣ Upcoming Events
     events = db.query(ScheduledEvent).filter(
         ScheduledEvent.date >= today
     ).order_by(ScheduledEvent.date).all()
 
-    dashboard_events = [
+    upcoming_events = [
         DashboardEvent(
             title=event.title,
             event_type=event.event_type,
@@ -166,14 +207,40 @@ def get_student_dashboard_data(db: Session, current_user: User):
         for event in events
     ]
 
-    return StudentDashboardOut(
-        date=today,
-        current_week=academic_week,
-        today_topics=today_topics,
-        assignments=dashboard_assignments,
-        progress=dashboard_progress,
-        upcoming_events=dashboard_events
-    )
+    return ClassSegment(today_topics, today_schedule, assignments, total_topics, upcoming_events)
+
+
+def get_latest_topics(db: Session, subject_levels: set, academic_week: int) -> dict:
+    """
+    (subject_id, normalized level) -> the topic for `academic_week`, or the
+    latest earlier week when that week has none. One windowed query for all pairs.
+    """
+    if not subject_levels:
+        return {}
+
+    level_key = normalized(Topic.level)
+    ranked = db.query(
+        Topic.subject_id,
+        level_key.label("level_key"),
+        Topic.title,
+        Topic.pdf_url,
+        Topic.week_number,
+        func.row_number().over(
+            partition_by=(Topic.subject_id, level_key),
+            order_by=(Topic.week_number.desc(), Topic.id)
+        ).label("rank")
+    ).filter(
+        Topic.subject_id.in_({subject_id for subject_id, _ in subject_levels}),
+        level_key.in_({level for _, level in subject_levels}),
+        Topic.week_number <= academic_week
+    ).subquery()
+
+    rows = db.query(ranked).filter(ranked.c.rank == 1).all()
+    return {
+        (row.subject_id, row.level_key): row
+        for row in rows
+        if (row.subject_id, row.level_key) in subject_levels
+    }
 
 
 def get_academic_week_number():
@@ -0,0 +1,92 @@
+# app/services/teacher_context.py
+
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from ..config import USER_CACHE_TTL_SECONDS, USER_CACHE_MAX_ENTRIES
+from ..models import User, TeacherProfile, TeacherSubject
+from .user_cache import invalidate_user
+
+# teacher user_id -> (expires_at, ids of subjects they teach)
+_subject_ids: Dict[int, Tuple[float, Tuple[int, ...]]] = {}
+_lock = threading.Lock()
+
+
+class TeacherContext:
+    """
+    Everything teacher routes need to know about the caller, resolved once
+    per request: the TeacherProfile (level/department) and the taught subjects.
+
+    The profile comes from the cached user snapshot (it is joinedloaded there),
+    so building a context costs no SQL. Subject ids are loaded on first use
+    and cached per worker.
+    """
+
+    def __init__(self, user: User, profile: TeacherProfile, db: Session):
+        self.user = user
+        self.profile = profile
+        self._db = db
+        self._subject_ids: Optional[Tuple[int, ...]] = None
+
+    @property
+    def user_id(self) -> int:
+        return self.user.id
+
+    @property
+    def level(self) -> Optional[str]:
+        return self.profile.level
+
+    @property
+    def department(self) -> Optional[str]:
+        return self.profile.department
+
+    @property
+    def has_class(self) -> bool:
+        return bool(self.profile.level and self.profile.department)
+
+    @property
+    def subject_ids(self) -> Tuple[int, ...]:
+        if self._subject_ids is None:
+            self._subject_ids = get_teacher_subject_ids(self._db, self.user.id)
+        return self._subject_ids
+
+
+def load_teacher_context(db: Session, user: User) -> Optional[TeacherContext]:
+    """Context for `user`, or None when they have no teacher profile."""
+    profile = user.teacher_profile
+    if profile is None:
+        return None
+    return TeacherContext(user, profile, db)
+
+
+def get_teacher_subject_ids(db: Session, teacher_id: int) -> Tuple[int, ...]:
+    now = time.monotonic()
+
+    with _lock:
+        entry = _subject_ids.get(teacher_id)
+    if entry and entry[0] > now:
+        return entry[1]
+
+    rows = db.query(TeacherSubject.subject_id).filter(TeacherSubject.teacher_id == teacher_id).all()
+    ids = tuple(row[0] for row in rows)
+
+    with _lock:
+        if len(_subject_ids) >= USER_CACHE_MAX_ENTRIES:
+            _subject_ids.clear()
+        _subject_ids[teacher_id] = (now + USER_CACHE_TTL_SECONDS, ids)
+    return ids
+
+
+def invalidate_teacher(teacher_id: int) -> None:
+    """Call after a teacher's class or subject assignments change."""
+    invalidate_user(teacher_id)
+    with _lock:
+        _subject_ids.pop(teacher_id, None)
+
+
+def clear_teacher_cache() -> None:
+    with _lock:
+        _subject_ids.clear()
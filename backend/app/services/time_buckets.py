@@ -0,0 +1,101 @@
+# app/services/time_buckets.py
+
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Iterable, List, Optional
+
+from sqlalchemy import func, select
+
+from ..config import TERM_START_DATE
+from ..models import StudentDailyScore, Subject
+
+BUCKETS = ("day", "week", "month", "term")
+
+TERM_START = datetime.strptime(TERM_START_DATE, "%Y-%m-%d").date()
+
+
+@dataclass
+class Bucket:
+    label: str
+    start: date
+    attempts: int = 0
+    total_score: float = 0
+    total_questions: int = 0
+
+    @property
+    def average_score(self) -> float:
+        """Mean score per attempt (what avg(progress_tracking.score) gave)."""
+        return self.total_score / self.attempts if self.attempts else 0.0
+
+
+def daily_rows_query(student_id: int, start: Optional[date] = None, end: Optional[date] = None,
+                     subject: Optional[str] = None):
+    """
+    (day, attempts, total_score, total_questions) per day for one student,
+    summed over subjects, from the student_daily_scores rollup. Works with
+    Session.execute and AsyncSession.execute alike.
+    """
+    query = (
+        select(
+            StudentDailyScore.day.label("day"),
+            func.sum(StudentDailyScore.attempts).label("attempts"),
+            func.sum(StudentDailyScore.score_total).label("total_score"),
+            func.sum(StudentDailyScore.questions_total).label("total_questions"),
+        )
+        .where(StudentDailyScore.student_id == student_id)
+    )
+    if start:
+        query = query.where(StudentDailyScore.day >= start)
+    if end:
+        query = query.where(StudentDailyScore.day <= end)
+    if subject:
+        query = (
+            query.join(Subject, StudentDailyScore.subject_id == Subject.id)
+            .where(Subject.name.ilike(f"%{subject}%"))
+        )
+    return query.group_by(StudentDailyScore.day).order_by(StudentDailyScore.day)
+
+
+def _bucket_start(day: date, bucket: str) -> date:
+    if bucket == "day":
+        return day
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())  # ISO weeks start on Monday
+    if bucket == "month":
+        return day.replace(day=1)
+    return TERM_START + timedelta(weeks=(day - TERM_START).days // 7)
+
+
+def _label(start: date, bucket: str) -> str:
+    if bucket == "day":
+        return start.isoformat()
+    if bucket == "week":
+        year, week, _ = start.isocalendar()
+        return f"{year}-W{week:02d}"
+    if bucket == "month":
+        return start.strftime("%Y-%m")
+    return f"Week {(start - TERM_START).days // 7 + 1}"
+
+
+def bucket_rows(rows: Iterable, bucket: str) -> List[Bucket]:
+    """
+    Fold daily rows (from daily_rows_query) into day / ISO week / month /
+    term-week buckets, oldest first. Done in Python so it behaves the same
+    on every database; a term is only ever a few hundred daily rows.
+    """
+    if bucket not in BUCKETS:
+        raise ValueError(f"Unknown bucket {bucket!r}, expected one of {', '.join(BUCKETS)}")
+
+    series = {}
+    for row in rows:
+        day = row.day if isinstance(row.day, date) else date.fromisoformat(str(row.day))
+        if bucket == "term" and day < TERM_START:
+            continue
+        start = _bucket_start(day, bucket)
+        if start not in series:
+            series[start] = Bucket(label=_label(start, bucket), start=start)
+        entry = series[start]
+        entry.attempts += row.attempts or 0
+        entry.total_score += row.total_score or 0
+        entry.total_questions += row.total_questions or 0
+    return [series[start] for start in sorted(series)]
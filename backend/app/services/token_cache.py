@@ -0,0 +1,79 @@
+# app/services/token_cache.py
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+from jose import jwt
+
+from ..config import JWT_CACHE_MAX_ENTRIES
+
+# sha256(token) -> (exp as unix time, verified claims), least recently used first
+_entries: "OrderedDict[bytes, Tuple[float, dict]]" = OrderedDict()
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0}
+# Fingerprint of the key material the cached claims were verified with
+_key_fingerprint = None
+
+
+def decode_token_cached(token: str, secret_key: str, algorithm: str) -> dict:
+    """
+    Verify and decode a JWT, skipping signature verification for tokens this
+    worker has already verified. Raises jose.JWTError exactly like jwt.decode.
+
+    Entries expire at the token's `exp`; a different secret/algorithm than the
+    one the cache was filled with (i.e. a rotation) clears it.
+    """
+    global _key_fingerprint
+
+    digest = hashlib.sha256(token.encode()).digest()
+    fingerprint = hashlib.sha256(f"{algorithm}:{secret_key}".encode()).digest()
+    now = time.time()
+
+    with _lock:
+        if fingerprint != _key_fingerprint:
+            _entries.clear()
+            _key_fingerprint = fingerprint
+
+        entry = _entries.get(digest)
+        if entry:
+            if entry[0] > now:
+                _entries.move_to_end(digest)
+                _stats["hits"] += 1
+                return dict(entry[1])
+            del _entries[digest]
+            _stats["expired"] += 1
+        _stats["misses"] += 1
+
+    claims = jwt.decode(token, secret_key, algorithms=[algorithm])
+
+    exp = claims.get("exp")
+    if exp is not None:
+        with _lock:
+            if _key_fingerprint == fingerprint:
+                _entries[digest] = (float(exp), claims)
+                _entries.move_to_end(digest)
+                while len(_entries) > JWT_CACHE_MAX_ENTRIES:
+                    _entries.popitem(last=False)
+                    _stats["evictions"] += 1
+
+    return dict(claims)
+
+
+def clear_token_cache() -> None:
+    """Forget every verified token, e.g. after rotating SECRET_KEY."""
+    with _lock:
+        _entries.clear()
+
+
+def token_cache_stats() -> Dict[str, int]:
+    with _lock:
+        lookups = _stats["hits"] + _stats["misses"]
+        return {
+            **_stats,
+            "size": len(_entries),
+            "max_size": JWT_CACHE_MAX_ENTRIES,
+            "hit_rate": round(_stats["hits"] / lookups, 4) if lookups else 0.0,
+        }
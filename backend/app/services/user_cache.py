@@ -0,0 +1,103 @@
+# app/services/user_cache.py
+
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy.orm import Session, joinedload
+
+from ..config import USER_CACHE_TTL_SECONDS, USER_CACHE_MAX_ENTRIES
+from ..models import User
+
+# user_id -> (expires_at, detached User snapshot with teacher_profile loaded)
+_entries: Dict[int, Tuple[float, User]] = {}
+# user_id -> (expires_at, token_version); consulted by the claims-only auth path
+_token_versions: Dict[int, Tuple[float, int]] = {}
+_lock = threading.Lock()
+
+
+def get_cached_user(db: Session, user_id: int) -> Optional[User]:
+    """
+    Return the user attached to `db`, loading it from the database only when
+    this worker has no fresh cached copy.
+
+    The cache holds detached snapshots; each request gets its own copy via
+    `Session.merge(load=False)`, which attaches it without emitting SQL.
+    """
+    now = time.monotonic()
+
+    with _lock:
+        entry = _entries.get(user_id)
+        if entry and entry[0] <= now:
+            _entries.pop(user_id, None)
+            entry = None
+
+    if entry:
+        return db.merge(entry[1], load=False)
+
+    user = (
+        db.query(User)
+        .options(joinedload(User.teacher_profile))
+        .filter(User.id == user_id)
+        .first()
+    )
+    if not user:
+        return None
+
+    # Detach the freshly loaded row (teacher_profile cascades with it) and
+    # hand the request a session-bound copy.
+    db.expunge(user)
+
+    with _lock:
+        if len(_entries) >= USER_CACHE_MAX_ENTRIES:
+            _evict(now)
+        _entries[user_id] = (now + USER_CACHE_TTL_SECONDS, user)
+        _token_versions[user_id] = (now + USER_CACHE_TTL_SECONDS, user.token_version or 0)
+
+    return db.merge(user, load=False)
+
+
+def get_token_version(db: Session, user_id: int) -> Optional[int]:
+    """
+    Current token_version for a user, or None if the user no longer exists.
+    Served from memory when possible; otherwise a single-column primary key lookup.
+    """
+    now = time.monotonic()
+
+    with _lock:
+        entry = _token_versions.get(user_id)
+    if entry and entry[0] > now:
+        return entry[1]
+
+    row = db.query(User.token_version).filter(User.id == user_id).first()
+    if row is None:
+        return None
+
+    version = row[0] or 0
+    with _lock:
+        if len(_token_versions) >= USER_CACHE_MAX_ENTRIES:
+            _token_versions.clear()
+        _token_versions[user_id] = (now + USER_CACHE_TTL_SECONDS, version)
+    return version
+
+
+def invalidate_user(user_id: int) -> None:
+    """Drop a user from the cache after their row or teacher profile changed."""
+    with _lock:
+        _entries.pop(user_id, None)
+        _token_versions.pop(user_id, None)
+
+
+def clear_user_cache() -> None:
+    with _lock:
+        _entries.clear()
+        _token_versions.clear()
+
+
+def _evict(now: float) -> None:
+    # Caller holds _lock. Remove expired entries first, then the oldest ones.
+    for uid in [uid for uid, (expires_at, _) in _entries.items() if expires_at <= now]:
+        del _entries[uid]
+
+    while len(_entries) >= USER_CACHE_MAX_ENTRIES:
+        del _entries[next(iter(_entries))]
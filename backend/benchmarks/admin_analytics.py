@@ -0,0 +1,149 @@
+"""
+Admin analytics benchmark.
+
+Seeds a throwaway SQLite database with a term's worth of quiz attempts,
+builds the score rollups, then compares:
+
+    old    group every (student, topic) pair from progress_tracking and
+           serialize one object per row (what /progress/admin/analytics did)
+    page   first page of the rollup-backed, columnar endpoint
+    walk   every page, following next_cursor to the end
+
+and checks the pages together hold the same (student, topic) totals as the
+old response.
+
+Run from the backend/ directory:
+
+    python -m benchmarks.admin_analytics
+    python -m benchmarks.admin_analytics --students 2000 --attempts 60 --limit 1000
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+
+def seed(db, students: int, attempts: int):
+    from app import models
+
+    rng = random.Random(17)
+    subjects = [models.Subject(name=f"Subject {i}", level="ss1", department="science") for i in range(8)]
+    db.add_all(subjects)
+    db.flush()
+    topics = [models.Topic(title=f"{s.name} week {w}", subject_id=s.id, level="ss1", week_number=w)
+              for s in subjects for w in range(1, 13)]
+    db.add_all(topics)
+    db.flush()
+
+    users = [models.User(username=f"aa{n}", email=f"aa{n}@bench.local", hashed_password="x",
+                         role="student", level="ss1") for n in range(students)]
+    db.add_all(users)
+    db.flush()
+
+    now = datetime.utcnow()
+    rows = []
+    for user in users:
+        for _ in range(attempts):
+            total = rng.choice([5, 10])
+            rows.append({"user_id": user.id, "topic_id": rng.choice(topics).id, "score": rng.randint(0, total),
+                         "total_questions": total, "completed_at": now - timedelta(minutes=rng.randint(0, 60 * 24 * 90))})
+    db.bulk_insert_mappings(models.ProgressTracking, rows)
+    db.commit()
+
+
+def old_response(db):
+    from sqlalchemy import func
+    from app.models import ProgressTracking, Subject, Topic, User
+
+    rows = (
+        db.query(User.id, User.username, Topic.title, Subject.name,
+                 func.sum(ProgressTracking.score), func.sum(ProgressTracking.total_questions))
+        .join(User, ProgressTracking.user_id == User.id)
+        .join(Topic, ProgressTracking.topic_id == Topic.id)
+        .join(Subject, Topic.subject_id == Subject.id)
+        .group_by(User.id, Topic.id, Subject.name, Topic.title)
+        .all()
+    )
+    body = json.dumps([
+        {"user_id": r[0], "username": r[1], "topic": r[2], "subject": r[3], "total_score": r[4], "total_questions": r[5]}
+        for r in rows
+    ])
+    return rows, body
+
+
+def new_page(db, cursor=None, limit=500):
+    from app.routers.progress import get_admin_analytics
+
+    response = get_admin_analytics(subject=None, level=None, date_from=None, date_to=None, cursor=cursor,
+                                   limit=limit, db=db, admin=None)
+    return response, response.model_dump_json()
+
+
+def timed(fn, *args, **kwargs):
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, (time.perf_counter() - started) * 1000
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=1000)
+    parser.add_argument("--attempts", type=int, default=60, help="quiz attempts per student")
+    parser.add_argument("--limit", type=int, default=500)
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'analytics.db')}"
+
+    from app.database import Base, SessionLocal, engine
+    from app.schema_upgrades import create_query_indexes
+    from app.services.score_rollups import rebuild
+    import app.routers.progress  # noqa: F401 (keep the import out of the timings)
+
+    Base.metadata.create_all(bind=engine)
+    create_query_indexes(engine)
+    db = SessionLocal()
+    seed(db, args.students, args.attempts)
+    rebuild(db)
+
+    (old_rows, old_body), old_ms = timed(old_response, db)
+    (_, page_body), page_ms = timed(new_page, db, limit=args.limit)
+
+    walked = {}
+    pages = 0
+    started = time.perf_counter()
+    cursor = None
+    while True:
+        response, _ = new_page(db, cursor=cursor, limit=args.limit)
+        pages += 1
+        columns = response.student_topic_scores
+        for user_id, topic, score, total in zip(columns.user_id, columns.topic, columns.total_score,
+                                                columns.total_questions):
+            walked[(user_id, topic)] = (score, total)
+        cursor = response.next_cursor
+        if cursor is None:
+            break
+    walk_ms = (time.perf_counter() - started) * 1000
+    db.close()
+
+    expected = {(r[0], r[2]): (float(r[4]), r[5]) for r in old_rows}
+    print(f"{len(old_rows)} (student, topic) rows from {args.students * args.attempts} attempts")
+    print(f"{'old (all rows)':<22}{old_ms:>10.1f} ms{len(old_body) / 1024:>10.0f} KB")
+    print(f"{'first page':<22}{page_ms:>10.1f} ms{len(page_body) / 1024:>10.0f} KB")
+    print(f"{f'walk ({pages} pages)':<22}{walk_ms:>10.1f} ms")
+
+    print()
+    if walked != expected:
+        missing = [k for k in expected if walked.get(k) != expected[k]][:3]
+        print(f"❌ paginated rows differ from the old response, e.g. {missing}")
+        return 1
+    print("✅ Pages cover every (student, topic) row with the same totals")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
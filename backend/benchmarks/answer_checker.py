@@ -0,0 +1,137 @@
+"""
+Theory-answer checker benchmark (local sentence model, CPU).
+
+Grades the same set of (student answer, reference answer) pairs two ways
+and reports answers graded per second:
+
+    one-by-one   check_answer per answer (the submit_answers loop)
+    batched      check_answers over the whole set, for each --batch-sizes
+
+and checks every batched verdict and similarity matches the one-by-one
+result. With real weights it also checks paraphrases score above unrelated
+answers.
+
+app/sentence_model ships without its weight file in some checkouts; point
+--model at a full copy, or pass --random-weights to initialise the same
+architecture from its config (timings are unaffected, accuracy is skipped).
+
+Run from the backend/ directory:
+
+    python -m benchmarks.answer_checker
+    python -m benchmarks.answer_checker --answers 500 --batch-sizes 16,64,128
+    python -m benchmarks.answer_checker --random-weights
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+PAIRS = [
+    ("Photosynthesis is how plants make food from sunlight, water and carbon dioxide.",
+     "Plants use light energy to turn carbon dioxide and water into glucose.",
+     "The French revolution started in 1789."),
+    ("The mitochondria produce energy for the cell.",
+     "Mitochondria are the powerhouse of the cell and release energy.",
+     "A noun is the name of a person, animal, place or thing."),
+    ("Evaporation is when a liquid changes into a gas.",
+     "Evaporation is the change of state from liquid to vapour.",
+     "Lagos was the capital of Nigeria before Abuja."),
+    ("An acid has a pH below 7.",
+     "Acids are substances with pH less than seven.",
+     "Supply and demand set the price of goods in a market."),
+]
+
+
+def build_pairs(count: int):
+    """Distinct (student, reference) pairs, half paraphrases and half unrelated."""
+    pairs = []
+    for n in range(count):
+        reference, paraphrase, unrelated = PAIRS[n % len(PAIRS)]
+        student = paraphrase if n % 2 == 0 else unrelated
+        pairs.append((f"{student} ({n})", reference))
+    return pairs
+
+
+def random_weights_copy(source: str) -> str:
+    """The bundled model directory with freshly initialised weights (same architecture)."""
+    from transformers import BertConfig, BertModel
+
+    target = os.path.join(tempfile.mkdtemp(), "sentence_model")
+    shutil.copytree(source, target)
+    BertModel(BertConfig.from_pretrained(source)).save_pretrained(target)
+    return target
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--answers", type=int, default=200)
+    parser.add_argument("--batch-sizes", default="1,16,64")
+    parser.add_argument("--model", help="sentence model directory (default: SENTENCE_MODEL_PATH)")
+    parser.add_argument("--random-weights", action="store_true")
+    args = parser.parse_args()
+
+    from app import config
+
+    model_path = args.model or config.SENTENCE_MODEL_PATH
+    if args.random_weights:
+        model_path = random_weights_copy(model_path)
+    config.SENTENCE_MODEL_PATH = model_path
+    config.EMBEDDING_BACKEND = "local"
+
+    from app.services import answer_checker
+
+    answer_checker.SENTENCE_MODEL_PATH = model_path
+    answer_checker.EMBEDDING_BACKEND = "local"
+
+    started = time.perf_counter()
+    if answer_checker.get_local_model() is None:
+        print(f"❌ Could not load the sentence model from {model_path}: {answer_checker._model_error}")
+        print("   Pass --model with a full copy of the model, or --random-weights for timings only")
+        return 1
+    load_ms = (time.perf_counter() - started) * 1000
+
+    import torch
+    pairs = build_pairs(args.answers)
+    answer_checker.check_answers(pairs[:8])  # warm-up
+
+    print(f"model load {load_ms:.0f} ms, {args.answers} answers, {torch.get_num_threads()} CPU threads")
+    print(f"{'':<18}{'seconds':>10}{'answers/s':>12}")
+
+    started = time.perf_counter()
+    serial = [answer_checker.check_answer(user, reference) for user, reference in pairs]
+    serial_s = time.perf_counter() - started
+    print(f"{'one-by-one':<18}{serial_s:>10.2f}{len(pairs) / serial_s:>12.0f}")
+
+    failures = []
+    for batch_size in [int(b) for b in args.batch_sizes.split(",")]:
+        answer_checker.EMBEDDING_BATCH_SIZE = batch_size
+        started = time.perf_counter()
+        batched = answer_checker.check_answers(pairs)
+        batched_s = time.perf_counter() - started
+        print(f"{f'batched ({batch_size})':<18}{batched_s:>10.2f}{len(pairs) / batched_s:>12.0f}")
+
+        for n, (one, many) in enumerate(zip(serial, batched)):
+            if one[0] != many[0] or one[1] != many[1] or abs(one[2] - many[2]) > 1e-3:
+                failures.append(f"answer {n}: batch size {batch_size} gave {many}, one-by-one {one}")
+                break
+
+    if not args.random_weights:
+        paraphrase = min(result[2] for result in serial[0::2])
+        unrelated = max(result[2] for result in serial[1::2])
+        print(f"lowest paraphrase similarity {paraphrase:.2f}, highest unrelated {unrelated:.2f}")
+        if paraphrase <= unrelated:
+            failures.append("some unrelated answer scored as high as a paraphrase")
+
+    print()
+    for failure in failures:
+        print(f"❌ {failure}")
+    if not failures:
+        print("✅ Batched grading matches one-by-one grading")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,257 @@
+"""
+Concurrent assignment grading check and benchmark, against a local stub model.
+
+Starts an OpenAI-compatible stub (/v1/chat/completions) that answers after
+--latency seconds with a score derived from the student's answer, points
+the OpenAI clients at it, seeds a throwaway SQLite database with an
+assignment of theory and objective questions, and submits it two ways:
+
+    serial   one grade_theory_answer call per theory answer inside the open
+             transaction (what crud.submit_assignment did before)
+    new      crud.submit_assignment: answer key read, transaction ended,
+             theory answers graded concurrently, then one write transaction
+
+and checks:
+
+    - per-answer scores and submission scores are identical
+    - no pool connection is checked out while the new path grades
+    - no more than GRADING_CONCURRENCY calls are in flight at once
+    - unparseable replies and calls past GRADING_TIMEOUT_SECONDS score 0.0
+
+Run from the backend/ directory:
+
+    python -m benchmarks.assignment_grading
+    python -m benchmarks.assignment_grading --theory 20 --latency 0.5 --concurrency 8
+"""
+
+import argparse
+import asyncio
+import hashlib
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+
+class StubModel:
+    """Counts concurrent calls and the DB connections checked out during them."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.checked_out = []
+        self.engine = None
+
+    def app(self):
+        from fastapi import FastAPI, Request
+
+        app = FastAPI()
+
+        @app.post("/v1/chat/completions")
+        async def chat_completions(request: Request):
+            body = await request.json()
+            prompt = body["messages"][-1]["content"]
+            student = prompt.split("Student Answer:")[1].split("Score between")[0].strip()
+
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            if self.engine is not None:
+                self.checked_out.append(self.engine.pool.checkedout())
+            try:
+                await asyncio.sleep(self.latency * (20 if student.startswith("SLOW") else 1))
+            finally:
+                self.in_flight -= 1
+
+            if student.startswith("GARBAGE"):
+                content = "ten out of ten"
+            else:
+                content = str(int(hashlib.sha1(student.encode()).hexdigest(), 16) % 11)
+            return {
+                "id": "stub", "object": "chat.completion", "created": 0, "model": body["model"],
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": content}}],
+                "usage": {"prompt_tokens": 0, "completion_tokens": 1, "total_tokens": 1},
+            }
+
+        return app
+
+
+def start_stub(stub: StubModel) -> str:
+    import uvicorn
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(stub.app(), host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}/v1"
+
+
+def seed(db, theory: int, objective: int, students: int):
+    from app import models
+
+    subject = models.Subject(name="Literature", level="ss1", department="arts")
+    db.add(subject)
+    db.flush()
+    teacher = models.User(username="ag-teacher", email="ag-teacher@bench.local", hashed_password="x", role="teacher")
+    users = [models.User(username=f"ag{n}", email=f"ag{n}@bench.local", hashed_password="x", role="student",
+                         level="ss1") for n in range(students)]
+    db.add_all([teacher] + users)
+    db.flush()
+    assignment = models.Assignment(title="Essay week", subject_id=subject.id, class_level="ss1",
+                                   teacher_id=teacher.id, due_date=datetime(2030, 1, 1))
+    db.add(assignment)
+    db.flush()
+    theory_questions = [models.AssignmentTheoryQuestion(assignment_id=assignment.id, question_text=f"Discuss {n}",
+                                                        model_answer=f"Model answer {n}") for n in range(theory)]
+    objective_questions = [models.AssignmentObjectiveQuestion(assignment_id=assignment.id, question_text=f"Pick {n}",
+                                                              option1="a", option2="b", option3="c", option4="d",
+                                                              correct_option="option2") for n in range(objective)]
+    db.add_all(theory_questions + objective_questions)
+    db.commit()
+    return assignment.id, [u.id for u in users], [q.id for q in theory_questions], [q.id for q in objective_questions]
+
+
+def submission(assignment_id, student_id, theory_ids, objective_ids):
+    from app import schemas
+
+    theory_answers = [{"question_id": qid, "answer": f"Student {student_id} on {qid}"} for qid in theory_ids]
+    theory_answers[0]["answer"] = "GARBAGE reply"
+    theory_answers.append({"question_id": 999999, "answer": "not in this assignment"})
+    objective_answers = [{"question_id": qid, "selected_option": "option2" if (qid + student_id) % 3 else "option3"}
+                         for qid in objective_ids]
+    return schemas.AssignmentSubmissionCreate(assignment_id=assignment_id, student_id=student_id, file_url="",
+                                              theory_answers=theory_answers, objective_answers=objective_answers)
+
+
+def serial_submit(db, submission):
+    """crud.submit_assignment before: grade each theory answer inside the open transaction."""
+    from app import models
+    from app.services.grading import grade_theory_answer
+    from app.services.score_rollups import record_subject_attempt
+
+    db_submission = models.AssignmentSubmission(assignment_id=submission.assignment_id,
+                                                student_id=submission.student_id, file_url=submission.file_url,
+                                                submitted_at=datetime.utcnow(),
+                                                status="submitted")
+    db.add(db_submission)
+    db.flush()
+    correct = total = 0
+    for ta in submission.theory_answers:
+        q = db.query(models.AssignmentTheoryQuestion).filter_by(id=ta.question_id,
+                                                                assignment_id=submission.assignment_id).first()
+        if not q:
+            continue
+        score = grade_theory_answer(q.model_answer, ta.student_answer)
+        correct += score >= 1.0
+        total += 1
+        db.add(models.AssignmentTheoryAnswer(submission_id=db_submission.id, question_id=ta.question_id,
+                                             student_answer=ta.student_answer, score=score))
+    for oa in submission.objective_answers:
+        q = db.query(models.AssignmentObjectiveQuestion).filter_by(id=oa.question_id,
+                                                                   assignment_id=submission.assignment_id).first()
+        is_correct = oa.selected_option == q.correct_option
+        correct += is_correct
+        total += 1
+        db.add(models.AssignmentObjectiveAnswer(submission_id=db_submission.id, question_id=oa.question_id,
+                                                selected_option=oa.selected_option, is_correct=is_correct))
+    db_submission.score = round(correct, 2)
+    db_submission.status = "completed"
+    subject_id = db.query(models.Assignment.subject_id).filter_by(id=submission.assignment_id).scalar()
+    record_subject_attempt(db, submission.student_id, subject_id, "assignment", db_submission.score, total,
+                           db_submission.submitted_at)
+    db.commit()
+    return db_submission
+
+
+def theory_scores(db, submission_id):
+    from app.models import AssignmentTheoryAnswer
+
+    return sorted((a.question_id, a.score) for a in db.query(AssignmentTheoryAnswer).filter_by(submission_id=submission_id))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--theory", type=int, default=10)
+    parser.add_argument("--objective", type=int, default=5)
+    parser.add_argument("--students", type=int, default=3, help="submissions per path")
+    parser.add_argument("--latency", type=float, default=0.2, help="stub model seconds per call")
+    parser.add_argument("--concurrency", type=int, default=5)
+    args = parser.parse_args()
+
+    stub = StubModel(args.latency)
+    os.environ["OPENAI_BASE_URL"] = start_stub(stub)
+    os.environ["OPENAI_API_KEY"] = "stub"
+    os.environ["GRADING_CONCURRENCY"] = str(args.concurrency)
+    os.environ["GRADING_TIMEOUT_SECONDS"] = str(args.latency * 5)
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'grading.db')}"
+
+    from app import crud
+    from app.database import Base, SessionLocal, engine
+    from app.services.grading import grade_theory_answers
+
+    Base.metadata.create_all(bind=engine)
+    stub.engine = engine
+    db = SessionLocal()
+    assignment_id, students, theory_ids, objective_ids = seed(db, args.theory, args.objective, args.students * 2)
+
+    failures = []
+    timings = {"serial": 0.0, "new": 0.0}
+    checked_out = {}
+    for old_student, new_student in zip(students[:args.students], students[args.students:]):
+        # Same answers for both students, so the stub gives the same scores
+        old_request = submission(assignment_id, old_student, theory_ids, objective_ids)
+        new_request = old_request.model_copy(update={"student_id": new_student})
+
+        stub.checked_out.clear()
+        started = time.perf_counter()
+        old = serial_submit(db, old_request)
+        timings["serial"] += time.perf_counter() - started
+        checked_out["serial"] = max(stub.checked_out)
+
+        stub.checked_out.clear()
+        stub.max_in_flight = 0
+        started = time.perf_counter()
+        new = crud.submit_assignment(db, new_request)
+        timings["new"] += time.perf_counter() - started
+        checked_out["new"] = max(stub.checked_out)
+
+        if (old.score, old.status) != (new.score, new.status) or theory_scores(db, old.id) != theory_scores(db, new.id):
+            failures.append(f"student {new_student}: scores differ from serial grading")
+        if stub.max_in_flight > args.concurrency:
+            failures.append(f"{stub.max_in_flight} grading calls in flight (limit {args.concurrency})")
+
+    try:
+        crud.submit_assignment(db, new_request)
+        failures.append("a second submission was accepted")
+    except ValueError:
+        pass
+
+    print(f"{args.theory} theory + {args.objective} objective answers, stub latency {args.latency * 1000:.0f} ms, "
+          f"concurrency {args.concurrency}")
+    for path in ("serial", "new"):
+        print(f"{path:<8}{timings[path] / args.students * 1000:>10.0f} ms per submission, "
+              f"{checked_out[path]} pool connection(s) held while grading")
+
+    if checked_out["new"]:
+        failures.append("the new path holds a pool connection while grading")
+    if grade_theory_answers([("Model answer", "SLOW reply")]) != [0.0]:
+        failures.append("a timed-out grading call did not score 0.0")
+    db.close()
+
+    print()
+    for failure in failures:
+        print(f"❌ {failure}")
+    if not failures:
+        print("✅ Concurrent grading matches serial grading without holding a connection")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
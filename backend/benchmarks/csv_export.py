@@ -0,0 +1,173 @@
+"""
+Streaming CSV export benchmark.
+
+Seeds a throwaway SQLite database with progress rows and downloads
+/progress/export/csv two ways, measuring peak Python memory (tracemalloc):
+
+    buffered   query(...).all() into a StringIO, then stream it
+               (what export_progress_csv did before)
+    streamed   csv_export_response: yield_per batches written as they arrive
+
+Also checks the streamed export matches the buffered one row for row, that
+?gzip=true decompresses to the same bytes, and that the filters apply.
+
+Run from the backend/ directory:
+
+    python -m benchmarks.csv_export
+    python -m benchmarks.csv_export --rows 500000
+"""
+
+import argparse
+import asyncio
+import csv
+import gzip
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+
+def seed(db, rows: int):
+    from app import models
+
+    rng = random.Random(18)
+    subjects = [models.Subject(name=f"Subject {i}", level="ss1", department="") for i in range(4)]
+    db.add_all(subjects)
+    db.flush()
+    topics = [models.Topic(title=f"{s.name} week {w}", subject_id=s.id, level="ss1", week_number=w)
+              for s in subjects for w in range(1, 11)]
+    users = [models.User(username=f"ce{n}", email=f"ce{n}@bench.local", hashed_password="x", role="student",
+                         full_name=f"Student {n}", level=rng.choice(["ss1", "ss2"])) for n in range(500)]
+    db.add_all(topics + users)
+    db.flush()
+
+    started = datetime(2025, 1, 1)
+    for start in range(0, rows, 10000):
+        db.bulk_insert_mappings(models.ProgressTracking, [
+            {"user_id": rng.choice(users).id, "topic_id": rng.choice(topics).id, "score": rng.randint(0, 10),
+             "total_questions": 10, "completed_at": started + timedelta(minutes=i)}
+            for i in range(start, min(start + 10000, rows))
+        ])
+    db.commit()
+
+
+def buffered_export(db):
+    from app.models import ProgressTracking
+
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(["User ID", "Topic ID", "Score", "Total Questions", "Completed At"])
+    for record in db.query(ProgressTracking).all():
+        writer.writerow([record.user_id, record.topic_id, record.score, record.total_questions,
+                         record.completed_at.strftime("%Y-%m-%d %H:%M:%S") if record.completed_at else ""])
+    output.seek(0)
+    return output.getvalue().encode()
+
+
+async def drain(response) -> int:
+    """Bytes in a StreamingResponse body, consumed the way the server sends it (nothing kept)."""
+    size = 0
+    async for chunk in response.body_iterator:
+        size += len(chunk)
+    return size
+
+
+async def download(app, url: str) -> bytes:
+    import httpx
+
+    body = bytearray()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        async with client.stream("GET", url) as response:
+            response.raise_for_status()
+            async for chunk in response.aiter_raw():
+                body.extend(chunk)
+    return bytes(body)
+
+
+def measure(fn, *args):
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = fn(*args)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed * 1000, peak / 1024 / 1024
+
+
+NO_FILTERS = {"date_from": None, "date_to": None, "level": None, "subject": None, "gzip": False}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200000)
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'export.db')}"
+
+    from fastapi import FastAPI
+    from app.database import Base, SessionLocal, engine
+    from app.dependencies import get_current_admin_user
+    from app.routers import progress
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    seed(db, args.rows)
+
+    app = FastAPI()
+    app.include_router(progress.router)
+    app.dependency_overrides[get_current_admin_user] = lambda: None
+
+    def streamed(**filters):
+        response = progress.export_progress_csv(**{**NO_FILTERS, **filters}, current_user=None)
+        return asyncio.run(drain(response))
+
+    old, old_ms, old_mb = measure(buffered_export, db)
+    db.close()
+    new_size, new_ms, new_mb = measure(streamed)
+    gz_size, gz_ms, gz_mb = measure(lambda: streamed(gzip=True))
+
+    print(f"{args.rows} progress rows")
+    print(f"{'':<12}{'ms':>10}{'peak MB':>10}{'body MB':>10}")
+    print(f"{'buffered':<12}{old_ms:>10.0f}{old_mb:>10.1f}{len(old) / 1024 / 1024:>10.1f}")
+    print(f"{'streamed':<12}{new_ms:>10.0f}{new_mb:>10.1f}{new_size / 1024 / 1024:>10.1f}")
+    print(f"{'gzip':<12}{gz_ms:>10.0f}{gz_mb:>10.1f}{gz_size / 1024 / 1024:>10.1f}")
+
+    # Content checks go through HTTP (httpx buffers the body, so they are not measured)
+    new = asyncio.run(download(app, "/progress/export/csv"))
+    packed = asyncio.run(download(app, "/progress/export/csv?gzip=true"))
+
+    failures = []
+    old_rows = list(csv.reader(io.StringIO(old.decode())))[1:]
+    new_rows = list(csv.reader(io.StringIO(new.decode())))
+    # The new export adds Student, Level, Subject and Topic columns
+    if [[r[0], r[4], r[6], r[7], r[8]] for r in new_rows[1:]] != old_rows:
+        failures.append("streamed rows differ from the buffered export")
+    if gzip.decompress(packed) != new:
+        failures.append("gzip export does not decompress to the plain export")
+    if new_mb > old_mb / 5:
+        failures.append(f"streamed export peaked at {new_mb:.1f} MB (buffered {old_mb:.1f} MB)")
+
+    day = date(2025, 1, 2)
+    filtered = asyncio.run(download(
+        app, f"/progress/export/csv?date_from={day}&date_to={day}&level=SS1&subject=subject%201"))
+    filtered_rows = list(csv.reader(io.StringIO(filtered.decode())))[1:]
+    if not filtered_rows or any(r[2] != "ss1" or r[3] != "Subject 1" or not r[8].startswith(str(day))
+                                for r in filtered_rows):
+        failures.append("filters not applied")
+    print(f"filtered (one day, ss1, Subject 1): {len(filtered_rows)} rows")
+
+    print()
+    for failure in failures:
+        print(f"❌ {failure}")
+    if not failures:
+        print("✅ Streamed export matches the buffered one")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,173 @@
+"""
+Student dashboard query-count and class-cache check.
+
+Builds the dashboard for students whose class has different numbers of
+periods today and assignments, and checks the number of SQL statements is
+the same for all of them (no per-period or per-assignment queries), both
+with a cold and a warm class segment. Also checks the topic fallback
+(current week, else the latest earlier week, else "no topic"), that a class
+loading the dashboard concurrently builds its segment once, and that
+committing a topic change invalidates it.
+
+Run from the backend/ directory:
+
+    python -m benchmarks.dashboard_queries
+"""
+
+import os
+import sys
+import tempfile
+from datetime import date, datetime, timedelta
+
+# (level, periods today, assignments)
+CLASSES = [("jss1", 1, 1), ("jss2", 4, 10), ("jss3", 8, 60)]
+
+
+def seed(db, academic_week: int):
+    from app import models
+
+    weekday = date.today().strftime("%A")
+    students = {}
+    for level, periods, assignment_count in CLASSES:
+        subjects = [models.Subject(name=f"{level} subject {p}", level=level, department="") for p in range(periods)]
+        db.add_all(subjects)
+        db.flush()
+
+        for p, subject in enumerate(subjects):
+            db.add(models.Timetable(level=level.upper(), day=weekday, period=p + 1, subject_id=subject.id,
+                                    start_time=f"{8 + p:02d}:00", end_time=f"{8 + p:02d}:40"))
+            # Cycle through: topic this week / only an earlier week / none at all
+            if p % 3 == 0:
+                db.add(models.Topic(title=f"{subject.name} now", subject_id=subject.id, level=level, week_number=academic_week))
+                db.add(models.Topic(title=f"{subject.name} old", subject_id=subject.id, level=level, week_number=max(academic_week - 1, 1)))
+            elif p % 3 == 1 and academic_week > 1:
+                db.add(models.Topic(title=f"{subject.name} old", subject_id=subject.id, level=level, week_number=academic_week - 1))
+
+        teacher = models.User(username=f"{level}_teacher", email=f"{level}_teacher@bench.local",
+                              hashed_password="x", role="teacher")
+        student = models.User(username=f"{level}_student", email=f"{level}_student@bench.local",
+                              hashed_password="x", role="student", level=level)
+        db.add_all([teacher, student])
+        db.flush()
+
+        assignments = [
+            models.Assignment(title=f"{level} assignment {i}", due_date=datetime.utcnow() + timedelta(days=i),
+                              subject_id=subjects[i % periods].id, class_level=level.upper(), teacher_id=teacher.id)
+            for i in range(assignment_count)
+        ]
+        db.add_all(assignments)
+        db.flush()
+        db.add_all([
+            models.AssignmentSubmission(assignment_id=a.id, student_id=student.id, file_url="x")
+            for a in assignments[::2]
+        ])
+        students[level] = student.id
+
+    db.add(models.ScheduledEvent(title="Exams", event_type="exam", date=date.today() + timedelta(days=10)))
+    db.commit()
+    return students
+
+
+def main() -> int:
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'dashboard.db')}"
+
+    from app import models
+    from app.database import Base, SessionLocal, engine
+    from app.services.dashboard_cache import invalidate_class_segments
+    from app.services.query_profiler import capture_queries
+    from app.services.student_dashboard_service import get_academic_week_number, get_student_dashboard_data
+
+    Base.metadata.create_all(bind=engine)
+    academic_week = get_academic_week_number()
+    db = SessionLocal()
+    students = seed(db, academic_week)
+
+    failures = []
+    counts = {}
+    for level, periods, assignment_count in CLASSES:
+        db.expunge_all()
+        student = db.get(models.User, students[level])
+        invalidate_class_segments()
+        with capture_queries() as cold:
+            get_student_dashboard_data(db, student)
+        with capture_queries() as warm:
+            dashboard = get_student_dashboard_data(db, student)
+        counts[level] = (cold.count, warm.count)
+
+        completed = sum(a.status == "completed" for a in dashboard.assignments)
+        print(f"{level}: {periods} periods, {assignment_count} assignments → {cold.count} queries cold, "
+              f"{warm.count} warm ({len(dashboard.today_topics)} topics, {completed} completed)")
+
+        if len(dashboard.today_topics) != periods or len(dashboard.assignments) != assignment_count:
+            failures.append(f"{level}: wrong number of topics/assignments")
+        if completed != (assignment_count + 1) // 2:
+            failures.append(f"{level}: expected {(assignment_count + 1) // 2} completed assignments, got {completed}")
+
+        for p, topic in enumerate(dashboard.today_topics):
+            if p % 3 == 0:
+                expected = f"{topic.subject} now"
+            elif p % 3 == 1 and academic_week > 1:
+                expected = f"{topic.subject} old"
+            else:
+                expected = "No topic available for this week."
+            if topic.topic_title != expected:
+                failures.append(f"{level} period {p + 1}: expected {expected!r}, got {topic.topic_title!r}")
+
+    if len(set(counts.values())) != 1:
+        failures.append(f"query count depends on periods/assignments: {counts}")
+
+    db.close()
+    failures += check_class_cache(students["jss3"])
+
+    print()
+    for failure in failures:
+        print(f"❌ {failure}")
+    if not failures:
+        cold, warm = next(iter(counts.values()))
+        print(f"✅ Constant {cold} queries per dashboard ({warm} with the class segment cached)")
+    return 1 if failures else 0
+
+
+def check_class_cache(student_id: int, class_size: int = 40) -> list:
+    """A class of `class_size` loading at once builds one segment; a topic commit drops it."""
+    from concurrent.futures import ThreadPoolExecutor
+    from app import models
+    from app.database import SessionLocal
+    from app.services.dashboard_cache import dashboard_cache_stats, invalidate_class_segments
+    from app.services.student_dashboard_service import get_student_dashboard_data
+
+    def load(_):
+        db = SessionLocal()
+        try:
+            return get_student_dashboard_data(db, db.get(models.User, student_id))
+        finally:
+            db.close()
+
+    failures = []
+    invalidate_class_segments()
+    before = dashboard_cache_stats()
+    with ThreadPoolExecutor(max_workers=class_size) as pool:
+        list(pool.map(load, range(class_size)))
+    after = dashboard_cache_stats()
+    builds = after["misses"] - before["misses"]
+    print(f"{class_size} concurrent loads → {builds} segment build(s), {after['hits'] - before['hits']} hits")
+    if builds != 1:
+        failures.append(f"expected 1 segment build for {class_size} concurrent loads, got {builds}")
+
+    db = SessionLocal()
+    try:
+        topic = db.query(models.Topic).filter(models.Topic.title.like("jss3 subject 0 now")).one()
+        topic.title = "jss3 subject 0 renamed"
+        db.commit()
+        dashboard = get_student_dashboard_data(db, db.get(models.User, student_id))
+    finally:
+        db.close()
+    titles = {t.topic_title for t in dashboard.today_topics}
+    print(f"after committing a topic change → segment rebuilt: {'jss3 subject 0 renamed' in titles}")
+    if "jss3 subject 0 renamed" not in titles:
+        failures.append("topic change did not invalidate the class segment")
+    return failures
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,206 @@
+"""
+Sync vs async database benchmark.
+
+Serves the same read queries (timetable today, progress summaries) three ways
+and fires concurrent requests at each, reporting requests/second and latency
+percentiles:
+
+    sync      def handler + sync Session (FastAPI runs it in the threadpool)
+    blocking  async def handler + sync Session (blocks the event loop; what
+              parents.py did before the async port)
+    async     async def handler + AsyncSession
+
+Seeds a throwaway SQLite database unless DATABASE_URL is set. Run from the
+backend/ directory:
+
+    python -m benchmarks.db_modes --requests 2000 --concurrency 64
+    DATABASE_URL=postgresql://... python -m benchmarks.db_modes --no-seed
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import httpx
+
+ENDPOINTS = ["timetable", "my-summary", "subject-summary"]
+MODES = ["sync", "blocking", "async"]
+LEVEL = "jss1"
+
+
+def seed(students: int, subjects: int, topics_per_subject: int, progress_per_student: int):
+    from app import models
+    from app.database import Base, SessionLocal, engine
+
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(7)
+    db = SessionLocal()
+    try:
+        subject_rows = [models.Subject(name=f"Subject {i}", level=LEVEL, department="") for i in range(subjects)]
+        db.add_all(subject_rows)
+        db.flush()
+
+        topics = [
+            models.Topic(title=f"Topic {s.id}.{w}", subject_id=s.id, level=LEVEL, week_number=w)
+            for s in subject_rows for w in range(1, topics_per_subject + 1)
+        ]
+        db.add_all(topics)
+
+        today = datetime.today().strftime("%A")
+        db.add_all([
+            models.Timetable(level=LEVEL, day=today, period=p, subject_id=subject_rows[p % subjects].id,
+                             start_time="08:00", end_time="08:40")
+            for p in range(1, 9)
+        ])
+
+        users = [
+            models.User(username=f"bench_student_{i}", email=f"bench_student_{i}@bench.local",
+                        hashed_password="x", role="student", level=LEVEL)
+            for i in range(students)
+        ]
+        db.add_all(users)
+        db.flush()
+
+        now = datetime.utcnow()
+        db.add_all([
+            models.ProgressTracking(
+                user_id=u.id,
+                topic_id=rng.choice(topics).id,
+                score=rng.randint(0, 10),
+                total_questions=10,
+                completed_at=now - timedelta(days=rng.randint(0, 90)),
+            )
+            for u in users for _ in range(progress_per_student)
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+
+def build_app():
+    from fastapi import Depends, FastAPI
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from sqlalchemy.orm import Session
+
+    from app.database import get_async_db, get_db
+    from app.routers.progress import my_summary_query, subject_summary_query
+    from app.routers.timetable import today_timetable_query
+
+    day = datetime.today().strftime("%A").lower()
+    queries = {
+        "timetable": lambda user_id: today_timetable_query(day, LEVEL, ""),
+        "my-summary": my_summary_query,
+        "subject-summary": subject_summary_query,
+    }
+
+    def shape(endpoint, result):
+        if endpoint == "timetable":
+            return [{"id": t.id, "subject": t.subject_rel.name if t.subject_rel else None} for t in result.scalars()]
+        return [dict(row._mapping) for row in result]
+
+    app = FastAPI()
+
+    for endpoint, query in queries.items():
+        def register(endpoint=endpoint, query=query):
+            @app.get(f"/sync/{endpoint}/{{user_id}}")
+            def sync_handler(user_id: int, db: Session = Depends(get_db)):
+                return shape(endpoint, db.execute(query(user_id)))
+
+            @app.get(f"/blocking/{endpoint}/{{user_id}}")
+            async def blocking_handler(user_id: int, db: Session = Depends(get_db)):
+                try:
+                    return shape(endpoint, db.execute(query(user_id)))
+                finally:
+                    # Return the connection before yielding the loop. Left to the
+                    # dependency teardown, a blocked loop can starve the pool and
+                    # every further checkout waits out DB_POOL_TIMEOUT.
+                    db.close()
+
+            @app.get(f"/async/{endpoint}/{{user_id}}")
+            async def async_handler(user_id: int, db: AsyncSession = Depends(get_async_db)):
+                return shape(endpoint, await db.execute(query(user_id)))
+
+        register()
+
+    return app
+
+
+async def run_mode(client, mode: str, args) -> dict:
+    latencies = []
+    failures = 0
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def one(i: int):
+        nonlocal failures
+        endpoint = ENDPOINTS[i % len(ENDPOINTS)]
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.get(f"/{mode}/{endpoint}/{i % args.students + 1}")
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                failures += 1
+
+    # Warm the pools and caches before timing
+    await asyncio.gather(*(one(i) for i in range(min(args.concurrency, args.requests))))
+    latencies.clear()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(args.requests)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    p = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000
+    return {
+        "rps": args.requests / elapsed,
+        "mean": statistics.mean(latencies) * 1000,
+        "p50": p(0.50),
+        "p95": p(0.95),
+        "p99": p(0.99),
+        "failures": failures,
+    }
+
+
+async def run(args) -> None:
+    from app.database import async_engine
+
+    app = build_app()
+    transport = httpx.ASGITransport(app=app)
+
+    print(f"requests {args.requests} per mode, concurrency {args.concurrency}, endpoints {', '.join(ENDPOINTS)}")
+    print(f"{'mode':<10}{'req/s':>10}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'failed':>8}")
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        for mode in args.modes:
+            r = await run_mode(client, mode, args)
+            print(f"{mode:<10}{r['rps']:>10.1f}{r['mean']:>10.1f}{r['p50']:>10.1f}{r['p95']:>10.1f}{r['p99']:>10.1f}{r['failures']:>8}")
+
+    await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--students", type=int, default=200)
+    parser.add_argument("--subjects", type=int, default=10)
+    parser.add_argument("--topics-per-subject", type=int, default=12)
+    parser.add_argument("--progress-per-student", type=int, default=30)
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES)
+    parser.add_argument("--no-seed", action="store_true", help="Use the data already in DATABASE_URL")
+    args = parser.parse_args()
+
+    if not os.getenv("DATABASE_URL"):
+        db_path = os.path.join(tempfile.mkdtemp(), "db_modes_bench.db")
+        os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    if not args.no_seed:
+        seed(args.students, args.subjects, args.topics_per_subject, args.progress_per_student)
+
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Test/exam scoring (POST /answers/submit-test/) query-count check and benchmark.
+
+Seeds a throwaway SQLite database with a subject of 13 weekly topics, then
+submits first tests and exams of growing size two ways:
+
+    old   duplicate check, topic query, question query, then one
+          TopicQuestion query per answer (what submit_test_or_exam did)
+    new   answers.submit_test_or_exam on exam_scoring: duplicate check plus
+          a cached answer key compiled in one query
+
+and checks:
+
+    - scores, totals and percentages match the old path
+    - the new path's query count does not depend on the number of questions
+    - adding a question drops the cached key (the next paper's total grows)
+    - check-submission reports a submitted paper as taken
+
+Run from the backend/ directory:
+
+    python -m benchmarks.exam_scoring
+    python -m benchmarks.exam_scoring --sizes 2,10,40 --students 50
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+
+def seed(db, per_topic: int, students: int, tag: str):
+    from app import models
+
+    rng = random.Random(24)
+    subject = models.Subject(name=f"Chemistry {tag}", level="ss2", department="science")
+    db.add(subject)
+    db.flush()
+    topics = [models.Topic(title=f"Week {w}", subject_id=subject.id, level="ss2", week_number=w) for w in range(1, 14)]
+    users = [models.User(username=f"es{tag}-{n}", email=f"es{tag}-{n}@bench.local", hashed_password="x",
+                         role="student", level="ss2") for n in range(students)]
+    db.add_all(topics + users)
+    db.flush()
+
+    questions = []
+    for topic in topics:
+        for n in range(per_topic):
+            if n % 3:
+                questions.append(models.TopicQuestion(topic_id=topic.id, question=f"Q{n}", answer="b", correct_answer="b",
+                                                      option_a="w", option_b="x", option_c="y", option_d="z",
+                                                      question_type="objective"))
+            else:
+                questions.append(models.TopicQuestion(topic_id=topic.id, question=f"Q{n}", answer=f"Answer {n}",
+                                                      correct_answer=f"Answer {n}", question_type="theory"))
+    db.add_all(questions)
+    db.commit()
+
+    def paper(weeks):
+        answers = []
+        for q in questions:
+            week = next(t.week_number for t in topics if t.id == q.topic_id)
+            if not weeks[0] <= week <= weeks[1]:
+                continue
+            if q.option_a:
+                answers.append({"question_id": q.id, "selected_option": rng.choice(["b", "B ", "c"])})
+            else:
+                answers.append({"question_id": q.id, "user_answer": rng.choice([q.answer, q.answer.upper(), "no idea"])})
+        return answers
+
+    return subject.name, users, paper
+
+
+def old_submit(db, user, subject, test_type, answers):
+    """submit_test_or_exam before exam_scoring (without its own commit-time rollup)."""
+    from decimal import Decimal, ROUND_HALF_UP
+    from sqlalchemy import func
+    from app import models
+    from app.services.score_rollups import record_subject_attempt
+
+    level = user.level.strip().lower()
+    model = models.ExamResult if test_type == "exam" else models.TestResult
+    filters = {"user_id": user.id, "subject": subject, "level": level}
+    if test_type != "exam":
+        filters["test_type"] = test_type
+    if db.query(model).filter_by(**filters).first():
+        raise ValueError("already taken")
+    start_week, end_week = {"first": (1, 6), "second": (7, 11), "exam": (1, 13)}[test_type]
+    topics = db.query(models.Topic).join(models.Subject).filter(
+        func.lower(models.Subject.name) == subject, func.lower(models.Topic.level) == level,
+        models.Topic.week_number >= start_week, models.Topic.week_number <= end_week).all()
+    questions = db.query(models.TopicQuestion).filter(models.TopicQuestion.topic_id.in_([t.id for t in topics])).all()
+    all_ids_set = {q.id for q in questions}
+    total = len(all_ids_set)
+    correct = 0
+    for ans in answers:
+        if ans.question_id not in all_ids_set:
+            continue
+        question = db.query(models.TopicQuestion).filter_by(id=ans.question_id).first()
+        if question.option_a and question.correct_answer:
+            correct += (ans.selected_option or "").strip().lower() == question.correct_answer.strip().lower()
+        elif question.answer:
+            correct += (ans.user_answer or "").strip().lower() == question.answer.strip().lower()
+    percentage = (Decimal(correct) / Decimal(total) * Decimal("100")).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+    db.add(model(user_id=user.id, subject=subject, level=level, test_type=test_type, total_score=correct,
+                 total_questions=total, percentage=percentage))
+    record_subject_attempt(db, user.id, topics[0].subject_id, "exam" if test_type == "exam" else "test", correct, total)
+    db.commit()
+    return {"score": correct, "total": total, "percentage": float(percentage)}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="2,10,40", help="questions per weekly topic")
+    parser.add_argument("--students", type=int, default=20)
+    args = parser.parse_args()
+    sizes = [int(s) for s in args.sizes.split(",")]
+
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'exams.db')}"
+
+    from app import models, schemas
+    from app.database import Base, SessionLocal, engine
+    from app.routers.answers import check_submission, submit_test_or_exam
+    from app.services.exam_scoring import answer_key_cache_stats
+    from app.services.query_profiler import capture_queries
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+
+    failures = []
+    counts = {}
+    print(f"{'questions':<12}{'old ms':>10}{'old queries':>13}{'new ms':>10}{'new queries':>13}")
+    for size in sizes:
+        subject, users, paper = seed(db, size, args.students, str(size))
+        subject = subject.lower()
+        half = len(users) // 2
+        for test_type, weeks in (("first", (1, 6)), ("exam", (1, 13))):
+            answers = paper(weeks)
+            request = schemas.SubmitTestAnswers(test_type=test_type, subject=subject, answers=answers)
+            old_ms = new_ms = 0.0
+            for old_user, new_user in zip(users[:half], users[half:]):
+                with capture_queries() as old_queries:
+                    started = time.perf_counter()
+                    old = old_submit(db, old_user, subject, test_type, request.answers)
+                    old_ms += (time.perf_counter() - started) * 1000
+                with capture_queries() as new_queries:
+                    started = time.perf_counter()
+                    new = submit_test_or_exam(request, db=db, user=new_user)
+                    new_ms += (time.perf_counter() - started) * 1000
+                if (old["score"], old["total"], old["percentage"]) != (new["score"], new["total"], new["percentage"]):
+                    failures.append(f"{test_type} with {len(answers)} questions: {new}, before {old}")
+            counts[(size, test_type)] = new_queries.count  # last (warm) submission
+            label = f"{len(answers)} ({test_type})"
+            print(f"{label:<12}{old_ms / half:>10.2f}{old_queries.count:>13}{new_ms / half:>10.2f}{new_queries.count:>13}")
+
+        if not check_submission(subject=subject, test_type="first", db=db, user=users[-1])["already_taken"]:
+            failures.append("check-submission does not see a submitted test")
+
+    # New questions must reach the next paper
+    topic = db.query(models.Topic).filter_by(week_number=1).first()
+    subject_name = db.get(models.Subject, topic.subject_id).name.lower()
+    student = models.User(username="es-late", email="es-late@bench.local", hashed_password="x", role="student",
+                          level="ss2")
+    before = db.query(models.TestResult).filter_by(subject=subject_name, test_type="first").first().total_questions
+    db.add_all([student, models.TopicQuestion(topic_id=topic.id, question="New", answer="n", correct_answer="n",
+                                              question_type="theory")])
+    db.commit()
+    request = schemas.SubmitTestAnswers(test_type="first", subject=subject_name,
+                                        answers=[{"question_id": 1, "user_answer": "x"}])
+    after = submit_test_or_exam(request, db=db, user=student)["total"]
+    if after != before + 1:
+        failures.append(f"answer key not refreshed after adding a question ({before} → {after})")
+    db.close()
+
+    print(f"answer key cache: {answer_key_cache_stats()}")
+    if len(set(counts.values())) != 1:
+        failures.append(f"query count depends on the paper size: {counts}")
+
+    print()
+    for failure in failures:
+        print(f"❌ {failure}")
+    if not failures:
+        print(f"✅ {next(iter(counts.values()))} queries per submission at every size, same scores as before")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
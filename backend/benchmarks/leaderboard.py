@@ -0,0 +1,156 @@
+"""
+Admin activity leaderboard benchmark.
+
+Seeds a throwaway SQLite database with students holding quiz progress,
+assignment submissions, test and exam results, then ranks the top 5 two ways
+and checks they agree:
+
+    python  joinedload every student's score rows and average in Python
+            (what admin_activity did before)
+    sql     admin_activity.top_students_query: UNION ALL + AVG + ORDER BY LIMIT
+
+Reports wall time and peak Python memory (tracemalloc) for each size.
+
+Run from the backend/ directory:
+
+    python -m benchmarks.leaderboard
+    python -m benchmarks.leaderboard --students 500 2000 5000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+
+def seed(db, students: int, offset: int):
+    from app import models
+
+    rng = random.Random(offset)
+    users = [
+        models.User(username=f"lb{offset + i}", email=f"lb{offset + i}@bench.local", hashed_password="x",
+                    role="student", full_name=f"Student {offset + i}", level="ss1", department="science")
+        for i in range(students)
+    ]
+    db.add_all(users)
+    db.flush()
+
+    topic_id = db.query(models.Topic.id).scalar()
+    assignment_id = db.query(models.Assignment.id).scalar()
+    for u in users:
+        db.add_all([
+            models.ProgressTracking(user_id=u.id, topic_id=topic_id, score=rng.randint(0, 10),
+                                    total_questions=rng.choice([0, 10, 10, 10]))
+            for _ in range(rng.randint(0, 12))
+        ])
+        db.add_all([
+            models.AssignmentSubmission(assignment_id=assignment_id, student_id=u.id, file_url="x",
+                                        score=rng.choice([None, rng.uniform(0, 100)]))
+            for _ in range(rng.randint(0, 6))
+        ])
+        db.add_all([
+            models.TestResult(user_id=u.id, subject="Maths", level="ss1", test_type="test", total_score=5,
+                              total_questions=10, percentage=round(rng.uniform(0, 100), 2))
+            for _ in range(rng.randint(0, 4))
+        ])
+        db.add_all([
+            models.ExamResult(user_id=u.id, subject="Maths", level="ss1", test_type="exam", total_score=5,
+                              total_questions=10, percentage=rng.choice([None, round(rng.uniform(0, 100), 2)]))
+            for _ in range(rng.randint(0, 2))
+        ])
+    db.commit()
+
+
+def python_top_students(db):
+    from sqlalchemy.orm import joinedload
+    from app import models
+
+    students = (
+        db.query(models.User)
+        .filter(models.User.role == "student")
+        .options(
+            joinedload(models.User.progress),
+            joinedload(models.User.assignment_submissions),
+            joinedload(models.User.test_results),
+            joinedload(models.User.exam_results)
+        )
+        .all()
+    )
+    ranked = []
+    for student in students:
+        scores = [(p.score / p.total_questions) * 100 for p in student.progress if p.total_questions]
+        scores += [s.score for s in student.assignment_submissions if s.score is not None]
+        scores += [float(t.percentage) for t in student.test_results if t.percentage is not None]
+        scores += [float(e.percentage) for e in student.exam_results if e.percentage is not None]
+        if scores:
+            ranked.append((student.full_name, round(sum(scores) / len(scores), 2)))
+    return sorted(ranked, key=lambda item: item[1], reverse=True)[:5]
+
+
+def sql_top_students(db):
+    from app.routers.admin_activity import top_students_query
+
+    return [(row.full_name, round(float(row.average_score), 2)) for row in db.execute(top_students_query(limit=5))]
+
+
+def measure(fn, db):
+    db.expunge_all()
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = fn(db)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    db.expunge_all()
+    return result, elapsed * 1000, peak / 1024 / 1024
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, nargs="+", default=[500, 2000])
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'leaderboard.db')}"
+
+    from app import models
+    from app.database import Base, SessionLocal, engine
+    import app.routers.admin_activity  # noqa: F401 (keep the import out of the first timing)
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    teacher = models.User(username="lb_teacher", email="lb_teacher@bench.local", hashed_password="x", role="teacher")
+    subject = models.Subject(name="Maths", level="ss1", department="science")
+    db.add_all([teacher, subject])
+    db.flush()
+    db.add(models.Topic(title="Algebra", subject_id=subject.id, level="ss1", week_number=1))
+    db.add(models.Assignment(title="A1", due_date=datetime.utcnow(), subject_id=subject.id,
+                             class_level="ss1", teacher_id=teacher.id))
+    db.commit()
+
+    failures = []
+    seeded = 0
+    print(f"{'students':>9}{'python ms':>12}{'python MB':>12}{'sql ms':>10}{'sql MB':>10}  same top 5")
+    for total in sorted(args.students):
+        seed(db, total - seeded, seeded)
+        seeded = total
+
+        python_result, python_ms, python_mb = measure(python_top_students, db)
+        sql_result, sql_ms, sql_mb = measure(sql_top_students, db)
+        # Students can tie on the same average, so compare the ranked scores rather than names
+        same = [score for _, score in python_result] == [score for _, score in sql_result]
+        print(f"{total:>9}{python_ms:>12.1f}{python_mb:>12.1f}{sql_ms:>10.1f}{sql_mb:>10.2f}  {'✅' if same else '❌'}")
+        if not same:
+            failures.append(f"{total} students: python {python_result} != sql {sql_result}")
+
+    db.close()
+    for failure in failures:
+        print(f"❌ {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+"""
+Login throughput benchmark.
+
+Seeds a throwaway SQLite database with users, mounts the auth router in-process
+and fires concurrent POST /api/token requests, reporting logins/second and
+latency percentiles. Use the numbers to size BCRYPT_ROUNDS,
+PASSWORD_HASH_WORKERS and the number of uvicorn workers.
+
+Run from the backend/ directory:
+
+    python -m benchmarks.login_throughput --users 200 --requests 400 --concurrency 32
+    BCRYPT_ROUNDS=10 PASSWORD_HASH_WORKERS=8 python -m benchmarks.login_throughput
+
+Against a running server (users bench_user_0..N-1 must already exist):
+
+    python -m benchmarks.login_throughput --url http://localhost:8000 --users 200
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+import httpx
+
+PASSWORD = "bench-password"
+
+
+def seed_users(count: int):
+    from app import models
+    from app.auth import get_password_hash
+    from app.database import Base, SessionLocal, engine
+
+    Base.metadata.create_all(bind=engine)
+
+    # Every user shares one hash; hashing N times would dominate setup time.
+    hashed = get_password_hash(PASSWORD)
+    db = SessionLocal()
+    try:
+        db.add_all([
+            models.User(
+                username=f"bench_user_{i}",
+                email=f"bench_user_{i}@bench.local",
+                hashed_password=hashed,
+                role="student",
+                full_name=f"Bench User {i}",
+                level="jss1",
+            )
+            for i in range(count)
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+
+def build_client(base_url: str):
+    if base_url:
+        return httpx.AsyncClient(base_url=base_url, timeout=60)
+
+    from fastapi import FastAPI
+    from app.routers import auth_router
+
+    app = FastAPI()
+    app.include_router(auth_router.router, prefix="/api")
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60)
+
+
+async def run(args) -> None:
+    latencies = []
+    failures = 0
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async with build_client(args.url) as client:
+        async def one_login(i: int):
+            nonlocal failures
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post(
+                    "/api/token",
+                    data={"username": f"bench_user_{i % args.users}", "password": PASSWORD},
+                )
+                latencies.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    failures += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one_login(i) for i in range(args.requests)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    p = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000
+
+    print(f"requests     : {args.requests} ({failures} failed)")
+    print(f"concurrency  : {args.concurrency}")
+    print(f"bcrypt rounds: {os.getenv('BCRYPT_ROUNDS', '12')}, hash workers: {os.getenv('PASSWORD_HASH_WORKERS', 'default')}")
+    print(f"throughput   : {args.requests / elapsed:.1f} logins/s")
+    print(f"latency ms   : mean {statistics.mean(latencies) * 1000:.1f}, p50 {p(0.50):.1f}, p95 {p(0.95):.1f}, p99 {p(0.99):.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--url", default="", help="Benchmark a running server instead of an in-process app")
+    args = parser.parse_args()
+
+    if not args.url:
+        db_path = os.path.join(tempfile.mkdtemp(), "login_bench.db")
+        os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+        seed_users(args.users)
+
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Progress time-series check and benchmark.
+
+Seeds a throwaway SQLite database with a term of quiz attempts, builds the
+student_daily_scores rollup, then for every student and bucket (day, ISO
+week, month, term week):
+
+    checks    time_buckets.bucket_rows over daily_rows_query gives the same
+              labels, attempts and totals as grouping the raw attempts
+    times     the old shape (group progress_tracking rows by day) against
+              reading the daily rollup, and reports rows read per series
+
+Run from the backend/ directory:
+
+    python -m benchmarks.progress_series
+    python -m benchmarks.progress_series --students 50 --attempts-per-day 20
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+
+def seed(db, students: int, days: int, per_day: int, term_start):
+    from app import models
+
+    rng = random.Random(19)
+    subjects = [models.Subject(name=f"Subject {i}", level="ss1", department="") for i in range(6)]
+    db.add_all(subjects)
+    db.flush()
+    topics = [models.Topic(title=f"{s.name} week {w}", subject_id=s.id, level="ss1", week_number=w)
+              for s in subjects for w in range(1, 13)]
+    users = [models.User(username=f"ps{n}", email=f"ps{n}@bench.local", hashed_password="x", role="student",
+                         level="ss1") for n in range(students)]
+    db.add_all(topics + users)
+    db.flush()
+
+    start = datetime.combine(term_start, datetime.min.time()) - timedelta(days=14)
+    rows = []
+    for user in users:
+        for d in range(days):
+            for _ in range(rng.randint(0, per_day * 2)):
+                total = rng.choice([5, 10])
+                rows.append({"user_id": user.id, "topic_id": rng.choice(topics).id, "score": rng.randint(0, total),
+                             "total_questions": total,
+                             "completed_at": start + timedelta(days=d, seconds=rng.randint(0, 86399))})
+    db.bulk_insert_mappings(models.ProgressTracking, rows)
+    db.commit()
+    return [u.id for u in users], len(rows)
+
+
+def raw_daily(db, user_id):
+    """What the daily/weekly endpoints grouped before: every attempt, by day."""
+    from sqlalchemy import func, select
+    from app.models import ProgressTracking
+
+    day = func.date(ProgressTracking.completed_at)
+    return db.execute(
+        select(day.label("day"), func.count().label("attempts"), func.sum(ProgressTracking.score).label("total_score"),
+               func.sum(ProgressTracking.total_questions).label("total_questions"))
+        .where(ProgressTracking.user_id == user_id)
+        .group_by(day)
+        .order_by(day)
+    ).all()
+
+
+def expected_series(db, user_id, bucket, term_start):
+    """Reference series straight from the attempts, bucketed in Python."""
+    from app.models import ProgressTracking
+
+    series = defaultdict(lambda: [0, 0, 0])
+    for p in db.query(ProgressTracking).filter(ProgressTracking.user_id == user_id):
+        day = p.completed_at.date()
+        if bucket == "day":
+            label = day.isoformat()
+        elif bucket == "week":
+            year, week, _ = day.isocalendar()
+            label = f"{year}-W{week:02d}"
+        elif bucket == "month":
+            label = day.strftime("%Y-%m")
+        else:
+            if day < term_start:
+                continue
+            label = f"Week {(day - term_start).days // 7 + 1}"
+        entry = series[label]
+        entry[0] += 1
+        entry[1] += p.score
+        entry[2] += p.total_questions
+    return series
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=30)
+    parser.add_argument("--days", type=int, default=100)
+    parser.add_argument("--attempts-per-day", type=int, default=10)
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'series.db')}"
+
+    from app.database import Base, SessionLocal, engine
+    from app.schema_upgrades import create_query_indexes
+    from app.services.score_rollups import rebuild
+    from app.services.time_buckets import BUCKETS, TERM_START, bucket_rows, daily_rows_query
+
+    Base.metadata.create_all(bind=engine)
+    create_query_indexes(engine)
+    db = SessionLocal()
+    student_ids, attempts = seed(db, args.students, args.days, args.attempts_per_day, TERM_START)
+    counts = rebuild(db)
+    print(f"{attempts} attempts → {counts['daily_rows']} daily rollup rows ({args.students} students, {args.days} days)")
+
+    failures = []
+    for user_id in student_ids:
+        rows = db.execute(daily_rows_query(user_id)).all()
+        for bucket in BUCKETS:
+            got = {b.label: [b.attempts, b.total_score, b.total_questions] for b in bucket_rows(rows, bucket)}
+            want = {label: [a, float(s), q] for label, (a, s, q) in expected_series(db, user_id, bucket, TERM_START).items()}
+            if got != want:
+                failures.append(f"student {user_id} {bucket} series differs")
+
+    def timed(fn):
+        started = time.perf_counter()
+        for user_id in student_ids:
+            fn(user_id)
+        return (time.perf_counter() - started) * 1000 / len(student_ids)
+
+    raw_ms = timed(lambda uid: raw_daily(db, uid))
+    rollup_ms = timed(lambda uid: bucket_rows(db.execute(daily_rows_query(uid)).all(), "term"))
+    raw_read = sum(r.attempts for uid in student_ids for r in raw_daily(db, uid)) / len(student_ids)
+    rollup_read = sum(db.scalar(daily_rows_count(uid)) for uid in student_ids) / len(student_ids)
+    db.close()
+
+    print(f"term series per student: raw {raw_ms:.2f} ms ({raw_read:.0f} rows read), "
+          f"rollup {rollup_ms:.2f} ms ({rollup_read:.0f} rows read)")
+    print()
+    for failure in failures[:10]:
+        print(f"❌ {failure}")
+    if not failures:
+        print(f"✅ {', '.join(BUCKETS)} series match the raw attempts for every student")
+    return 1 if failures else 0
+
+
+def daily_rows_count(user_id):
+    from sqlalchemy import func, select
+    from app.models import StudentDailyScore
+
+    return select(func.count()).where(StudentDailyScore.student_id == user_id)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+"""
+Query plan benchmark for the normalized-expression and composite indexes.
+
+Seeds a throwaway SQLite database and, for each hot query, prints the
+EXPLAIN QUERY PLAN and median run time twice:
+
+    before  the old query spelling (func.lower(...) etc.) without QUERY_INDEXES
+    after   the normalized(...) spelling with QUERY_INDEXES created
+
+Run from the backend/ directory:
+
+    python -m benchmarks.query_plans
+    python -m benchmarks.query_plans --students 5000 --runs 50
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+
+def seed(engine, students: int):
+    from app import models
+    from sqlalchemy.orm import Session
+
+    rng = random.Random(11)
+    levels = ["JSS1", "jss2", " Jss3", "SS1", "ss2 ", "SS3"]
+    days = ["Monday", "tuesday", "Wednesday ", "THURSDAY", "Friday"]
+
+    with Session(engine) as db:
+        subjects = [
+            models.Subject(name=f"Subject {i}", level=levels[i % len(levels)], department="")
+            for i in range(60)
+        ]
+        db.add_all(subjects)
+        db.flush()
+
+        topics = [
+            models.Topic(title=f"T{s.id}.{w}", subject_id=s.id, level=s.level, week_number=w)
+            for s in subjects for w in range(1, 14)
+        ]
+        db.add_all(topics)
+        db.flush()
+
+        questions = [models.TopicQuestion(topic_id=t.id, question="q", answer="a", question_type="short") for t in topics for _ in range(3)]
+        db.add_all(questions)
+
+        db.add_all([
+            models.Timetable(level=lv, day=d, period=p, subject_id=subjects[(p + i) % len(subjects)].id)
+            for i, lv in enumerate(levels) for d in days for p in range(1, 9)
+        ])
+
+        users = [
+            models.User(username=f"u{i}", email=f"u{i}@bench.local", hashed_password="x",
+                        role="student", level=levels[i % len(levels)])
+            for i in range(students)
+        ]
+        db.add_all(users)
+        db.flush()
+
+        now = datetime.utcnow()
+        db.add_all([
+            models.ProgressTracking(user_id=u.id, topic_id=rng.choice(topics).id, score=5, total_questions=10,
+                                    completed_at=now - timedelta(days=rng.randint(0, 120)))
+            for u in users for _ in range(10)
+        ])
+        db.flush()
+        db.add_all([
+            models.UserAnswer(user_id=u.id, question_id=q.id, answer="a")
+            for u in users for q in rng.sample(questions, 10)
+        ])
+        db.add_all([
+            models.Attendance(student_id=u.id, date=date.today() - timedelta(days=d), status="present")
+            for u in users for d in range(20)
+        ])
+        db.add(models.ChatGroup(name="g", is_class_group=True, level="jss1"))
+        db.flush()
+        db.add_all([
+            models.ChatMessage(group_id=1, sender_id=users[i % len(users)].id, content="m",
+                               timestamp=now - timedelta(minutes=i))
+            for i in range(students * 2)
+        ])
+        db.commit()
+
+
+def query_pairs():
+    """(label, before statement, after statement) for each hot query."""
+    from sqlalchemy import func, select
+    from app.models import (
+        Attendance, ChatMessage, ProgressTracking, Subject, Timetable, Topic, User, UserAnswer, normalized,
+    )
+
+    since = datetime.utcnow() - timedelta(days=7)
+    question_ids = list(range(1, 40))
+
+    return [
+        ("timetable today (level, day)",
+         select(Timetable).where(func.lower(func.trim(Timetable.day)) == "monday",
+                                 func.lower(func.trim(Timetable.level)) == "jss1").order_by(Timetable.period),
+         select(Timetable).where(normalized(Timetable.level) == "jss1",
+                                 normalized(Timetable.day) == "monday").order_by(Timetable.period)),
+        ("dashboard topic (subject, level, week)",
+         select(Topic).where(Topic.subject_id == 7, func.lower(Topic.level) == func.lower("jss2"), Topic.week_number == 5),
+         select(Topic).where(Topic.subject_id == 7, normalized(Topic.level) == "jss2", Topic.week_number == 5)),
+        ("test topics (subject name, level, weeks)",
+         select(Topic).join(Subject).where(func.lower(Topic.level) == "jss1", func.lower(Subject.name) == "subject 6",
+                                           Topic.week_number.between(1, 6)),
+         select(Topic).join(Subject).where(normalized(Subject.name) == "subject 6", normalized(Topic.level) == "jss1",
+                                           Topic.week_number.between(1, 6))),
+        ("students by level",
+         select(User.id).where(User.role == "student", func.lower(User.level) == "ss1"),
+         select(User.id).where(User.role == "student", normalized(User.level) == "ss1")),
+        ("answered questions",
+         select(UserAnswer.question_id).where(UserAnswer.user_id == 42),
+         select(UserAnswer.question_id).where(UserAnswer.user_id == 42, UserAnswer.question_id.in_(question_ids))),
+        ("daily progress (user, since)",
+         select(func.date(ProgressTracking.completed_at), func.sum(ProgressTracking.score))
+         .where(ProgressTracking.user_id == 42, ProgressTracking.completed_at >= since)
+         .group_by(func.date(ProgressTracking.completed_at)),
+         select(func.date(ProgressTracking.completed_at), func.sum(ProgressTracking.score))
+         .where(ProgressTracking.user_id == 42, ProgressTracking.completed_at >= since)
+         .group_by(func.date(ProgressTracking.completed_at))),
+        ("chat messages (group, time)",
+         select(ChatMessage).where(ChatMessage.group_id == 1).order_by(ChatMessage.timestamp.asc()).limit(50),
+         select(ChatMessage).where(ChatMessage.group_id == 1).order_by(ChatMessage.timestamp.asc()).limit(50)),
+        ("attendance (student, date)",
+         select(Attendance).where(Attendance.student_id == 42, Attendance.date == date.today()),
+         select(Attendance).where(Attendance.student_id == 42, Attendance.date == date.today())),
+    ]
+
+
+def plan_and_time(conn, stmt, runs: int):
+    sql = str(stmt.compile(conn.engine, compile_kwargs={"literal_binds": True}))
+    plan = [row[-1] for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + sql)]
+
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        conn.exec_driver_sql(sql).fetchall()
+        timings.append(time.perf_counter() - started)
+    return plan, statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=2000)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(), "query_plans.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+
+    from sqlalchemy.schema import DropIndex
+    from app.database import Base, engine
+    from app.models import QUERY_INDEXES
+    from app.schema_upgrades import create_query_indexes
+
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        for index in QUERY_INDEXES:
+            conn.execute(DropIndex(index))
+    seed(engine, args.students)
+
+    pairs = query_pairs()
+    results = {}
+    with engine.connect() as conn:
+        conn.exec_driver_sql("ANALYZE")
+        for label, before, _ in pairs:
+            results[label] = [plan_and_time(conn, before, args.runs)]
+
+    create_query_indexes(engine)
+    with engine.connect() as conn:
+        conn.exec_driver_sql("ANALYZE")
+        for label, _, after in pairs:
+            results[label].append(plan_and_time(conn, after, args.runs))
+
+    for label, ((plan_before, ms_before), (plan_after, ms_after)) in results.items():
+        print(f"\n■ {label}: {ms_before:.3f} ms → {ms_after:.3f} ms")
+        print("  before: " + " | ".join(plan_before))
+        print("  after : " + " | ".join(plan_after))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Quiz submission (POST /answers/submit-answers/) query-count check and benchmark.
+
+Seeds a throwaway SQLite database with a topic of objective and theory
+questions (reference embeddings stored), then submits 10- and 50-question
+quizzes two ways:
+
+    old   one TopicQuestion query and one check_answer per answer, one
+          UserAnswer add per answer (what submit_answers did before)
+    new   answers.submit_answers: one question query, one embedding batch,
+          one bulk UserAnswer insert
+
+and checks the new path runs the same number of queries whatever the quiz
+size and returns the same scores and per-answer results as the old one.
+
+Needs the sentence model (see benchmarks.answer_checker for --model and
+--random-weights). Run from the backend/ directory:
+
+    python -m benchmarks.quiz_submission --random-weights
+    python -m benchmarks.quiz_submission --sizes 10,50,100 --rounds 5
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.answer_checker import PAIRS, random_weights_copy
+
+
+def seed(db, count: int):
+    from app import models
+    from app.services.reference_embeddings import store_reference_embeddings
+
+    subject = models.Subject(name="Biology", level="ss1", department="science")
+    db.add(subject)
+    db.flush()
+    topic = models.Topic(title="Cells", subject_id=subject.id, level="ss1", week_number=1)
+    student = models.User(username="qs", email="qs@bench.local", hashed_password="x", role="student", level="ss1")
+    db.add_all([topic, student])
+    db.flush()
+
+    questions = []
+    for n in range(count):
+        reference, _, _ = PAIRS[n % len(PAIRS)]
+        if n % 2:
+            questions.append(models.TopicQuestion(topic_id=topic.id, question=f"Theory {n}", answer=f"{reference} [{n}]",
+                                                  correct_answer=f"{reference} [{n}]", question_type="theory"))
+        else:
+            questions.append(models.TopicQuestion(topic_id=topic.id, question=f"Objective {n}", answer="b",
+                                                  correct_answer="b", option_a="w", option_b="x", option_c="y",
+                                                  option_d="z", question_type="objective"))
+    db.add_all(questions)
+    store_reference_embeddings(db, questions)
+    db.commit()
+    return topic.id, student, questions
+
+
+def submission(topic_id, questions, size: int):
+    from app import schemas
+
+    answers = []
+    for n, question in enumerate(questions[:size]):
+        if question.option_a:
+            answers.append({"question_id": question.id, "answer": "B " if n % 4 == 0 else "c"})
+        else:
+            answers.append({"question_id": question.id, "answer": PAIRS[n % len(PAIRS)][1 + n % 3 // 2]})
+    return schemas.SubmitAnswersRequest(topic_id=topic_id, answers=answers)
+
+
+def old_submit(submission, db, user):
+    """submit_answers before: per-answer query, per-answer grading, per-answer add."""
+    from app import models
+    from app.services.answer_checker import check_answer
+    from app.services.reference_embeddings import reference_vector
+    from app.services.score_rollups import record_quiz_attempt
+
+    correct = 0
+    results = []
+    for ans in submission.answers:
+        question = db.query(models.TopicQuestion).filter_by(id=ans.question_id, topic_id=submission.topic_id).first()
+        if question.option_a and question.correct_answer:
+            expected = question.correct_answer.strip().lower()
+            is_correct = expected == ans.answer.strip().lower()
+            similarity = 1.0 if is_correct else 0.0
+            correction = None if is_correct else f"Correct answer: {expected}"
+        else:
+            is_correct, correction, similarity = check_answer(ans.answer, question.answer, *reference_vector(db, question))
+        db.add(models.UserAnswer(user_id=user.id, question_id=ans.question_id, answer=ans.answer,
+                                 is_correct=is_correct, correction=correction, similarity=similarity))
+        correct += bool(is_correct)
+        results.append({"question_id": question.id, "is_correct": is_correct, "similarity": round(similarity, 3),
+                        "correction": correction})
+    db.add(models.ProgressTracking(user_id=user.id, topic_id=submission.topic_id, score=correct,
+                                   total_questions=len(submission.answers)))
+    record_quiz_attempt(db, user.id, submission.topic_id, correct, len(submission.answers))
+    db.commit()
+    return {"score": correct, "total": len(submission.answers), "results": results}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10,50")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--model", help="sentence model directory (default: SENTENCE_MODEL_PATH)")
+    parser.add_argument("--random-weights", action="store_true")
+    args = parser.parse_args()
+    sizes = [int(s) for s in args.sizes.split(",")]
+
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'quiz.db')}"
+    os.environ["EMBEDDING_BACKEND"] = "local"
+
+    from app import config
+
+    model_path = args.model or config.SENTENCE_MODEL_PATH
+    if args.random_weights:
+        model_path = random_weights_copy(model_path)
+    os.environ["SENTENCE_MODEL_PATH"] = config.SENTENCE_MODEL_PATH = model_path
+
+    from app.database import Base, SessionLocal, engine
+    from app.routers.answers import submit_answers
+    from app.services import answer_checker
+    from app.services.query_profiler import capture_queries
+
+    answer_checker.SENTENCE_MODEL_PATH = model_path
+    if answer_checker.get_local_model() is None:
+        print(f"❌ Could not load the sentence model from {model_path}: {answer_checker._model_error}")
+        print("   Pass --model with a full copy of the model, or --random-weights")
+        return 1
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    topic_id, student, questions = seed(db, max(sizes))
+
+    failures = []
+    counts = {}
+    print(f"{'questions':<12}{'old ms':>10}{'old queries':>13}{'new ms':>10}{'new queries':>13}")
+    for size in sizes:
+        request = submission(topic_id, questions, size)
+        old_ms = new_ms = 0.0
+        for _ in range(args.rounds):
+            with capture_queries() as old_queries:
+                started = time.perf_counter()
+                old = old_submit(request, db, student)
+                old_ms += (time.perf_counter() - started) * 1000
+            with capture_queries() as new_queries:
+                started = time.perf_counter()
+                new = submit_answers(request, db=db, user=student)
+                new_ms += (time.perf_counter() - started) * 1000
+        counts[size] = new_queries.count
+        print(f"{size:<12}{old_ms / args.rounds:>10.1f}{old_queries.count:>13}"
+              f"{new_ms / args.rounds:>10.1f}{new_queries.count:>13}")
+
+        if (old["score"], old["total"]) != (new["score"], new["total"]):
+            failures.append(f"{size} questions: score {new['score']}/{new['total']}, before {old['score']}/{old['total']}")
+        for before, after in zip(old["results"], new["results"]):
+            if any(before[key] != after[key] for key in before):
+                failures.append(f"{size} questions: question {before['question_id']} graded {after}, before {before}")
+                break
+    db.close()
+
+    if len(set(counts.values())) != 1:
+        failures.append(f"query count grows with the quiz size: {counts}")
+
+    print()
+    for failure in failures:
+        print(f"❌ {failure}")
+    if not failures:
+        print(f"✅ {next(iter(counts.values()))} queries per submission at every size, same grades as before")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+"""
+Precomputed reference-answer embeddings check and benchmark.
+
+Seeds a throwaway SQLite database with theory questions, stores their
+reference embeddings the way question creation does, then grades a set of
+student answers:
+
+    before   check_answer embedding both texts (every reference re-embedded)
+    after    check_answer with reference_vector(): only the student's text
+
+counting texts sent to the model and timing both, and checks:
+
+    - verdicts and similarities are the same both ways
+    - a model version change re-embeds each reference once, then reuses it
+    - editing a question's answer re-embeds just that reference
+
+Needs the sentence model (see benchmarks.answer_checker for --model and
+--random-weights). Run from the backend/ directory:
+
+    python -m benchmarks.reference_embeddings --random-weights
+    python -m benchmarks.reference_embeddings --questions 200 --model /path/to/model
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.answer_checker import PAIRS, random_weights_copy
+
+
+def seed(db, count: int):
+    from app import models
+
+    subject = models.Subject(name="Biology", level="ss1", department="science")
+    db.add(subject)
+    db.flush()
+    topic = models.Topic(title="Cells", subject_id=subject.id, level="ss1", week_number=1)
+    db.add(topic)
+    db.flush()
+    questions = []
+    for n in range(count):
+        reference, _, _ = PAIRS[n % len(PAIRS)]
+        questions.append(models.TopicQuestion(topic_id=topic.id, question=f"Question {n}", answer=f"{reference} [{n}]",
+                                              correct_answer=f"{reference} [{n}]", question_type="theory"))
+    db.add_all(questions)
+    return questions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=100)
+    parser.add_argument("--model", help="sentence model directory (default: SENTENCE_MODEL_PATH)")
+    parser.add_argument("--random-weights", action="store_true")
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'references.db')}"
+    os.environ["EMBEDDING_BACKEND"] = "local"
+
+    from app import config
+
+    model_path = args.model or config.SENTENCE_MODEL_PATH
+    if args.random_weights:
+        model_path = random_weights_copy(model_path)
+    os.environ["SENTENCE_MODEL_PATH"] = config.SENTENCE_MODEL_PATH = model_path
+
+    from app.database import Base, SessionLocal, engine
+    from app.models import ReferenceEmbedding
+    from app.services import answer_checker
+    from app.services.reference_embeddings import reference_vector, store_reference_embeddings
+
+    answer_checker.SENTENCE_MODEL_PATH = model_path
+    if answer_checker.get_local_model() is None:
+        print(f"❌ Could not load the sentence model from {model_path}: {answer_checker._model_error}")
+        print("   Pass --model with a full copy of the model, or --random-weights")
+        return 1
+
+    embedded = []
+    local_embeddings = answer_checker._local_embeddings
+
+    def counting(texts):
+        embedded.append(len(texts))
+        return local_embeddings(texts)
+
+    answer_checker._local_embeddings = counting
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    questions = seed(db, args.questions)
+    store_reference_embeddings(db, questions)
+    db.commit()
+    stored = db.query(ReferenceEmbedding).count()
+    print(f"{args.questions} theory questions, {stored} reference embeddings stored at creation")
+
+    answers = [(q, PAIRS[n % len(PAIRS)][1 + n % 2]) for n, q in enumerate(questions)]
+
+    def grade(with_references: bool):
+        embedded.clear()
+        started = time.perf_counter()
+        results = [
+            answer_checker.check_answer(text, q.answer, *reference_vector(db, q)) if with_references
+            else answer_checker.check_answer(text, q.answer)
+            for q, text in answers
+        ]
+        return results, (time.perf_counter() - started) * 1000, sum(embedded)
+
+    before, before_ms, before_texts = grade(False)
+    after, after_ms, after_texts = grade(True)
+    print(f"{'':<10}{'ms':>10}{'texts embedded':>16}")
+    print(f"{'before':<10}{before_ms:>10.0f}{before_texts:>16}")
+    print(f"{'after':<10}{after_ms:>10.0f}{after_texts:>16}")
+
+    failures = []
+    if stored != args.questions:
+        failures.append(f"{stored} references stored for {args.questions} questions")
+    for n, (old, new) in enumerate(zip(before, after)):
+        if old[0] != new[0] or old[1] != new[1] or abs(old[2] - new[2]) > 1e-3:
+            failures.append(f"question {n}: {new} with stored reference, {old} without")
+            break
+    if after_texts != len(answers):
+        failures.append(f"{after_texts} texts embedded with stored references, expected {len(answers)}")
+
+    # A new model version: each reference re-embedded on first use, then reused
+    answer_checker._model_version = "local:changed"
+    _, _, first = grade(True)
+    _, _, second = grade(True)
+    print(f"after a model change: {first} texts embedded, then {second}")
+    if first != 2 * len(answers) or second != len(answers):
+        failures.append("model version change did not re-embed each reference exactly once")
+
+    # Editing one answer invalidates just that reference
+    questions[0].answer = "Cells are the basic unit of life."
+    embedded.clear()
+    reference_vector(db, questions[0])
+    reference_vector(db, questions[1])
+    if sum(embedded) != 1:
+        failures.append(f"editing one answer re-embedded {sum(embedded)} references")
+    db.commit()
+    db.close()
+
+    print()
+    for failure in failures:
+        print(f"❌ {failure}")
+    if not failures:
+        print("✅ Stored references grade identically and halve the texts embedded")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+"""
+Read-replica routing check.
+
+Creates a primary and two replica SQLite databases, each tagged with a
+different marker row, points DATABASE_REPLICA_URLS at the replicas and
+drives a read-only route that reports which database served it. Checks:
+
+    round_robin   reads alternate between the replicas, never the primary
+    least_loaded  reads go to the replica with fewer checked-out connections
+    fallback      an unreachable replica is skipped; with none left, the
+                  primary serves the read
+
+Run from the backend/ directory:
+
+    python -m benchmarks.replica_routing
+"""
+
+import os
+import sys
+import tempfile
+from collections import Counter
+
+
+def prepare_databases():
+    tmp = tempfile.mkdtemp()
+    urls = {name: f"sqlite:///{os.path.join(tmp, name + '.db')}" for name in ("primary", "replica_a", "replica_b")}
+
+    os.environ["DATABASE_URL"] = urls["primary"]
+    os.environ["DATABASE_REPLICA_URLS"] = f"{urls['replica_a']},{urls['replica_b']}"
+
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+    from app import models
+    from app.database import Base
+
+    for name, url in urls.items():
+        engine = create_engine(url)
+        Base.metadata.create_all(bind=engine)
+        with Session(engine) as db:
+            db.add(models.Subject(name=name, level="marker"))
+            db.commit()
+        engine.dispose()
+
+    return urls
+
+
+def served_by(count: int) -> Counter:
+    from app import database, models
+
+    seen = Counter()
+    for _ in range(count):
+        dependency = database.get_read_db()
+        db = next(dependency)
+        seen[db.query(models.Subject.name).filter(models.Subject.level == "marker").scalar()] += 1
+        dependency.close()
+    return seen
+
+
+def main() -> int:
+    prepare_databases()
+    from app import database
+
+    failures = []
+
+    def check(label, seen, expected):
+        ok = seen == Counter(expected)
+        print(f"{'✅' if ok else '❌'} {label:<28} {dict(seen)}")
+        if not ok:
+            failures.append(label)
+
+    database.REPLICA_STRATEGY = "round_robin"
+    check("round_robin", served_by(10), {"replica_a": 5, "replica_b": 5})
+
+    database.REPLICA_STRATEGY = "least_loaded"
+    busy = database.replicas[0].engine.connect()  # hold a connection on replica_a
+    check("least_loaded (a busy)", served_by(4), {"replica_b": 4})
+    busy.close()
+
+    database.REPLICA_STRATEGY = "round_robin"
+    broken = database.Replica("sqlite:////nonexistent-dir/replica.db")
+    database.replicas[1] = broken
+    check("fallback (b unreachable)", served_by(4), {"replica_a": 4})
+    print(f"   unreachable replica marked healthy={broken.healthy}")
+
+    database.replicas[:] = [database.Replica("sqlite:////nonexistent-dir/replica.db")]
+    check("fallback (all unreachable)", served_by(2), {"primary": 2})
+
+    database.replicas[:] = []
+    check("no replicas configured", served_by(2), {"primary": 2})
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,206 @@
+"""
+Score rollup consistency check and summary benchmark.
+
+Seeds a throwaway SQLite database with quiz attempts, test/exam results and
+graded assignments, recording each through the same score_rollups calls the
+submit endpoints make, then checks:
+
+    live == rebuild   rows maintained attempt by attempt match a full rebuild
+    summaries         my_summary_query / subject_summary_query on the rollups
+                      match the old aggregates over progress_tracking
+
+and times the old per-attempt aggregates against the rollup reads.
+
+Run from the backend/ directory:
+
+    python -m benchmarks.score_rollups
+    python -m benchmarks.score_rollups --students 200 --attempts 300
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+
+def seed(db, students: int, attempts: int):
+    from app import models
+    from app.services.score_rollups import record_quiz_attempt, record_subject_attempt
+
+    rng = random.Random(7)
+    teacher = models.User(username="sr_teacher", email="sr_teacher@bench.local", hashed_password="x", role="teacher")
+    subjects = [models.Subject(name=f"Subject {i}", level="ss1", department="science") for i in range(4)]
+    db.add(teacher)
+    db.add_all(subjects)
+    db.flush()
+    topics = [models.Topic(title=f"{s.name} topic {w}", subject_id=s.id, level="ss1", week_number=w)
+              for s in subjects for w in range(1, 6)]
+    assignments = [models.Assignment(title=f"{s.name} assignment", due_date=datetime.utcnow(), subject_id=s.id,
+                                     class_level="ss1", teacher_id=teacher.id) for s in subjects]
+    db.add_all(topics + assignments)
+    db.flush()
+    questions = [models.AssignmentObjectiveQuestion(assignment_id=a.id, question_text=f"q{i}", option1="a", option2="b",
+                                                    option3="c", option4="d", correct_option="a")
+                 for a in assignments for i in range(4)]
+    db.add_all(questions)
+    db.commit()
+
+    started = datetime.utcnow() - timedelta(days=60)
+    student_ids = []
+    for n in range(students):
+        student = models.User(username=f"sr{n}", email=f"sr{n}@bench.local", hashed_password="x",
+                              role="student", level="ss1")
+        db.add(student)
+        db.flush()
+        student_ids.append(student.id)
+
+        for i in range(attempts):
+            topic = rng.choice(topics)
+            total = rng.choice([0, 5, 10])
+            score = rng.randint(0, total)
+            at = started + timedelta(minutes=i * 7 + n)
+            db.add(models.ProgressTracking(user_id=student.id, topic_id=topic.id, score=score,
+                                           total_questions=total, completed_at=at))
+            record_quiz_attempt(db, student.id, topic.id, score, total, at)
+
+        for subject, test_type in ((subjects[0], "first"), (subjects[1], "second"), (subjects[2], "exam")):
+            score = rng.randint(0, 10)
+            model = models.ExamResult if test_type == "exam" else models.TestResult
+            at = started + timedelta(days=30, minutes=n)
+            db.add(model(user_id=student.id, subject=subject.name.lower(), level="ss1", test_type=test_type,
+                         total_score=score, total_questions=10, percentage=score * 10, submitted_at=at))
+            record_subject_attempt(db, student.id, subject.id, "exam" if test_type == "exam" else "test",
+                                   score, 10, at)
+
+        for assignment in assignments[:2]:
+            at = started + timedelta(days=40, minutes=n)
+            submission = models.AssignmentSubmission(assignment_id=assignment.id, student_id=student.id,
+                                                     file_url="x", submitted_at=at, status="completed")
+            db.add(submission)
+            db.flush()
+            correct = 0
+            for q in [q for q in questions if q.assignment_id == assignment.id]:
+                is_correct = rng.random() < 0.6
+                correct += is_correct
+                db.add(models.AssignmentObjectiveAnswer(submission_id=submission.id, question_id=q.id,
+                                                        selected_option="a" if is_correct else "b",
+                                                        is_correct=is_correct))
+            submission.score = correct
+            record_subject_attempt(db, student.id, assignment.subject_id, "assignment", correct, 4, at)
+        db.commit()
+    return student_ids
+
+
+def rollup_rows(db):
+    from app import models
+
+    def rows(model, key):
+        return {
+            tuple(getattr(r, k) for k in key): (
+                r.attempts, round(r.score_total, 4), r.questions_total, r.best_percentage, r.latest_percentage,
+                r.last_attempt_at, getattr(r, "completed_at", None),
+            )
+            for r in db.query(model).all()
+        }
+
+    daily = {
+        (r.student_id, r.subject_id, r.day): (r.attempts, round(r.score_total, 4), r.questions_total)
+        for r in db.query(models.StudentDailyScore).all()
+    }
+    return (rows(models.StudentTopicScore, ("student_id", "topic_id")),
+            rows(models.StudentSubjectScore, ("student_id", "subject_id", "source")),
+            daily)
+
+
+def raw_summaries(db, user_id: int):
+    """What my_summary_query / subject_summary_query computed before the rollups."""
+    from sqlalchemy import case, func, select
+    from app.models import ProgressTracking, Subject, Topic
+
+    summary = db.execute(select(
+        func.count(func.distinct(ProgressTracking.topic_id)),
+        func.count(func.distinct(case(
+            (ProgressTracking.score >= ProgressTracking.total_questions, ProgressTracking.topic_id)
+        ))),
+        func.coalesce(func.sum(ProgressTracking.score), 0),
+        func.coalesce(func.sum(ProgressTracking.total_questions), 0),
+    ).where(ProgressTracking.user_id == user_id)).one()
+    subjects = db.execute(
+        select(Subject.name, func.sum(ProgressTracking.score), func.sum(ProgressTracking.total_questions))
+        .join(Topic, ProgressTracking.topic_id == Topic.id)
+        .join(Subject, Topic.subject_id == Subject.id)
+        .where(ProgressTracking.user_id == user_id)
+        .group_by(Subject.name)
+    ).all()
+    return tuple(summary), sorted((name, float(s), int(t)) for name, s, t in subjects)
+
+
+def rollup_summaries(db, user_id: int):
+    from app.routers.progress import my_summary_query, subject_summary_query
+
+    summary = db.execute(my_summary_query(user_id)).one()
+    subjects = db.execute(subject_summary_query(user_id)).all()
+    return (
+        (summary.total_topics, summary.completed_topics, float(summary.total_score), int(summary.total_questions)),
+        sorted((r.subject_name, float(r.total_score), int(r.total_questions)) for r in subjects),
+    )
+
+
+def timed(fn, db, student_ids, repeat: int = 3):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for user_id in student_ids:
+            fn(db, user_id)
+    return (time.perf_counter() - started) * 1000 / (repeat * len(student_ids))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=50)
+    parser.add_argument("--attempts", type=int, default=200, help="quiz attempts per student")
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'rollups.db')}"
+
+    from app.database import Base, SessionLocal, engine
+    from app.services.score_rollups import rebuild
+    import app.routers.progress  # noqa: F401 (keep the import out of the timings)
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    student_ids = seed(db, args.students, args.attempts)
+
+    failures = []
+    live = rollup_rows(db)
+    counts = rebuild(db)
+    rebuilt = rollup_rows(db)
+    print(f"rebuild: {counts['topic_rows']} topic rows, {counts['subject_rows']} subject rows, "
+          f"{counts['daily_rows']} daily rows")
+    for name, before, after in zip(("topic", "subject", "daily"), live, rebuilt):
+        if before != after:
+            diff = [k for k in set(before) | set(after) if before.get(k) != after.get(k)][:3]
+            failures.append(f"live {name} rollups differ from rebuild, e.g. {diff}")
+
+    mismatched = [uid for uid in student_ids if raw_summaries(db, uid) != rollup_summaries(db, uid)]
+    if mismatched:
+        failures.append(f"summaries differ for students {mismatched[:5]}: "
+                        f"{raw_summaries(db, mismatched[0])} != {rollup_summaries(db, mismatched[0])}")
+
+    raw_ms = timed(raw_summaries, db, student_ids)
+    rollup_ms = timed(rollup_summaries, db, student_ids)
+    print(f"summary per student ({args.attempts} quiz attempts): raw {raw_ms:.2f} ms, rollups {rollup_ms:.2f} ms")
+    db.close()
+
+    print()
+    for failure in failures:
+        print(f"❌ {failure}")
+    if not failures:
+        print("✅ Live rollups match a full rebuild and the old summaries")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""
+Worker boot benchmark.
+
+Imports app.main in fresh interpreters under `python -X importtime` and
+reports the wall time plus the slowest top-level packages by cumulative
+import time. Fails (exit 1) if a lazily loaded ML/RAG package shows up in the
+import graph or the median boot exceeds --max-seconds.
+
+Run from the backend/ directory:
+
+    python -m benchmarks.startup_imports
+    python -m benchmarks.startup_imports --runs 5 --top 25 --max-seconds 3
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+# Loaded on first use only (rag_chatbot.chat, smart_qgen); importing app.main must not pull them in
+LAZY_PACKAGES = [
+    "chromadb",
+    "llama_index",
+    "transformers",
+    "torch",
+    "sentence_transformers",
+    "edge_tts",
+]
+
+
+def import_app(env: dict):
+    """(wall seconds, {module: (self us, cumulative us)}) for one cold import of app.main."""
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    elapsed = time.perf_counter() - started
+    if proc.returncode != 0:
+        tail = "\n".join(line for line in proc.stderr.splitlines() if not line.startswith("import time:"))
+        raise SystemExit(f"❌ import app.main failed:\n{tail[-2000:]}")
+
+    modules = {}
+    for line in proc.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return elapsed, modules
+
+
+def by_package(modules: dict) -> dict:
+    """Self time summed per top-level package, which is what a lazy import saves."""
+    totals = defaultdict(int)
+    for name, (self_us, _) in modules.items():
+        totals[name.split(".")[0]] += self_us
+    return totals
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--max-seconds", type=float, default=None)
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'startup.db')}")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [os.getcwd(), env.get("PYTHONPATH")]))
+
+    runs = [import_app(env) for _ in range(args.runs)]
+    walls = [elapsed for elapsed, _ in runs]
+    modules = runs[-1][1]
+    packages = by_package(modules)
+
+    print(f"import app.main: median {statistics.median(walls):.2f}s over {args.runs} runs "
+          f"(min {min(walls):.2f}s, max {max(walls):.2f}s), {len(modules)} modules")
+    print(f"\n{'package':<32}{'self ms':>10}")
+    for name, self_us in sorted(packages.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{name:<32}{self_us / 1000:>10.1f}")
+
+    failures = []
+    loaded = sorted(p for p in LAZY_PACKAGES if p in packages)
+    if loaded:
+        failures.append(f"lazy packages imported at startup: {', '.join(loaded)}")
+    if args.max_seconds is not None and statistics.median(walls) > args.max_seconds:
+        failures.append(f"median boot {statistics.median(walls):.2f}s exceeds {args.max_seconds:.2f}s")
+
+    print()
+    for failure in failures:
+        print(f"❌ {failure}")
+    if not failures:
+        print("✅ No ML/RAG packages imported at startup")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -17,6 +17,8 @@ const AdminAnalyticsPage = () => {
     studentTopicScores: [],
     dailyScores: [],
   });
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   const [level, setLevel] = useState('');
   const [department, setDepartment] = useState('');
@@ -45,22 +47,47 @@ const AdminAnalyticsPage = () => {
   }, [level, department]);
 
   useEffect(() => {
+    let cancelled = false;
     const fetchData = async () => {
+      setNextCursor(null);
       if (!level) return;
       try {
-        const res = await fetchAdminAnalyticsData(subject, level);
+        // First page only; averages and daily progress are computed server-side over every row
+        const first = await fetchAdminAnalyticsData(subject, level);
+        if (cancelled) return;
         setData({
-          subjectAverages: res.subject_average,
-          studentTopicScores: res.student_topic_scores,
-          dailyScores: res.daily_progress,
+          subjectAverages: first.subject_average,
+          studentTopicScores: first.student_topic_scores,
+          dailyScores: first.daily_progress,
         });
+        setNextCursor(first.next_cursor);
       } catch (err) {
         console.error('❌ Error fetching analytics data', err);
       }
     };
     fetchData();
+    return () => {
+      cancelled = true;
+    };
   }, [subject, level]);
 
+  const loadMoreScores = async () => {
+    if (!nextCursor || loadingMore) return;
+    setLoadingMore(true);
+    try {
+      const page = await fetchAdminAnalyticsData(subject, level, nextCursor);
+      setData((prev) => ({
+        ...prev,
+        studentTopicScores: prev.studentTopicScores.concat(page.student_topic_scores),
+      }));
+      setNextCursor(page.next_cursor);
+    } catch (err) {
+      console.error('❌ Error fetching more student scores', err);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   return (
     <div className="max-w-7xl mx-auto p-6 bg-card text-card-foreground rounded-lg shadow-lg space-y-6 border border-border">
       <h2 className="text-2xl font-bold">📊 Admin Analytics</h2>
@@ -140,7 +167,20 @@ const AdminAnalyticsPage = () => {
 
       {/* Charts */}
       <div className="grid gap-6">
-        {showStudentScores && <ChartStudentTopicScores data={data.studentTopicScores} />}
+        {showStudentScores && (
+          <div className="space-y-2">
+            <ChartStudentTopicScores data={data.studentTopicScores} />
+            {nextCursor && (
+              <button
+                onClick={loadMoreScores}
+                disabled={loadingMore}
+                className="px-4 py-2 bg-primary text-primary-foreground rounded-md hover:opacity-90 transition-colors disabled:opacity-50"
+              >
+                {loadingMore ? 'Loading...' : 'Load more students'}
+              </button>
+            )}
+          </div>
+        )}
         {showDailyProgress && <ChartDailyProgress data={data.dailyScores} />}
         {showSubjectAverage && <ChartSubjectAverage data={data.subjectAverages} />}
       </div>
@@ -5,11 +5,29 @@ export const fetchStudentProgress = async () => {
   return await fetchWithAuth('/progress/my-topic-progress');
 };
 
-export const fetchAdminAnalyticsData = async (subject = '', level = '') => {
+// { a: [1, 2], b: [3, 4] } -> [{ a: 1, b: 3 }, { a: 2, b: 4 }]
+const columnsToRows = (columns) => {
+  if (!columns) return [];
+  const names = Object.keys(columns);
+  const length = names.length ? columns[names[0]].length : 0;
+  return Array.from({ length }, (_, i) =>
+    Object.fromEntries(names.map((name) => [name, columns[name][i]]))
+  );
+};
+
+// Analytics come back column-wise and paginated; pass `cursor` (next_cursor) for more student scores
+export const fetchAdminAnalyticsData = async (subject = '', level = '', cursor = '') => {
   const query = new URLSearchParams();
   if (subject) query.append('subject', subject);
   if (level) query.append('level', level);
-  return await fetchWithAuth(`/progress/admin/analytics?${query.toString()}`);
+  if (cursor) query.append('cursor', cursor);
+  const res = await fetchWithAuth(`/progress/admin/analytics?${query.toString()}`);
+  return {
+    subject_average: columnsToRows(res.subject_average),
+    student_topic_scores: columnsToRows(res.student_topic_scores),
+    daily_progress: columnsToRows(res.daily_progress),
+    next_cursor: res.next_cursor,
+  };
 };
 
 export const fetchAllStudentProgress = async (subject = '') => {